@@ -1,21 +1,25 @@
-import streamlit as st
-from PIL import Image, ImageDraw, ImageFont
 import os
-import base64
-from io import BytesIO
-
-MOCKUP_DIR = "mockups"
-MOCKUP_FILES = [
-    "login.png",
-    "vehicle_selection.png",
-    "diagnostic.png",
-    "results.png",
-    "upload.png",
-    "recognition.png",
-    "schematic.png",
-    "dashboard.png",
-    "knowledge.png",
-]
+import tempfile
+import time
+import uuid
+
+import streamlit as st
+
+from automotive_ai.mockup_renderer import MOCKUP_DIR, MOCKUP_LOCALES, load_mockup_files, mockup_key, regenerate_stale_mockups
+from automotive_ai.analysis import DONE, PENDING, AnalysisQueueFull, AnalysisService, analyze_upload
+from automotive_ai.batch_upload import BatchService
+from automotive_ai.canlog import import_log
+from automotive_ai.diagnosis import MEASURE, DiagnosisEngine
+from automotive_ai.dtc import DtcDictionary, parse_codes
+from automotive_ai.fingerprint import ResultCache, perceptual_hash
+from automotive_ai.knowledge_base import FACETS, KnowledgeBase
+from automotive_ai.metrics import MetricsRegistry, RerunTrace, create_process_metrics
+from automotive_ai.netlist import PATH_TYPES, NetlistLibrary
+from automotive_ai.recognition import MicroBatcher, load_backend
+from automotive_ai.schematic_tiles import TileCache, list_schematics, open_pyramid
+from automotive_ai.storage import OPEN, Storage
+from automotive_ai.uploads import decode_upload_preview
+from automotive_ai.vehicle_catalog import VehicleCatalog
 
 # Configuração da página
 st.set_page_config(
@@ -24,567 +28,1085 @@ st.set_page_config(
     layout="wide"
 )
 
-# Função para criar imagens de mockup
-def create_mockup(width, height, title, elements=None, bg_color="#f0f2f6", theme="light"):
-    # Criar imagem base
-    img = Image.new('RGB', (width, height), color=bg_color)
-    draw = ImageDraw.Draw(img)
-    
-    # Definir cores com base no tema
-    if theme == "dark":
-        text_color = "#FFFFFF"
-        accent_color = "#4287f5"
-        secondary_bg = "#2c3e50"
+# Gerar mockups apenas quando necessÃ¡rio. Normally a no-op: the build step
+# pre-bakes every locale with `python -m automotive_ai.mockup_renderer`.
+@st.cache_resource
+def ensure_mockups_generated():
+    return regenerate_stale_mockups(locales=MOCKUP_LOCALES)
+
+# Mockups are cached as PNG bytes read once per process. With
+# output_format="PNG", st.image serves them as-is; PIL images, file paths and
+# WebP bytes would be re-encoded on every rerun.
+@st.cache_resource
+def load_mockup_images(locale):
+    ensure_mockups_generated()
+    return load_mockup_files(locale)
+
+# Process-wide span histograms, exported per METRICS_PORT / METRICS_LOG_SECONDS
+@st.cache_resource
+def get_process_metrics():
+    return create_process_metrics()
+
+# Each run gets a trace of timing spans, observed into the process-wide and
+# this session's histograms. kind is "rerun" for a full script run and
+# "fragment" for a run of the upload panel alone.
+def start_rerun_trace(kind):
+    session_metrics = st.session_state.setdefault("session_metrics", MetricsRegistry())
+    trace = RerunTrace(kind, (get_process_metrics(), session_metrics))
+    st.session_state[f"{kind}_trace"] = trace
+    return trace
+
+def show_span_table(title, rows):
+    st.sidebar.markdown(f"**{title}**")
+    st.sidebar.table(rows)
+
+# Debug breakdown of this run, the last panel-only run and the session totals
+def show_rerun_timings(trace):
+    trace.finish()
+    if not st.sidebar.checkbox("Debug: rerun timings", key="debug_rerun_timings"):
+        return
+    show_span_table(
+        f"Last rerun: {trace.total * 1000:.1f} ms",
+        [{"span": name, "ms": round(seconds * 1000, 2)} for name, seconds in trace.spans],
+    )
+    fragment_trace = st.session_state.get("fragment_trace")
+    if fragment_trace is not None and fragment_trace.finished:
+        show_span_table(
+            f"Last upload panel run: {fragment_trace.total * 1000:.1f} ms",
+            [{"span": name, "ms": round(seconds * 1000, 2)} for name, seconds in fragment_trace.spans],
+        )
+    show_span_table(
+        "Session",
+        [
+            {
+                "span": name,
+                "n": stats["count"],
+                "p50 ms": round(stats["p50_s"] * 1000, 2),
+                "p95 ms": round(stats["p95_s"] * 1000, 2),
+            }
+            for name, stats in st.session_state["session_metrics"].summary().items()
+        ],
+    )
+
+# Intervalo (s) entre consultas ao status de uma análise em andamento
+ANALYSIS_POLL_SECONDS = 0.5
+# Thumbnails per row in batch mode
+BATCH_COLUMNS = 4
+
+# Textos do painel interativo de upload/captura em cada idioma
+UPLOAD_PANEL_TEXT = {
+    "en": {
+        "image_type": "Image type",
+        "image_types": ["ECU Module", "Label", "Component", "Schematic"],
+        "upload": "Upload image",
+        "upload_help": "Upload an image of the component or label.",
+        "enable_camera": "Enable camera capture",
+        "enable_camera_help": "Camera permission is requested only after enabling this option.",
+        "camera": "Capture with camera",
+        "camera_disabled": "Camera is disabled by default. Enable above to capture.",
+        "received": "Received image ({image_type})",
+        "analyze": "Analyze image",
+        "analyzing": "Running sample analysis...",
+        "queued": "Waiting for a free analysis worker...",
+        "busy": "The analysis queue is full ({depth} waiting). Try again in a moment.",
+        "failed": "Analysis failed: {error}",
+        "expired": "The analysis result has expired. Press Analyze image to run it again.",
+        "cache_hit": "Reused the result of a matching earlier image. ",
+        "cache_stats": "Result cache: {hits} hits, {misses} misses.",
+        "success": "Image processed successfully.",
+        "resolution": "Detected resolution: {width}x{height}",
+        "mode": "Color mode: {mode}",
+        "analysis_size": "Analysis input: {width}x{height}",
+        "rejected": "Retake the photo: {reasons}.",
+        "reasons": {
+            "blurry": "it is out of focus or moved",
+            "too_dark": "it is too dark",
+            "too_bright": "it is overexposed",
+            "low_contrast": "it has too little contrast",
+            "no_label": "no label or print was found",
+        },
+        "quality": "Label quality: sharpness {sharpness:.0f}, brightness {brightness:.0f}/255, skew {skew:+.1f} deg ({ms:.0f} ms)",
+        "recognized": "Recognized: {components}",
+        "recognition_stats": "{backend} backend, batch of {batch}, {ms:.0f} ms",
+        "components": {
+            "ecu_module": "ECU module",
+            "label": "label",
+            "relay": "relay",
+            "fuse": "fuse",
+            "connector": "connector",
+            "sensor": "sensor",
+            "ignition_coil": "ignition coil",
+            "injector": "injector",
+            "schematic": "schematic",
+        },
+        "placeholder": (
+            "Component labels are hidden: the reference model has untrained weights. "
+            "Set RECOGNITION_BACKEND=onnx and RECOGNITION_MODEL to a trained model to see them."
+        ),
+        "no_image": "Upload an image or enable the camera to run analysis.",
+        "batch_mode": "Batch mode (many photos)",
+        "batch_mode_help": "Check dozens of photos at once, for example when documenting a harness.",
+        "batch_upload": "Upload photos",
+        "batch_start": "Check {count} photos",
+        "batch_progress": "{done} of {total} photos checked",
+        "batch_done": "{total} photos checked in {seconds:.1f} s: {accepted} usable, {retake} to retake.",
+        "batch_pending": "Waiting...",
+        "batch_ok": "Usable, sharpness {sharpness:.0f}",
+        "batch_retake": "Retake: {reasons}",
+        "batch_failed": "Could not read: {error}",
+    },
+    "pt": {
+        "image_type": "Tipo de imagem",
+        "image_types": ["Modulo ECU", "Etiqueta", "Componente", "Esquema"],
+        "upload": "Carregar imagem",
+        "upload_help": "Envie uma imagem do componente ou etiqueta.",
+        "enable_camera": "Ativar captura por camera",
+        "enable_camera_help": "A camera so sera solicitada apos ativar esta opcao.",
+        "camera": "Capturar com camera",
+        "camera_disabled": "Camera desativada por padrao. Ative acima para capturar.",
+        "received": "Imagem recebida ({image_type})",
+        "analyze": "Analisar imagem",
+        "analyzing": "Executando analise de exemplo...",
+        "queued": "Aguardando um processador de analise livre...",
+        "busy": "A fila de analise esta cheia ({depth} aguardando). Tente novamente em instantes.",
+        "failed": "Falha na analise: {error}",
+        "expired": "O resultado da analise expirou. Clique em Analisar imagem para executar de novo.",
+        "cache_hit": "Resultado reaproveitado de uma imagem equivalente. ",
+        "cache_stats": "Cache de resultados: {hits} acertos, {misses} falhas.",
+        "success": "Imagem processada com sucesso.",
+        "resolution": "Resolucao detectada: {width}x{height}",
+        "mode": "Modo de cor: {mode}",
+        "analysis_size": "Entrada da analise: {width}x{height}",
+        "rejected": "Tire a foto novamente: {reasons}.",
+        "reasons": {
+            "blurry": "esta fora de foco ou tremida",
+            "too_dark": "esta escura demais",
+            "too_bright": "esta clara demais",
+            "low_contrast": "tem pouco contraste",
+            "no_label": "nenhuma etiqueta ou texto foi encontrado",
+        },
+        "quality": "Qualidade da etiqueta: nitidez {sharpness:.0f}, brilho {brightness:.0f}/255, inclinacao {skew:+.1f} graus ({ms:.0f} ms)",
+        "recognized": "Reconhecido: {components}",
+        "recognition_stats": "Backend {backend}, lote de {batch}, {ms:.0f} ms",
+        "components": {
+            "ecu_module": "modulo ECU",
+            "label": "etiqueta",
+            "relay": "rele",
+            "fuse": "fusivel",
+            "connector": "conector",
+            "sensor": "sensor",
+            "ignition_coil": "bobina de ignicao",
+            "injector": "bico injetor",
+            "schematic": "esquema",
+        },
+        "placeholder": (
+            "Os rotulos dos componentes ficam ocultos: o modelo de referencia tem pesos nao treinados. "
+            "Defina RECOGNITION_BACKEND=onnx e RECOGNITION_MODEL com um modelo treinado para ve-los."
+        ),
+        "no_image": "Envie uma imagem ou ative a camera para habilitar a analise.",
+        "batch_mode": "Modo em lote (varias fotos)",
+        "batch_mode_help": "Confira dezenas de fotos de uma vez, por exemplo ao documentar um chicote.",
+        "batch_upload": "Carregar fotos",
+        "batch_start": "Conferir {count} fotos",
+        "batch_progress": "{done} de {total} fotos conferidas",
+        "batch_done": "{total} fotos conferidas em {seconds:.1f} s: {accepted} aproveitaveis, {retake} para tirar de novo.",
+        "batch_pending": "Aguardando...",
+        "batch_ok": "Aproveitavel, nitidez {sharpness:.0f}",
+        "batch_retake": "Tirar de novo: {reasons}",
+        "batch_failed": "Nao foi possivel ler: {error}",
+    },
+}
+
+# Preview decoded once per uploaded file and kept in this session only
+def get_upload_preview(uploaded_file, lang, trace):
+    key = f"upload_preview_{lang}"
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != uploaded_file.file_id:
+        with trace.span("image_open"):
+            cached = (uploaded_file.file_id, decode_upload_preview(uploaded_file))
+        st.session_state[key] = cached
+    return cached[1]
+
+@st.cache_resource
+def get_analysis_service():
+    return AnalysisService()
+
+# Polls a queued analysis without blocking the script thread and, once the
+# job finishes, shows its result right here: neither the panel nor the page
+# reruns for it. Streamlit stops the polling when the panel next reruns,
+# because the finished analysis no longer renders this fragment.
+@st.fragment(run_every=ANALYSIS_POLL_SECONDS)
+def analysis_progress(lang, analysis, upload):
+    render_traced(lambda lang, trace: render_analysis(analysis, upload, lang, trace), lang)
+
+def render_analysis(analysis, upload, lang, trace):
+    text = UPLOAD_PANEL_TEXT[lang]
+    job = collect_analysis(analysis, trace)
+    if job is None:
+        show_analysis_result(analysis, upload, text)
     else:
-        text_color = "#333333"
-        accent_color = "#2c7be5"
-        secondary_bg = "#e9ecef"
-    
-    # Desenhar cabeçalho
-    draw.rectangle([(0, 0), (width, 60)], fill=accent_color)
-    
-    # Tentar carregar fonte, se falhar usar fonte padrão
+        st.info(text["queued"] if job.status == PENDING else text["analyzing"])
+
+# Model loaded and warmed up once per process; analyses from every session
+# share its micro-batches
+@st.cache_resource
+def get_recognizer():
+    return MicroBatcher(load_backend())
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+def show_analysis_result(analysis, upload, text):
+    if analysis.get("expired"):
+        st.warning(text["expired"])
+        return
+    if "error" in analysis:
+        st.error(text["failed"].format(error=analysis["error"]))
+        return
+    result = analysis["result"]
+    width_img, height_img = upload.source_size
+    width_analysis, height_analysis = result["analysis_size"]
+    if result["accepted"]:
+        st.success(text["success"])
+    else:
+        st.warning(text["rejected"].format(reasons=", ".join(text["reasons"][reason] for reason in result["reasons"])))
+    st.write(text["resolution"].format(width=width_img, height=height_img))
+    st.write(text["mode"].format(mode=upload.source_mode))
+    st.write(text["analysis_size"].format(width=width_analysis, height=height_analysis))
+    st.write(text["quality"].format(
+        sharpness=result["sharpness"], brightness=result["brightness"], skew=result["skew"], ms=result["preprocess_ms"]))
+    if "components" in result:
+        # An untrained model's labels would read as findings
+        if result["trained"]:
+            st.write(text["recognized"].format(components=", ".join(
+                f"{text['components'].get(label, label)} {score:.0%}" for label, score in result["components"])))
+        else:
+            st.info(text["placeholder"])
+        st.caption(text["recognition_stats"].format(
+            backend=result["backend"], batch=result["batch_size"], ms=result["recognition_ms"]))
+    stats = get_result_cache().stats()
+    st.caption(
+        (text["cache_hit"] if analysis.get("cached") else "")
+        + text["cache_stats"].format(hits=stats["hits"], misses=stats["misses"])
+    )
+
+# Near-duplicates of an already analysed image skip inference; anything else
+# is queued on the analysis worker pool.
+def start_analysis(selected_image_file, upload, analysis_key, text):
+    fingerprint = perceptual_hash(upload.preview)
+    cached_result = get_result_cache().get(fingerprint)
+    analysis = {"file_id": selected_image_file.file_id, "fingerprint": fingerprint}
+    if cached_result is not None:
+        analysis.update(result=cached_result, cached=True)
+        st.session_state[analysis_key] = analysis
+        return
     try:
-        font_title = ImageFont.truetype("arial.ttf", 24)
-        font_normal = ImageFont.truetype("arial.ttf", 16)
-        font_small = ImageFont.truetype("arial.ttf", 12)
-    except IOError:
-        font_title = ImageFont.load_default()
-        font_normal = ImageFont.load_default()
-        font_small = ImageFont.load_default()
-    
-    # Adicionar título
-    draw.text((20, 15), title, fill="#FFFFFF", font=font_title)
-    
-    # Adicionar elementos personalizados se fornecidos
-    if elements:
-        for elem in elements:
-            elem_type = elem.get("type")
-            x, y = elem.get("position", (0, 0))
-            
-            if elem_type == "text":
-                draw.text((x, y), elem.get("content", ""), fill=elem.get("color", text_color), font=font_normal)
-            
-            elif elem_type == "rectangle":
-                width_rect = elem.get("width", 100)
-                height_rect = elem.get("height", 40)
-                draw.rectangle([(x, y), (x + width_rect, y + height_rect)], 
-                              fill=elem.get("fill", secondary_bg),
-                              outline=elem.get("outline", accent_color))
-            
-            elif elem_type == "button":
-                width_btn = elem.get("width", 120)
-                height_btn = elem.get("height", 40)
-                draw.rectangle([(x, y), (x + width_btn, y + height_btn)], 
-                              fill=elem.get("fill", accent_color),
-                              outline=elem.get("outline", "#1a5cb0"))
-                
-                # Texto do botão
-                btn_text = elem.get("text", "Botão")
-                # Calcular tamanho do texto usando textbbox
-                bbox = draw.textbbox((0, 0), btn_text, font=font_normal)
-                text_w = bbox[2] - bbox[0]
-                text_h = bbox[3] - bbox[1]
-                text_x = x + (width_btn - text_w) // 2
-                text_y = y + (height_btn - text_h) // 2
-                draw.text((text_x, text_y), btn_text, fill="#FFFFFF", font=font_normal)
-            
-            elif elem_type == "input":
-                width_input = elem.get("width", 200)
-                height_input = elem.get("height", 40)
-                draw.rectangle([(x, y), (x + width_input, y + height_input)], 
-                              fill="#FFFFFF",
-                              outline="#cccccc")
-                
-                # Placeholder
-                placeholder = elem.get("placeholder", "")
-                draw.text((x + 10, y + 10), placeholder, fill="#999999", font=font_normal)
-            
-            elif elem_type == "image_placeholder":
-                width_img = elem.get("width", 150)
-                height_img = elem.get("height", 150)
-                draw.rectangle([(x, y), (x + width_img, y + height_img)], 
-                              fill="#e0e0e0",
-                              outline="#cccccc")
-                
-                # Ícone de imagem
-                icon_text = "📷"
-                draw.text((x + width_img//2 - 10, y + height_img//2 - 10), icon_text, fill="#999999", font=font_title)
-            
-            elif elem_type == "card":
-                width_card = elem.get("width", 300)
-                height_card = elem.get("height", 200)
-                draw.rectangle([(x, y), (x + width_card, y + height_card)], 
-                              fill="#FFFFFF",
-                              outline="#dddddd")
-                
-                # Título do card
-                card_title = elem.get("title", "")
-                draw.text((x + 15, y + 15), card_title, fill=text_color, font=font_normal)
-                
-                # Conteúdo do card
-                card_content = elem.get("content", "")
-                draw.text((x + 15, y + 50), card_content, fill=text_color, font=font_small)
-            
-            elif elem_type == "menu":
-                menu_items = elem.get("items", [])
-                item_height = 40
-                menu_width = elem.get("width", 200)
-                
-                for i, item in enumerate(menu_items):
-                    item_y = y + (i * item_height)
-                    # Fundo do item
-                    draw.rectangle([(x, item_y), (x + menu_width, item_y + item_height)], 
-                                  fill=secondary_bg if i % 2 == 0 else "#FFFFFF")
-                    # Texto do item
-                    draw.text((x + 15, item_y + 10), item, fill=text_color, font=font_normal)
-    
-    return img
-
-# Função para converter imagem para base64 (para exibição no Streamlit)
-def get_image_base64(img):
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
-
-# Função para salvar mockup
-def save_mockup(img, filename):
-    os.makedirs(MOCKUP_DIR, exist_ok=True)
-    filepath = os.path.join(MOCKUP_DIR, filename)
-    img.save(filepath)
-    return filepath
-
-# Função para criar e salvar todos os mockups
-def create_all_mockups():
-    mockups = {}
-    
-    # 1. Tela de Login
-    login_elements = [
-        {"type": "text", "position": (width//2-150, 100), "content": "Diagnóstico Inteligente Automotivo", "color": "#333333"},
-        {"type": "text", "position": (width//2-100, 150), "content": "Acesso ao Sistema", "color": "#666666"},
-        {"type": "text", "position": (width//2-150, 200), "content": "Usuário:", "color": "#333333"},
-        {"type": "input", "position": (width//2-150, 230), "width": 300, "placeholder": "Digite seu nome de usuário"},
-        {"type": "text", "position": (width//2-150, 290), "content": "Senha:", "color": "#333333"},
-        {"type": "input", "position": (width//2-150, 320), "width": 300, "placeholder": "Digite sua senha"},
-        {"type": "button", "position": (width//2-150, 390), "width": 300, "text": "Entrar"},
-        {"type": "text", "position": (width//2-100, 450), "content": "Esqueceu sua senha?", "color": "#2c7be5"},
-    ]
-    login_img = create_mockup(width, height, "Login - IA para Eletrônica Automotiva", login_elements)
-    mockups["login"] = save_mockup(login_img, "login.png")
-    
-    # 2. Tela de Seleção de Veículo
-    vehicle_elements = [
-        {"type": "text", "position": (20, 80), "content": "Selecione o Veículo", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Marca:", "color": "#666666"},
-        {"type": "input", "position": (20, 150), "width": 300, "placeholder": "Selecione a marca"},
-        {"type": "text", "position": (350, 120), "content": "Modelo:", "color": "#666666"},
-        {"type": "input", "position": (350, 150), "width": 300, "placeholder": "Selecione o modelo"},
-        {"type": "text", "position": (20, 210), "content": "Ano:", "color": "#666666"},
-        {"type": "input", "position": (20, 240), "width": 300, "placeholder": "Selecione o ano"},
-        {"type": "text", "position": (350, 210), "content": "Motor:", "color": "#666666"},
-        {"type": "input", "position": (350, 240), "width": 300, "placeholder": "Selecione o motor"},
-        {"type": "text", "position": (20, 300), "content": "Ou insira o código do chassi:", "color": "#666666"},
-        {"type": "input", "position": (20, 330), "width": 630, "placeholder": "Digite o código do chassi"},
-        {"type": "button", "position": (530, 390), "width": 120, "text": "Continuar"},
-        {"type": "text", "position": (20, 390), "content": "Veículos recentes:", "color": "#333333"},
-        {"type": "card", "position": (20, 430), "width": 200, "height": 100, "title": "Fiat Uno 2019", "content": "Motor 1.0 Fire\nÚltimo acesso: 25/05/2025"},
-        {"type": "card", "position": (240, 430), "width": 200, "height": 100, "title": "VW Gol 2018", "content": "Motor 1.6 MSI\nÚltimo acesso: 20/05/2025"},
-        {"type": "card", "position": (460, 430), "width": 200, "height": 100, "title": "Toyota Corolla 2020", "content": "Motor 2.0 Flex\nÚltimo acesso: 15/05/2025"},
-    ]
-    vehicle_img = create_mockup(width, height, "Seleção de Veículo", vehicle_elements)
-    mockups["vehicle_selection"] = save_mockup(vehicle_img, "vehicle_selection.png")
-    
-    # 3. Interface de Diagnóstico
-    diagnostic_elements = [
-        {"type": "text", "position": (20, 80), "content": "Diagnóstico Guiado - VW Gol 2018 (Motor 1.6 MSI)", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Problema relatado: Falha na partida", "color": "#666666"},
-        {"type": "text", "position": (20, 160), "content": "Passo 1 de 5: Verificação da bateria", "color": "#333333"},
-        {"type": "text", "position": (20, 200), "content": "Realize a medição da tensão da bateria com o veículo desligado:", "color": "#666666"},
-        {"type": "input", "position": (20, 230), "width": 200, "placeholder": "Digite a tensão (V)"},
-        {"type": "button", "position": (240, 230), "width": 120, "text": "Confirmar"},
-        {"type": "text", "position": (20, 280), "content": "Histórico de verificações:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 310), "width": 630, "height": 150},
-        {"type": "text", "position": (30, 320), "content": "• Tensão da bateria: 12.3V (Dentro do esperado: 12.0V - 12.8V)", "color": "#333333"},
-        {"type": "text", "position": (30, 350), "content": "• Teste de carga da bateria: Aprovado", "color": "#333333"},
-        {"type": "text", "position": (30, 380), "content": "• Verificação visual dos cabos: Sem oxidação", "color": "#333333"},
-        {"type": "text", "position": (30, 410), "content": "• Teste do motor de arranque: Pendente", "color": "#999999"},
-        {"type": "text", "position": (20, 480), "content": "Próxima verificação recomendada:", "color": "#333333"},
-        {"type": "card", "position": (20, 510), "width": 630, "height": 80, "title": "Verificar tensão nos terminais do motor de arranque durante a tentativa de partida", 
-         "content": "Conecte o multímetro aos terminais e peça para um auxiliar tentar dar a partida. Registre a tensão."},
-        {"type": "button", "position": (530, 610), "width": 120, "text": "Próximo Passo"},
-        {"type": "button", "position": (390, 610), "width": 120, "text": "Sugerir Solução"},
-    ]
-    diagnostic_img = create_mockup(width, height, "Diagnóstico Guiado", diagnostic_elements)
-    mockups["diagnostic"] = save_mockup(diagnostic_img, "diagnostic.png")
-    
-    # 4. Visualização de Resultados
-    results_elements = [
-        {"type": "text", "position": (20, 80), "content": "Resultados do Diagnóstico - VW Gol 2018 (Motor 1.6 MSI)", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Problema identificado: Falha no relé de partida", "color": "#2c7be5"},
-        {"type": "text", "position": (20, 160), "content": "Resumo das verificações:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 190), "width": 630, "height": 180},
-        {"type": "text", "position": (30, 200), "content": "• Tensão da bateria: 12.3V (Normal)", "color": "#333333"},
-        {"type": "text", "position": (30, 230), "content": "• Teste de carga da bateria: Aprovado", "color": "#333333"},
-        {"type": "text", "position": (30, 260), "content": "• Verificação visual dos cabos: Sem oxidação", "color": "#333333"},
-        {"type": "text", "position": (30, 290), "content": "• Tensão nos terminais do motor de arranque: 0.3V (Abaixo do esperado: >10V)", "color": "#ff0000"},
-        {"type": "text", "position": (30, 320), "content": "• Teste do relé de partida: Falha detectada", "color": "#ff0000"},
-        {"type": "text", "position": (30, 350), "content": "• Verificação do chicote elétrico: Sem danos visíveis", "color": "#333333"},
-        {"type": "text", "position": (20, 390), "content": "Solução recomendada:", "color": "#333333"},
-        {"type": "card", "position": (20, 420), "width": 630, "height": 100, "title": "Substituição do relé de partida", 
-         "content": "O relé de partida apresenta falha e não está enviando corrente suficiente ao motor de arranque.\nLocalização: Caixa de fusíveis principal, posição R7. Código da peça: 5U0 951 253 A"},
-        {"type": "text", "position": (20, 540), "content": "Esquema elétrico relacionado:", "color": "#333333"},
-        {"type": "image_placeholder", "position": (20, 570), "width": 630, "height": 200},
-        {"type": "button", "position": (530, 790), "width": 120, "text": "Finalizar"},
-        {"type": "button", "position": (390, 790), "width": 120, "text": "Imprimir"},
-    ]
-    results_img = create_mockup(width, height, "Resultados do Diagnóstico", results_elements)
-    mockups["results"] = save_mockup(results_img, "results.png")
-    
-    # 5. Interface de Upload/Captura de Imagem
-    upload_elements = [
-        {"type": "text", "position": (20, 80), "content": "Interpretação Visual - VW Gol 2018", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Selecione o tipo de imagem:", "color": "#666666"},
-        {"type": "button", "position": (20, 150), "width": 150, "text": "Módulo ECU"},
-        {"type": "button", "position": (190, 150), "width": 150, "text": "Etiqueta"},
-        {"type": "button", "position": (360, 150), "width": 150, "text": "Componente"},
-        {"type": "button", "position": (530, 150), "width": 150, "text": "Esquema"},
-        {"type": "text", "position": (20, 210), "content": "Envie ou capture a imagem:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 240), "width": 630, "height": 300},
-        {"type": "image_placeholder", "position": (235, 290), "width": 200, "height": 200},
-        {"type": "button", "position": (20, 560), "width": 200, "text": "Carregar Imagem"},
-        {"type": "button", "position": (240, 560), "width": 200, "text": "Usar Câmera"},
-        {"type": "button", "position": (460, 560), "width": 190, "text": "Analisar Imagem"},
-        {"type": "text", "position": (20, 610), "content": "Dicas:", "color": "#333333"},
-        {"type": "text", "position": (20, 640), "content": "• Certifique-se de que a imagem está bem iluminada e focada", "color": "#666666"},
-        {"type": "text", "position": (20, 670), "content": "• Evite reflexos e sombras sobre o componente", "color": "#666666"},
-        {"type": "text", "position": (20, 700), "content": "• Para etiquetas, aproxime o máximo possível mantendo a legibilidade", "color": "#666666"},
-    ]
-    upload_img = create_mockup(width, height, "Upload/Captura de Imagem", upload_elements)
-    mockups["upload"] = save_mockup(upload_img, "upload.png")
-    
-    # 6. Reconhecimento de Componentes
-    recognition_elements = [
-        {"type": "text", "position": (20, 80), "content": "Reconhecimento de Componentes - Módulo ECU", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Componentes identificados:", "color": "#666666"},
-        {"type": "image_placeholder", "position": (20, 150), "width": 300, "height": 300},
-        {"type": "rectangle", "position": (340, 150), "width": 310, "height": 300},
-        {"type": "text", "position": (350, 160), "content": "Informações do Componente", "color": "#333333"},
-        {"type": "text", "position": (350, 190), "content": "Tipo: Módulo de Controle do Motor (ECU)", "color": "#666666"},
-        {"type": "text", "position": (350, 220), "content": "Fabricante: Bosch", "color": "#666666"},
-        {"type": "text", "position": (350, 250), "content": "Número de Série: 032 906 032 BF", "color": "#666666"},
-        {"type": "text", "position": (350, 280), "content": "Aplicação: VW Gol 1.6 MSI (2017-2019)", "color": "#666666"},
-        {"type": "text", "position": (350, 310), "content": "Compatibilidade: Original", "color": "#666666"},
-        {"type": "text", "position": (350, 340), "content": "Status: Componente identificado com sucesso", "color": "#2c7be5"},
-        {"type": "button", "position": (350, 380), "width": 300, "text": "Ver Esquema Elétrico"},
-        {"type": "text", "position": (20, 470), "content": "Histórico de diagnósticos deste componente:", "color": "#333333"},
-        {"type": "card", "position": (20, 500), "width": 300, "height": 80, "title": "Falha P0120", 
-         "content": "Sensor de posição do acelerador - Circuito aberto\nFrequência: Alta (23 casos registrados)"},
-        {"type": "card", "position": (340, 500), "width": 300, "height": 80, "title": "Falha P0322", 
-         "content": "Sensor de rotação - Sem sinal\nFrequência: Média (12 casos registrados)"},
-        {"type": "card", "position": (20, 600), "width": 300, "height": 80, "title": "Falha P0505", 
-         "content": "Sistema de controle de marcha lenta\nFrequência: Baixa (5 casos registrados)"},
-        {"type": "card", "position": (340, 600), "width": 300, "height": 80, "title": "Falha P0130", 
-         "content": "Sensor de oxigênio - Circuito defeituoso\nFrequência: Baixa (3 casos registrados)"},
-        {"type": "button", "position": (530, 700), "width": 120, "text": "Exportar Dados"},
-    ]
-    recognition_img = create_mockup(width, height, "Reconhecimento de Componentes", recognition_elements)
-    mockups["recognition"] = save_mockup(recognition_img, "recognition.png")
-    
-    # 7. Visualização de Esquemas Elétricos
-    schematic_elements = [
-        {"type": "text", "position": (20, 80), "content": "Esquema Elétrico - Módulo ECU VW Gol 1.6 MSI", "color": "#333333"},
-        {"type": "image_placeholder", "position": (20, 120), "width": 630, "height": 400},
-        {"type": "text", "position": (20, 540), "content": "Legenda de Componentes:", "color": "#333333"},
-        {"type": "text", "position": (20, 570), "content": "1. Módulo ECU (032 906 032 BF)", "color": "#666666"},
-        {"type": "text", "position": (20, 600), "content": "2. Sensor de posição do acelerador (G79)", "color": "#666666"},
-        {"type": "text", "position": (20, 630), "content": "3. Sensor de rotação do motor (G28)", "color": "#666666"},
-        {"type": "text", "position": (20, 660), "content": "4. Sensor de oxigênio pré-catalisador (G39)", "color": "#666666"},
-        {"type": "text", "position": (350, 570), "content": "5. Válvula EGR (N18)", "color": "#666666"},
-        {"type": "text", "position": (350, 600), "content": "6. Bobina de ignição (N70)", "color": "#666666"},
-        {"type": "text", "position": (350, 630), "content": "7. Injetores de combustível (N30-N33)", "color": "#666666"},
-        {"type": "text", "position": (350, 660), "content": "8. Relé da bomba de combustível (J17)", "color": "#666666"},
-        {"type": "button", "position": (20, 700), "width": 150, "text": "Ampliar"},
-        {"type": "button", "position": (190, 700), "width": 150, "text": "Imprimir"},
-        {"type": "button", "position": (360, 700), "width": 150, "text": "Salvar PDF"},
-        {"type": "button", "position": (530, 700), "width": 120, "text": "Voltar"},
-    ]
-    schematic_img = create_mockup(width, height, "Esquema Elétrico", schematic_elements)
-    mockups["schematic"] = save_mockup(schematic_img, "schematic.png")
-    
-    # 8. Dashboard Principal
-    dashboard_elements = [
-        {"type": "text", "position": (20, 80), "content": "Dashboard - Visão Geral", "color": "#333333"},
-        {"type": "card", "position": (20, 120), "width": 200, "height": 100, "title": "Diagnósticos Realizados", "content": "Total: 157\nEste mês: 23\nHoje: 3"},
-        {"type": "card", "position": (240, 120), "width": 200, "height": 100, "title": "Taxa de Sucesso", "content": "Geral: 92%\nEste mês: 95%\nComponentes: 89%"},
-        {"type": "card", "position": (460, 120), "width": 200, "height": 100, "title": "Tempo Médio", "content": "Diagnóstico: 12 min\nInterpretação: 3 min\nTotal: 15 min"},
-        {"type": "text", "position": (20, 240), "content": "Diagnósticos Recentes:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 270), "width": 630, "height": 150},
-        {"type": "text", "position": (30, 280), "content": "Data       | Veículo           | Problema                  | Solução                  | Mecânico", "color": "#333333"},
-        {"type": "text", "position": (30, 310), "content": "28/05/2025 | VW Gol 2018      | Falha na partida          | Substituição de relé     | Carlos Silva", "color": "#333333"},
-        {"type": "text", "position": (30, 340), "content": "27/05/2025 | Fiat Uno 2019    | Luz de injeção acesa      | Sensor MAP substituído   | Maria Oliveira", "color": "#333333"},
-        {"type": "text", "position": (30, 370), "content": "27/05/2025 | Toyota Corolla 20| Consumo elevado           | Limpeza de bicos         | João Pereira", "color": "#333333"},
-        {"type": "text", "position": (30, 400), "content": "26/05/2025 | Honda Civic 2021 | Ar condicionado sem frio  | Recarga de gás           | Carlos Silva", "color": "#333333"},
-        {"type": "text", "position": (20, 440), "content": "Problemas Mais Frequentes:", "color": "#333333"},
-        {"type": "image_placeholder", "position": (20, 470), "width": 300, "height": 200},
-        {"type": "text", "position": (340, 440), "content": "Componentes Mais Substituídos:", "color": "#333333"},
-        {"type": "image_placeholder", "position": (340, 470), "width": 300, "height": 200},
-        {"type": "text", "position": (20, 690), "content": "Base de Conhecimento:", "color": "#333333"},
-        {"type": "button", "position": (200, 690), "width": 150, "text": "Acessar"},
-        {"type": "text", "position": (370, 690), "content": "Relatórios:", "color": "#333333"},
-        {"type": "button", "position": (470, 690), "width": 180, "text": "Gerar Relatório"},
-    ]
-    dashboard_img = create_mockup(width, height, "Dashboard Principal", dashboard_elements)
-    mockups["dashboard"] = save_mockup(dashboard_img, "dashboard.png")
-    
-    # 9. Base de Conhecimento
-    knowledge_elements = [
-        {"type": "text", "position": (20, 80), "content": "Base de Conhecimento", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Pesquisar:", "color": "#666666"},
-        {"type": "input", "position": (100, 120), "width": 450, "placeholder": "Digite o problema, componente ou modelo de veículo"},
-        {"type": "button", "position": (570, 120), "width": 80, "text": "Buscar"},
-        {"type": "text", "position": (20, 170), "content": "Filtrar por:", "color": "#666666"},
-        {"type": "button", "position": (100, 170), "width": 100, "text": "Todos"},
-        {"type": "button", "position": (210, 170), "width": 100, "text": "Elétricos"},
-        {"type": "button", "position": (320, 170), "width": 100, "text": "Mecânicos"},
-        {"type": "button", "position": (430, 170), "width": 100, "text": "Sensores"},
-        {"type": "button", "position": (540, 170), "width": 110, "text": "Injeção"},
-        {"type": "text", "position": (20, 220), "content": "Soluções Populares:", "color": "#333333"},
-        {"type": "card", "position": (20, 250), "width": 630, "height": 100, "title": "Falha P0120 - Sensor de posição do acelerador", 
-         "content": "Sintomas: Marcha lenta irregular, aceleração instável, luz de injeção acesa.\nSolução: Verificar conexões do sensor TPS, medir resistência (deve estar entre 0.5-4.5 kΩ), substituir se necessário."},
-        {"type": "card", "position": (20, 370), "width": 630, "height": 100, "title": "Falha na Partida - Relé de Partida", 
-         "content": "Sintomas: Motor de arranque não gira, sem ruído de partida, luzes do painel funcionam normalmente.\nSolução: Testar tensão nos terminais do motor de arranque, verificar relé na caixa de fusíveis, substituir relé."},
-        {"type": "card", "position": (20, 490), "width": 630, "height": 100, "title": "Ar Condicionado sem Refrigeração", 
-         "content": "Sintomas: Ventilador funciona mas ar não resfria, compressor não liga.\nSolução: Verificar pressão do gás, testar sensor de pressão, verificar relé do compressor e embreagem."},
-        {"type": "text", "position": (20, 610), "content": "Contribuir com Conhecimento:", "color": "#333333"},
-        {"type": "button", "position": (250, 610), "width": 200, "text": "Adicionar Nova Solução"},
-        {"type": "text", "position": (20, 660), "content": "Estatísticas da Base:", "color": "#666666"},
-        {"type": "text", "position": (20, 690), "content": "Total de soluções: 1.247 | Contribuições este mês: 37 | Soluções verificadas: 89%", "color": "#666666"},
-    ]
-    knowledge_img = create_mockup(width, height, "Base de Conhecimento", knowledge_elements)
-    mockups["knowledge"] = save_mockup(knowledge_img, "knowledge.png")
-    
-    return mockups
+        analysis["job_id"] = get_analysis_service().submit(analyze_upload, selected_image_file.getvalue(), get_recognizer())
+    except AnalysisQueueFull as exc:
+        st.warning(text["busy"].format(depth=exc.depth))
+    else:
+        st.session_state[analysis_key] = analysis
 
+# Moves a finished job's result or error into the session's analysis and
+# returns None; returns the job itself while it is queued or running.
+def collect_analysis(analysis, trace):
+    if "result" in analysis or "error" in analysis or analysis.get("expired"):
+        return None
+    job = get_analysis_service().pop(analysis["job_id"])
+    if job is None:
+        # Unclaimed past the service's result TTL, or lost with a restart
+        analysis["expired"] = True
+    elif not job.finished:
+        return job
+    else:
+        trace.record("analysis_queue_wait", job.started_at - job.submitted_at)
+        trace.record("analysis_run", job.finished_at - job.started_at)
+        if job.status == DONE:
+            analysis["result"] = job.result
+            # A rejected photo's retake looks the same to the perceptual
+            # hash; it must be analysed again, not get the rejection back
+            if job.result["accepted"]:
+                get_result_cache().put(analysis["fingerprint"], job.result)
+        else:
+            analysis["error"] = job.error
+    return None
 
 @st.cache_resource
-def create_all_mockups_en_images():
-    width_en, height_en = 670, 850
-    mockups_en = {}
-
-    # 1. Login Screen
-    login_elements_en = [
-        {"type": "text", "position": (width_en//2-150, 100), "content": "Smart Automotive Diagnosis", "color": "#333333"},
-        {"type": "text", "position": (width_en//2-90, 150), "content": "System Access", "color": "#666666"},
-        {"type": "text", "position": (width_en//2-150, 200), "content": "User:", "color": "#333333"},
-        {"type": "input", "position": (width_en//2-150, 230), "width": 300, "placeholder": "Enter your username"},
-        {"type": "text", "position": (width_en//2-150, 290), "content": "Password:", "color": "#333333"},
-        {"type": "input", "position": (width_en//2-150, 320), "width": 300, "placeholder": "Enter your password"},
-        {"type": "button", "position": (width_en//2-150, 390), "width": 300, "text": "Sign In"},
-        {"type": "text", "position": (width_en//2-100, 450), "content": "Forgot your password?", "color": "#2c7be5"},
-    ]
-    mockups_en["login"] = create_mockup(width_en, height_en, "Login - AI for Automotive Electronics", login_elements_en)
-
-    # 2. Vehicle Selection
-    vehicle_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Select Vehicle", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Make:", "color": "#666666"},
-        {"type": "input", "position": (20, 150), "width": 300, "placeholder": "Select make"},
-        {"type": "text", "position": (350, 120), "content": "Model:", "color": "#666666"},
-        {"type": "input", "position": (350, 150), "width": 300, "placeholder": "Select model"},
-        {"type": "text", "position": (20, 210), "content": "Year:", "color": "#666666"},
-        {"type": "input", "position": (20, 240), "width": 300, "placeholder": "Select year"},
-        {"type": "text", "position": (350, 210), "content": "Engine:", "color": "#666666"},
-        {"type": "input", "position": (350, 240), "width": 300, "placeholder": "Select engine"},
-        {"type": "text", "position": (20, 300), "content": "Or enter chassis code:", "color": "#666666"},
-        {"type": "input", "position": (20, 330), "width": 630, "placeholder": "Enter chassis code"},
-        {"type": "button", "position": (530, 390), "width": 120, "text": "Continue"},
-        {"type": "text", "position": (20, 390), "content": "Recent vehicles:", "color": "#333333"},
-        {"type": "card", "position": (20, 430), "width": 200, "height": 100, "title": "Fiat Uno 2019", "content": "1.0 Fire Engine\nLast access: 05/25/2025"},
-        {"type": "card", "position": (240, 430), "width": 200, "height": 100, "title": "VW Gol 2018", "content": "1.6 MSI Engine\nLast access: 05/20/2025"},
-        {"type": "card", "position": (460, 430), "width": 200, "height": 100, "title": "Toyota Corolla 2020", "content": "2.0 Flex Engine\nLast access: 05/15/2025"},
-    ]
-    mockups_en["vehicle_selection"] = create_mockup(width_en, height_en, "Vehicle Selection", vehicle_elements_en)
-
-    # 3. Guided Diagnosis
-    diagnostic_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Guided Diagnosis - VW Gol 2018 (1.6 MSI Engine)", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Reported issue: Starting failure", "color": "#666666"},
-        {"type": "text", "position": (20, 160), "content": "Step 1 of 5: Battery check", "color": "#333333"},
-        {"type": "text", "position": (20, 200), "content": "Measure battery voltage with the vehicle turned off:", "color": "#666666"},
-        {"type": "input", "position": (20, 230), "width": 200, "placeholder": "Enter voltage (V)"},
-        {"type": "button", "position": (240, 230), "width": 120, "text": "Confirm"},
-        {"type": "text", "position": (20, 280), "content": "Verification history:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 310), "width": 630, "height": 150},
-        {"type": "text", "position": (30, 320), "content": "- Battery voltage: 12.3V (Expected: 12.0V - 12.8V)", "color": "#333333"},
-        {"type": "text", "position": (30, 350), "content": "- Battery load test: Passed", "color": "#333333"},
-        {"type": "text", "position": (30, 380), "content": "- Visual cable check: No oxidation", "color": "#333333"},
-        {"type": "text", "position": (30, 410), "content": "- Starter motor test: Pending", "color": "#999999"},
-        {"type": "text", "position": (20, 480), "content": "Recommended next check:", "color": "#333333"},
-        {"type": "card", "position": (20, 510), "width": 630, "height": 80, "title": "Measure voltage at starter terminals during crank attempt",
-         "content": "Connect the multimeter to starter terminals and ask an assistant to crank the engine. Record the voltage."},
-        {"type": "button", "position": (530, 610), "width": 120, "text": "Next Step"},
-        {"type": "button", "position": (390, 610), "width": 120, "text": "Suggest Fix"},
-    ]
-    mockups_en["diagnostic"] = create_mockup(width_en, height_en, "Guided Diagnosis", diagnostic_elements_en)
-
-    # 4. Results View
-    results_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Diagnostic Results - VW Gol 2018 (1.6 MSI Engine)", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Identified issue: Starter relay failure", "color": "#2c7be5"},
-        {"type": "text", "position": (20, 160), "content": "Verification summary:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 190), "width": 630, "height": 180},
-        {"type": "text", "position": (30, 200), "content": "- Battery voltage: 12.3V (Normal)", "color": "#333333"},
-        {"type": "text", "position": (30, 230), "content": "- Battery load test: Passed", "color": "#333333"},
-        {"type": "text", "position": (30, 260), "content": "- Visual cable check: No oxidation", "color": "#333333"},
-        {"type": "text", "position": (30, 290), "content": "- Starter terminal voltage: 0.3V (Below expected: >10V)", "color": "#ff0000"},
-        {"type": "text", "position": (30, 320), "content": "- Starter relay test: Failure detected", "color": "#ff0000"},
-        {"type": "text", "position": (30, 350), "content": "- Harness inspection: No visible damage", "color": "#333333"},
-        {"type": "text", "position": (20, 390), "content": "Recommended solution:", "color": "#333333"},
-        {"type": "card", "position": (20, 420), "width": 630, "height": 100, "title": "Starter relay replacement",
-         "content": "The relay is faulty and not sending enough current to the starter motor.\nLocation: Main fuse box, slot R7. Part number: 5U0 951 253 A"},
-        {"type": "text", "position": (20, 540), "content": "Related electrical schematic:", "color": "#333333"},
-        {"type": "image_placeholder", "position": (20, 570), "width": 630, "height": 200},
-        {"type": "button", "position": (530, 790), "width": 120, "text": "Finish"},
-        {"type": "button", "position": (390, 790), "width": 120, "text": "Print"},
-    ]
-    mockups_en["results"] = create_mockup(width_en, height_en, "Diagnostic Results", results_elements_en)
-
-    # 5. Upload/Capture
-    upload_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Visual Interpretation - VW Gol 2018", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Select image type:", "color": "#666666"},
-        {"type": "button", "position": (20, 150), "width": 150, "text": "ECU Module"},
-        {"type": "button", "position": (190, 150), "width": 150, "text": "Label"},
-        {"type": "button", "position": (360, 150), "width": 150, "text": "Component"},
-        {"type": "button", "position": (530, 150), "width": 150, "text": "Schematic"},
-        {"type": "text", "position": (20, 210), "content": "Upload or capture image:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 240), "width": 630, "height": 300},
-        {"type": "image_placeholder", "position": (235, 290), "width": 200, "height": 200},
-        {"type": "button", "position": (20, 560), "width": 200, "text": "Upload Image"},
-        {"type": "button", "position": (240, 560), "width": 200, "text": "Use Camera"},
-        {"type": "button", "position": (460, 560), "width": 190, "text": "Analyze Image"},
-        {"type": "text", "position": (20, 610), "content": "Tips:", "color": "#333333"},
-        {"type": "text", "position": (20, 640), "content": "- Make sure the image is well-lit and in focus", "color": "#666666"},
-        {"type": "text", "position": (20, 670), "content": "- Avoid reflections and shadows on the component", "color": "#666666"},
-        {"type": "text", "position": (20, 700), "content": "- For labels, get close while keeping text readable", "color": "#666666"},
-    ]
-    mockups_en["upload"] = create_mockup(width_en, height_en, "Image Upload/Capture", upload_elements_en)
-
-    # 6. Component Recognition
-    recognition_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Component Recognition - ECU Module", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Identified components:", "color": "#666666"},
-        {"type": "image_placeholder", "position": (20, 150), "width": 300, "height": 300},
-        {"type": "rectangle", "position": (340, 150), "width": 310, "height": 300},
-        {"type": "text", "position": (350, 160), "content": "Component Information", "color": "#333333"},
-        {"type": "text", "position": (350, 190), "content": "Type: Engine Control Unit (ECU)", "color": "#666666"},
-        {"type": "text", "position": (350, 220), "content": "Manufacturer: Bosch", "color": "#666666"},
-        {"type": "text", "position": (350, 250), "content": "Serial Number: 032 906 032 BF", "color": "#666666"},
-        {"type": "text", "position": (350, 280), "content": "Application: VW Gol 1.6 MSI (2017-2019)", "color": "#666666"},
-        {"type": "text", "position": (350, 310), "content": "Compatibility: Original", "color": "#666666"},
-        {"type": "text", "position": (350, 340), "content": "Status: Component successfully identified", "color": "#2c7be5"},
-        {"type": "button", "position": (350, 380), "width": 300, "text": "View Electrical Schematic"},
-        {"type": "text", "position": (20, 470), "content": "Diagnostic history for this component:", "color": "#333333"},
-        {"type": "card", "position": (20, 500), "width": 300, "height": 80, "title": "Fault P0120",
-         "content": "Throttle position sensor - Open circuit\nFrequency: High (23 recorded cases)"},
-        {"type": "card", "position": (340, 500), "width": 300, "height": 80, "title": "Fault P0322",
-         "content": "Engine speed sensor - No signal\nFrequency: Medium (12 recorded cases)"},
-        {"type": "card", "position": (20, 600), "width": 300, "height": 80, "title": "Fault P0505",
-         "content": "Idle control system\nFrequency: Low (5 recorded cases)"},
-        {"type": "card", "position": (340, 600), "width": 300, "height": 80, "title": "Fault P0130",
-         "content": "Oxygen sensor - Circuit malfunction\nFrequency: Low (3 recorded cases)"},
-        {"type": "button", "position": (530, 700), "width": 120, "text": "Export Data"},
-    ]
-    mockups_en["recognition"] = create_mockup(width_en, height_en, "Component Recognition", recognition_elements_en)
-
-    # 7. Electrical Schematic
-    schematic_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Electrical Schematic - VW Gol 1.6 MSI ECU Module", "color": "#333333"},
-        {"type": "image_placeholder", "position": (20, 120), "width": 630, "height": 400},
-        {"type": "text", "position": (20, 540), "content": "Component Legend:", "color": "#333333"},
-        {"type": "text", "position": (20, 570), "content": "1. ECU Module (032 906 032 BF)", "color": "#666666"},
-        {"type": "text", "position": (20, 600), "content": "2. Throttle position sensor (G79)", "color": "#666666"},
-        {"type": "text", "position": (20, 630), "content": "3. Engine speed sensor (G28)", "color": "#666666"},
-        {"type": "text", "position": (20, 660), "content": "4. Pre-catalyst oxygen sensor (G39)", "color": "#666666"},
-        {"type": "text", "position": (350, 570), "content": "5. EGR valve (N18)", "color": "#666666"},
-        {"type": "text", "position": (350, 600), "content": "6. Ignition coil (N70)", "color": "#666666"},
-        {"type": "text", "position": (350, 630), "content": "7. Fuel injectors (N30-N33)", "color": "#666666"},
-        {"type": "text", "position": (350, 660), "content": "8. Fuel pump relay (J17)", "color": "#666666"},
-        {"type": "button", "position": (20, 700), "width": 150, "text": "Zoom"},
-        {"type": "button", "position": (190, 700), "width": 150, "text": "Print"},
-        {"type": "button", "position": (360, 700), "width": 150, "text": "Save PDF"},
-        {"type": "button", "position": (530, 700), "width": 120, "text": "Back"},
-    ]
-    mockups_en["schematic"] = create_mockup(width_en, height_en, "Electrical Schematic", schematic_elements_en)
-
-    # 8. Dashboard
-    dashboard_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Dashboard - Overview", "color": "#333333"},
-        {"type": "card", "position": (20, 120), "width": 200, "height": 100, "title": "Completed Diagnoses", "content": "Total: 157\nThis month: 23\nToday: 3"},
-        {"type": "card", "position": (240, 120), "width": 200, "height": 100, "title": "Success Rate", "content": "Overall: 92%\nThis month: 95%\nComponents: 89%"},
-        {"type": "card", "position": (460, 120), "width": 200, "height": 100, "title": "Average Time", "content": "Diagnosis: 12 min\nInterpretation: 3 min\nTotal: 15 min"},
-        {"type": "text", "position": (20, 240), "content": "Recent Diagnoses:", "color": "#333333"},
-        {"type": "rectangle", "position": (20, 270), "width": 630, "height": 150},
-        {"type": "text", "position": (30, 280), "content": "Date       | Vehicle           | Issue                    | Fix                      | Mechanic", "color": "#333333"},
-        {"type": "text", "position": (30, 310), "content": "05/28/2025 | VW Gol 2018      | Starting failure         | Relay replacement        | Carlos Silva", "color": "#333333"},
-        {"type": "text", "position": (30, 340), "content": "05/27/2025 | Fiat Uno 2019    | Check engine light       | MAP sensor replaced      | Maria Oliveira", "color": "#333333"},
-        {"type": "text", "position": (30, 370), "content": "05/27/2025 | Toyota Corolla 20| High fuel consumption    | Injector cleaning        | Joao Pereira", "color": "#333333"},
-        {"type": "text", "position": (30, 400), "content": "05/26/2025 | Honda Civic 2021 | AC not cooling           | Refrigerant refill       | Carlos Silva", "color": "#333333"},
-        {"type": "text", "position": (20, 440), "content": "Most Frequent Issues:", "color": "#333333"},
-        {"type": "image_placeholder", "position": (20, 470), "width": 300, "height": 200},
-        {"type": "text", "position": (340, 440), "content": "Most Replaced Components:", "color": "#333333"},
-        {"type": "image_placeholder", "position": (340, 470), "width": 300, "height": 200},
-        {"type": "text", "position": (20, 690), "content": "Knowledge Base:", "color": "#333333"},
-        {"type": "button", "position": (200, 690), "width": 150, "text": "Access"},
-        {"type": "text", "position": (370, 690), "content": "Reports:", "color": "#333333"},
-        {"type": "button", "position": (470, 690), "width": 180, "text": "Generate Report"},
-    ]
-    mockups_en["dashboard"] = create_mockup(width_en, height_en, "Main Dashboard", dashboard_elements_en)
-
-    # 9. Knowledge Base
-    knowledge_elements_en = [
-        {"type": "text", "position": (20, 80), "content": "Knowledge Base", "color": "#333333"},
-        {"type": "text", "position": (20, 120), "content": "Search:", "color": "#666666"},
-        {"type": "input", "position": (100, 120), "width": 450, "placeholder": "Type issue, component, or vehicle model"},
-        {"type": "button", "position": (570, 120), "width": 80, "text": "Search"},
-        {"type": "text", "position": (20, 170), "content": "Filter by:", "color": "#666666"},
-        {"type": "button", "position": (100, 170), "width": 100, "text": "All"},
-        {"type": "button", "position": (210, 170), "width": 100, "text": "Electrical"},
-        {"type": "button", "position": (320, 170), "width": 100, "text": "Mechanical"},
-        {"type": "button", "position": (430, 170), "width": 100, "text": "Sensors"},
-        {"type": "button", "position": (540, 170), "width": 110, "text": "Injection"},
-        {"type": "text", "position": (20, 220), "content": "Popular Solutions:", "color": "#333333"},
-        {"type": "card", "position": (20, 250), "width": 630, "height": 100, "title": "Fault P0120 - Throttle position sensor",
-         "content": "Symptoms: Rough idle, unstable acceleration, check-engine light on.\nSolution: Check TPS connector, measure resistance (0.5-4.5 kOhm), replace if needed."},
-        {"type": "card", "position": (20, 370), "width": 630, "height": 100, "title": "Starting Failure - Starter Relay",
-         "content": "Symptoms: Starter does not crank, no start noise, dashboard lights normal.\nSolution: Measure starter terminal voltage, check relay in fuse box, replace relay."},
-        {"type": "card", "position": (20, 490), "width": 630, "height": 100, "title": "AC Without Cooling",
-         "content": "Symptoms: Blower works but air is not cold, compressor does not engage.\nSolution: Check refrigerant pressure, pressure sensor, compressor relay and clutch."},
-        {"type": "text", "position": (20, 610), "content": "Contribute Knowledge:", "color": "#333333"},
-        {"type": "button", "position": (250, 610), "width": 200, "text": "Add New Solution"},
-        {"type": "text", "position": (20, 660), "content": "Knowledge Base Stats:", "color": "#666666"},
-        {"type": "text", "position": (20, 690), "content": "Total solutions: 1,247 | Contributions this month: 37 | Verified solutions: 89%", "color": "#666666"},
-    ]
-    mockups_en["knowledge"] = create_mockup(width_en, height_en, "Knowledge Base", knowledge_elements_en)
-
-    return mockups_en
-
-# Definir dimensões padrão para os mockups
-width, height = 670, 850
-
-# Gerar mockups apenas quando necessÃ¡rio
+def get_batch_service():
+    return BatchService()
+
+def show_batch_reports(job, text):
+    if job.finished:
+        accepted = sum(1 for report in job.reports if report.accepted)
+        st.success(text["batch_done"].format(
+            total=job.total, seconds=job.finished_at - job.started_at, accepted=accepted, retake=job.total - accepted))
+    else:
+        st.progress(job.done / job.total, text=text["batch_progress"].format(done=job.done, total=job.total))
+    reports = dict(job.completed())
+    columns = st.columns(BATCH_COLUMNS)
+    for index, name in enumerate(job.names):
+        with columns[index % BATCH_COLUMNS]:
+            report = reports.get(index)
+            if report is None:
+                st.caption(f"{name}: {text['batch_pending']}")
+                continue
+            if report.error:
+                st.caption(name)
+                st.error(text["batch_failed"].format(error=report.error))
+                continue
+            st.image(report.thumbnail, caption=f"{name} ({report.size[0]}x{report.size[1]} {report.format})")
+            if report.accepted:
+                st.caption(text["batch_ok"].format(sharpness=report.sharpness))
+            else:
+                st.warning(text["batch_retake"].format(
+                    reasons=", ".join(text["reasons"][reason] for reason in report.reasons)))
+            if report.exif:
+                st.caption(", ".join(str(report.exif[key]) for key in ("camera", "taken") if key in report.exif))
+
+# Redraws the batch as its reports arrive, the finished batch included:
+# neither the panel nor the page reruns for it. Streamlit stops the polling
+# when the panel next reruns, which draws a finished batch without it.
+@st.fragment(run_every=ANALYSIS_POLL_SECONDS)
+def batch_progress(lang, batch_key):
+    job = st.session_state.get(batch_key)
+    if job is not None:
+        show_batch_reports(job, UPLOAD_PANEL_TEXT[lang])
+
+def render_batch_upload(lang, text, trace):
+    files = st.file_uploader(
+        text["batch_upload"],
+        type=["png", "jpg", "jpeg", "webp"],
+        accept_multiple_files=True,
+        key=f"batch_upload_{lang}",
+    )
+    if not files:
+        st.info(text["no_image"])
+        return
+    batch_key = f"batch_{lang}"
+    if st.button(text["batch_start"].format(count=len(files)), type="primary", key=f"batch_start_{lang}"):
+        with trace.span("batch_submit"):
+            st.session_state[batch_key] = get_batch_service().submit(files)
+    job = st.session_state.get(batch_key)
+    if job is None or job.names != [file.name for file in files]:
+        return
+    if job.finished:
+        show_batch_reports(job, text)
+    else:
+        batch_progress(lang, batch_key)
+
+# Renders a panel inside the current run's trace; in a fragment-only run
+# the panel's spans form a trace of their own.
+def render_traced(render, lang):
+    trace = st.session_state.get("rerun_trace")
+    if trace is not None and not trace.finished:
+        render(lang, trace)
+        return
+    trace = start_rerun_trace("fragment")
+    try:
+        render(lang, trace)
+    finally:
+        trace.finish()
+
+# Painel de upload/captura. As a fragment, its widgets rerun only this
+# function, not the whole page with every tab image.
+@st.fragment
+def upload_panel(lang):
+    render_traced(render_upload_panel, lang)
+
+def render_upload_panel(lang, trace):
+    text = UPLOAD_PANEL_TEXT[lang]
+    if st.checkbox(text["batch_mode"], help=text["batch_mode_help"], key=f"batch_mode_{lang}"):
+        render_batch_upload(lang, text, trace)
+        return
+    image_type = st.selectbox(
+        text["image_type"],
+        text["image_types"],
+        index=2,
+        key=f"image_type_{lang}",
+    )
+
+    col_upload, col_camera = st.columns(2)
+    uploaded_file = None
+    camera_file = None
+
+    with col_upload:
+        uploaded_file = st.file_uploader(
+            text["upload"],
+            type=["png", "jpg", "jpeg", "webp"],
+            help=text["upload_help"],
+            key=f"upload_{lang}",
+        )
+
+    with col_camera:
+        enable_camera = st.checkbox(
+            text["enable_camera"],
+            value=False,
+            help=text["enable_camera_help"],
+            key=f"enable_camera_{lang}",
+        )
+        if enable_camera:
+            camera_file = st.camera_input(text["camera"], key=f"camera_{lang}")
+        else:
+            st.caption(text["camera_disabled"])
+
+    selected_image_file = uploaded_file or camera_file
+
+    if selected_image_file is not None:
+        upload = get_upload_preview(selected_image_file, lang, trace)
+        with trace.span("preview_render"):
+            st.image(upload.preview, caption=text["received"].format(image_type=image_type), use_container_width=True)
+
+        analysis_key = f"analysis_{lang}"
+        if st.button(text["analyze"], type="primary", key=f"analyze_{lang}"):
+            with trace.span("analyze_action"):
+                start_analysis(selected_image_file, upload, analysis_key, text)
+
+        analysis = st.session_state.get(analysis_key)
+        if analysis is not None and analysis["file_id"] == selected_image_file.file_id:
+            if collect_analysis(analysis, trace) is None:
+                show_analysis_result(analysis, upload, text)
+            else:
+                analysis_progress(lang, analysis, upload)
+    else:
+        st.info(text["no_image"])
+
+# Resultados exibidos por busca na base de conhecimento
+KNOWLEDGE_RESULTS = 10
+
+KNOWLEDGE_PANEL_TEXT = {
+    "en": {
+        "search": "Search solutions",
+        "search_placeholder": "e.g. starter relay, P0120, AC not cooling",
+        "vehicle": "Vehicle",
+        "component": "Component",
+        "problem_type": "Problem type",
+        "all": "All",
+        "results": "{count} of {total} solutions",
+        "no_results": "No solution matches this search.",
+        "symptoms": "Symptoms",
+        "solution": "Solution",
+        "contribute": "Add new solution",
+        "title": "Title",
+        "submit": "Save solution",
+        "missing": "Title and solution are required.",
+        "added": "Solution added to the knowledge base.",
+    },
+    "pt": {
+        "search": "Pesquisar solucoes",
+        "search_placeholder": "ex.: rele de partida, P0120, ar nao gela",
+        "vehicle": "Veiculo",
+        "component": "Componente",
+        "problem_type": "Tipo de problema",
+        "all": "Todos",
+        "results": "{count} de {total} solucoes",
+        "no_results": "Nenhuma solucao encontrada para esta busca.",
+        "symptoms": "Sintomas",
+        "solution": "Solucao",
+        "contribute": "Adicionar nova solucao",
+        "title": "Titulo",
+        "submit": "Salvar solucao",
+        "missing": "Titulo e solucao sao obrigatorios.",
+        "added": "Solucao adicionada a base de conhecimento.",
+    },
+}
+
+# Index opened once per process; contributions from any session land in its delta
 @st.cache_resource
-def ensure_mockups_generated():
-    missing_files = [
-        filename
-        for filename in MOCKUP_FILES
-        if not os.path.exists(os.path.join(MOCKUP_DIR, filename))
-    ]
-    if missing_files:
-        create_all_mockups()
+def get_knowledge_base():
+    return KnowledgeBase.open()
+
+def contribute_form(lang, text):
+    with st.form(f"kb_contribute_{lang}", clear_on_submit=True):
+        entry = {
+            "title": st.text_input(text["title"]),
+            "symptoms": st.text_area(text["symptoms"]),
+            "solution": st.text_area(text["solution"]),
+        }
+        columns = st.columns(len(FACETS))
+        for column, name in zip(columns, FACETS):
+            with column:
+                entry[name] = st.text_input(text[name])
+        if st.form_submit_button(text["submit"]):
+            entry = {name: value.strip() for name, value in entry.items()}
+            if not entry["title"] or not entry["solution"]:
+                st.warning(text["missing"])
+            else:
+                get_knowledge_base().add_entry(entry)
+                st.success(text["added"])
 
-ensure_mockups_generated()
+def render_knowledge_panel(lang, trace):
+    text = KNOWLEDGE_PANEL_TEXT[lang]
+    knowledge_base = get_knowledge_base()
+    query = st.text_input(text["search"], placeholder=text["search_placeholder"], key=f"kb_query_{lang}")
+    filters = {}
+    for column, name in zip(st.columns(len(FACETS)), FACETS):
+        with column:
+            choice = st.selectbox(
+                text[name], [text["all"]] + knowledge_base.facet_values(name), key=f"kb_{name}_{lang}"
+            )
+            if choice != text["all"]:
+                filters[name] = choice
+
+    with st.expander(text["contribute"]):
+        contribute_form(lang, text)
+
+    with trace.span("kb_search"):
+        hits = knowledge_base.search(query, limit=KNOWLEDGE_RESULTS, **filters)
+    if not hits:
+        st.info(text["no_results"])
+        return
+    st.caption(text["results"].format(count=len(hits), total=len(knowledge_base)))
+    for hit in hits:
+        entry = hit.entry
+        with st.container(border=True):
+            st.markdown(f"**{entry['title']}**")
+            st.caption(" | ".join(entry[name] for name in FACETS if entry.get(name)))
+            st.markdown(f"**{text['symptoms']}:** {entry.get('symptoms', '')}")
+            st.markdown(f"**{text['solution']}:** {entry.get('solution', '')}")
+
+# Busca e contribuicao na base de conhecimento, rerun on its own like the upload panel
+@st.fragment
+def knowledge_panel(lang):
+    render_traced(render_knowledge_panel, lang)
+
+VEHICLE_PANEL_TEXT = {
+    "en": {
+        "make": "Make",
+        "model": "Model",
+        "year": "Year",
+        "engine": "Engine",
+        "choose": "Select",
+        "chassis": "Or enter chassis code (VIN)",
+        "chassis_placeholder": "e.g. 9BWAB45U0JT004251",
+        "chassis_decoded": "Manufacturer: {makes}. Model year: {years}.",
+        "chassis_unknown": "Manufacturer code not in the catalog.",
+        "candidates": "Matching vehicles",
+        "selected": "Selected vehicle: {vehicle}",
+        "recent": "Recent vehicles",
+    },
+    "pt": {
+        "make": "Marca",
+        "model": "Modelo",
+        "year": "Ano",
+        "engine": "Motor",
+        "choose": "Selecione",
+        "chassis": "Ou digite o codigo do chassi (VIN)",
+        "chassis_placeholder": "ex.: 9BWAB45U0JT004251",
+        "chassis_decoded": "Fabricante: {makes}. Ano modelo: {years}.",
+        "chassis_unknown": "Codigo do fabricante fora do catalogo.",
+        "candidates": "Veiculos compativeis",
+        "selected": "Veiculo selecionado: {vehicle}",
+        "recent": "Veiculos recentes",
+    },
+}
+
+# Nothing is read from disk until the first lookup
+@st.cache_resource
+def get_vehicle_catalog():
+    return VehicleCatalog()
+
+# One connection pool and writer thread per process
+@st.cache_resource
+def get_storage():
+    return Storage()
+
+RECENT_VEHICLES = 8
+
+# Each field lists only values compatible with the fields chosen before it
+def vehicle_fields(lang, text, catalog):
+    chosen = {}
+    columns = st.columns(2)
+    for position, name in enumerate(("make", "model", "year", "engine")):
+        with columns[position % 2]:
+            options = catalog.complete(name, limit=1000, **chosen) if len(chosen) == position else []
+            value = st.selectbox(
+                text[name],
+                options,
+                index=None,
+                placeholder=text["choose"],
+                disabled=not options,
+                key=f"vehicle_{name}_{lang}",
+            )
+        if value is not None and value in options:
+            chosen[name] = value
+    return chosen
+
+def render_vehicle_panel(lang, trace):
+    text = VEHICLE_PANEL_TEXT[lang]
+    catalog = get_vehicle_catalog()
+    vehicle = None
+    with trace.span("recent_vehicles"):
+        recent = [item.vehicle for item in get_storage().recent_vehicles(RECENT_VEHICLES)]
+    if recent:
+        labels = [candidate.label() for candidate in recent]
+        choice = st.selectbox(text["recent"], labels, index=None, placeholder=text["choose"], key=f"recent_vehicle_{lang}")
+        if choice in labels:
+            vehicle = recent[labels.index(choice)]
+    with trace.span("vehicle_lookup"):
+        chosen = vehicle_fields(lang, text, catalog)
+        if len(chosen) == 4:
+            vehicle = catalog.vehicles(limit=1, **chosen)[0]
+
+        chassis = st.text_input(text["chassis"], placeholder=text["chassis_placeholder"], key=f"chassis_{lang}")
+        if chassis.strip():
+            info = catalog.decode_chassis(chassis)
+            if info.error:
+                st.warning(info.error)
+            elif not info.makes:
+                st.warning(text["chassis_unknown"])
+            else:
+                st.caption(text["chassis_decoded"].format(
+                    makes=", ".join(info.makes), years=" / ".join(map(str, info.years)) or "?"
+                ))
+                labels = [candidate.label() for candidate in info.candidates]
+                choice = st.selectbox(text["candidates"], labels, index=None, placeholder=text["choose"],
+                                      key=f"chassis_vehicle_{lang}")
+                if choice in labels:
+                    vehicle = info.candidates[labels.index(choice)]
+
+    if vehicle is not None:
+        if vehicle != st.session_state.get(f"vehicle_{lang}"):
+            get_storage().save_vehicle(vehicle)
+        st.session_state[f"vehicle_{lang}"] = vehicle
+        st.success(text["selected"].format(vehicle=vehicle.label()))
+
+# Selecao de veiculo: marca/modelo/ano/motor ou chassi
+@st.fragment
+def vehicle_panel(lang):
+    render_traced(render_vehicle_panel, lang)
+
+DIAGNOSIS_PANEL_TEXT = {
+    "en": {
+        "symptom": "Reported issue",
+        "vehicle": "Vehicle: {vehicle}",
+        "no_vehicle": "No vehicle selected above; showing the generic procedure.",
+        "step": "Step {step} of {total}",
+        "value": "Measured value ({unit})",
+        "option": "Result",
+        "confirm": "Confirm",
+        "back": "Previous step",
+        "restart": "Restart",
+        "history": "Checks so far:",
+        "expected": "expected {low} - {high} {unit}",
+        "result": "Identified problem: {title}",
+        "circuit": "Circuit: {title}",
+        "feed": "Between the battery and {name}:",
+        "ground": "Returns through {grounds}, shared with:",
+        "previous": "Earlier diagnoses of this vehicle",
+        "previous_item": "{when}: {symptom}, {outcome} ({steps} checks)",
+        "unfinished": "not finished",
+        "resume": "Continue",
+    },
+    "pt": {
+        "symptom": "Problema relatado",
+        "vehicle": "Veiculo: {vehicle}",
+        "no_vehicle": "Nenhum veiculo selecionado acima; usando o procedimento generico.",
+        "step": "Passo {step} de {total}",
+        "value": "Valor medido ({unit})",
+        "option": "Resultado",
+        "confirm": "Confirmar",
+        "back": "Passo anterior",
+        "restart": "Reiniciar",
+        "history": "Historico de verificacoes:",
+        "expected": "esperado {low} - {high} {unit}",
+        "result": "Problema identificado: {title}",
+        "circuit": "Circuito: {title}",
+        "feed": "Entre a bateria e {name}:",
+        "ground": "Massa em {grounds}, compartilhada com:",
+        "previous": "Diagnosticos anteriores deste veiculo",
+        "previous_item": "{when}: {symptom}, {outcome} ({steps} verificacoes)",
+        "unfinished": "nao concluido",
+        "resume": "Continuar",
+    },
+}
+
+# Earlier diagnoses listed for the selected vehicle
+PREVIOUS_DIAGNOSES = 5
+
+# Compiled once per process and shared by every diagnosis session
+@st.cache_resource
+def get_diagnosis_engine():
+    return DiagnosisEngine.from_file()
+
+@st.cache_resource
+def get_netlists():
+    return NetlistLibrary.from_file()
+
+# Fuses, relays and connectors feeding the component a step is about, and
+# what shares its ground, from the vehicle's netlist
+def show_circuit(role, vehicle, lang, text, trace):
+    with trace.span("netlist_query"):
+        try:
+            netlist = get_netlists().select(role, vehicle)
+        except KeyError:
+            return
+        feed = netlist.feed_path(role, PATH_TYPES)
+        grounds = netlist.grounds(role)
+        shared = netlist.shared_ground(role)
+    with st.expander(text["circuit"].format(title=netlist.title[lang])):
+        name = netlist.components[netlist.component(role)]["name"][lang]
+        if feed:
+            st.markdown(text["feed"].format(name=name) + "\n" + "\n".join(
+                f"- {netlist.describe(index, lang)}" for index in feed))
+        if grounds:
+            st.markdown(text["ground"].format(grounds=", ".join(netlist.describe(index, lang) for index in grounds))
+                        + "\n" + "\n".join(f"- {netlist.describe(index, lang)}" for index in shared))
+
+# A diagnosis is stored under an id of its own from its first answer on;
+# callbacks run before the panel renders, so it shows the new step
+def new_diagnosis(lang, session):
+    st.session_state[f"diagnosis_{lang}"] = session
+    st.session_state[f"diagnosis_id_{lang}"] = uuid.uuid4().hex
+
+def diagnosis_answer(lang, value_key):
+    value = st.session_state.get(value_key)
+    if value is None:
+        return
+    engine = get_diagnosis_engine()
+    session = st.session_state[f"diagnosis_{lang}"]
+    node = engine.node(session.node)
+    engine.answer(session, value)
+    storage = get_storage()
+    session_id = st.session_state[f"diagnosis_id_{lang}"]
+    step = len(session.path) - 1
+    tree = engine.trees[session.tree]
+    if step == 0:
+        storage.start_session(session_id, tree["id"], tree["symptom_id"], st.session_state.get(f"vehicle_{lang}"))
+    in_range = engine.history(session, lang)[-1][2]
+    result = engine.node(session.node)["name"] if engine.finished(session) else None
+    storage.record_step(session_id, step, node["name"], value, in_range, result)
+
+def diagnosis_back(lang):
+    session = st.session_state[f"diagnosis_{lang}"]
+    get_diagnosis_engine().back(session)
+    get_storage().truncate_session(st.session_state[f"diagnosis_id_{lang}"], len(session.path))
+
+def diagnosis_restart(lang):
+    session = st.session_state[f"diagnosis_{lang}"]
+    new_diagnosis(lang, get_diagnosis_engine().start(session.tree))
+
+# Picks a stored diagnosis up where it was left, even after a restart
+def diagnosis_resume(lang, record):
+    engine = get_diagnosis_engine()
+    answers = [(step.node, step.value) for step in get_storage().session_steps(record.session_id)]
+    st.session_state[f"diagnosis_symptom_{lang}"] = record.symptom
+    st.session_state[f"diagnosis_{lang}"] = engine.replay(engine.tree_index(record.tree), answers)
+    st.session_state[f"diagnosis_id_{lang}"] = record.session_id
+
+def show_previous_diagnoses(engine, vehicle, lang, text, trace):
+    with trace.span("diagnosis_history"):
+        records = get_storage().vehicle_history(vehicle, PREVIOUS_DIAGNOSES)
+    current = st.session_state.get(f"diagnosis_id_{lang}")
+    records = [record for record in records if record.session_id != current]
+    if not records:
+        return
+    symptoms = engine.symptoms(lang)
+    with st.expander(text["previous"]):
+        for record in records:
+            try:
+                tree_index = engine.tree_index(record.tree)
+            except KeyError:
+                # Tree removed from the trees file since
+                continue
+            result = engine.find_node(tree_index, record.result) if record.result else None
+            outcome = engine.node(result)["title"][lang] if result is not None else text["unfinished"]
+            st.markdown("- " + text["previous_item"].format(
+                when=time.strftime("%Y-%m-%d %H:%M", time.localtime(record.updated_at)),
+                symptom=symptoms.get(record.symptom, record.symptom), outcome=outcome, steps=record.steps))
+            if record.status == OPEN:
+                st.button(text["resume"], key=f"diagnosis_resume_{lang}_{record.session_id}",
+                          on_click=diagnosis_resume, args=(lang, record))
+
+def show_diagnosis_history(engine, session, lang, text):
+    history = engine.history(session, lang)
+    if not history:
+        return
+    st.markdown(f"**{text['history']}**")
+    lines = []
+    for node_id, (label, shown, expected) in zip(session.path, history):
+        node = engine.node(node_id)
+        if "expected" in node:
+            low, high = node["expected"]
+            shown += " (" + text["expected"].format(low=low, high=high, unit=node["unit"]) + ")"
+        lines.append(f"- {label}: {shown if expected else f':red[{shown}]'}")
+    st.markdown("\n".join(lines))
+
+def render_diagnosis_panel(lang, trace):
+    text = DIAGNOSIS_PANEL_TEXT[lang]
+    engine = get_diagnosis_engine()
+    symptoms = engine.symptoms(lang)
+    symptom_id = st.selectbox(text["symptom"], list(symptoms), format_func=symptoms.get, key=f"diagnosis_symptom_{lang}")
+    vehicle = st.session_state.get(f"vehicle_{lang}")
+    st.caption(text["vehicle"].format(vehicle=vehicle.label()) if vehicle is not None else text["no_vehicle"])
+
+    session_key = f"diagnosis_{lang}"
+    tree = engine.select_tree(symptom_id, vehicle)
+    session = st.session_state.get(session_key)
+    if session is None or session.tree != tree:
+        new_diagnosis(lang, engine.start(tree))
+        session = st.session_state[session_key]
+
+    if vehicle is not None:
+        show_previous_diagnoses(engine, vehicle, lang, text, trace)
+    show_diagnosis_history(engine, session, lang, text)
+    node = engine.node(session.node)
+    if "circuit" in node:
+        show_circuit(node["circuit"], vehicle, lang, text, trace)
+    if engine.finished(session):
+        st.success(text["result"].format(title=node["title"][lang]))
+        st.info(node["solution"][lang])
+    else:
+        step, total = engine.progress(session)
+        st.markdown(f"**{text['step'].format(step=step, total=total)}:** {node['prompt'][lang]}")
+        value_key = f"diagnosis_value_{lang}_{session.node}"
+        if engine.kind(session.node) == MEASURE:
+            st.number_input(
+                text["value"].format(unit=node["unit"]),
+                value=None,
+                step=float(node.get("resolution", 1)),
+                key=value_key,
+            )
+        else:
+            options = node["options"][lang]
+            st.radio(text["option"], range(len(options)), format_func=options.__getitem__, key=value_key)
+        st.button(text["confirm"], type="primary", key=f"diagnosis_confirm_{lang}",
+                  on_click=diagnosis_answer, args=(lang, value_key))
+
+    col_back, col_restart = st.columns(2)
+    with col_back:
+        st.button(text["back"], key=f"diagnosis_back_{lang}", disabled=not session.path,
+                  on_click=diagnosis_back, args=(lang,))
+    with col_restart:
+        st.button(text["restart"], key=f"diagnosis_restart_{lang}", on_click=diagnosis_restart, args=(lang,))
+
+# Diagnostico guiado passo a passo
+@st.fragment
+def diagnosis_panel(lang):
+    render_traced(render_diagnosis_panel, lang)
+
+# Solucoes da base de conhecimento mostradas por codigo de falha
+DTC_KNOWLEDGE_LINKS = 3
+
+DTC_PANEL_TEXT = {
+    "en": {
+        "codes": "Fault codes read by the scan tool",
+        "codes_placeholder": "e.g. P0300 P0171 U0100",
+        "none_found": "No fault code (P/C/B/U + 4 digits) found in the text.",
+        "unknown": "Code not in the dictionary.",
+        "generic": "generic OBD-II",
+        "causes": "Likely causes",
+        "knowledge": "Related solutions",
+        "systems": {"powertrain": "Powertrain", "chassis": "Chassis", "body": "Body", "network": "Network"},
+    },
+    "pt": {
+        "codes": "Codigos de falha lidos pelo scanner",
+        "codes_placeholder": "ex.: P0300 P0171 U0100",
+        "none_found": "Nenhum codigo de falha (P/C/B/U + 4 digitos) encontrado no texto.",
+        "unknown": "Codigo fora do dicionario.",
+        "generic": "OBD-II generico",
+        "causes": "Causas provaveis",
+        "knowledge": "Solucoes relacionadas",
+        "systems": {"powertrain": "Motor/transmissao", "chassis": "Chassi", "body": "Carroceria", "network": "Rede"},
+    },
+}
+
+# Memory-mapped on the first lookup, shared by all sessions
+@st.cache_resource
+def get_dtc_dictionary():
+    return DtcDictionary()
+
+def render_dtc_panel(lang, trace):
+    text = DTC_PANEL_TEXT[lang]
+    dump = st.text_area(text["codes"], placeholder=text["codes_placeholder"], key=f"dtc_codes_{lang}")
+    codes = parse_codes(dump)
+    if not codes:
+        if dump.strip():
+            st.warning(text["none_found"])
+        return
+    vehicle = st.session_state.get(f"vehicle_{lang}")
+    with trace.span("dtc_lookup"):
+        results = get_dtc_dictionary().lookup_many(codes, vehicle.make if vehicle is not None else None, lang)
+    knowledge_base = get_knowledge_base()
+    for code, info in zip(codes, results):
+        with st.container(border=True):
+            if info is None:
+                st.markdown(f"**{code}**")
+                st.caption(text["unknown"])
+                continue
+            st.markdown(f"**{info.code}:** {info.description}")
+            st.caption(f"{text['systems'][info.system]} | {info.make or text['generic']}")
+            if info.causes:
+                st.markdown(f"{text['causes']}:\n" + "\n".join(f"- {cause}" for cause in info.causes))
+            hits = knowledge_base.search(info.code, limit=DTC_KNOWLEDGE_LINKS)
+            if hits:
+                st.markdown(f"{text['knowledge']}:\n" + "\n".join(f"- {hit.entry['title']}" for hit in hits))
+
+# Consulta de codigos de falha, rerun on its own like the other panels
+@st.fragment
+def dtc_panel(lang):
+    render_traced(render_dtc_panel, lang)
+
+CANLOG_PANEL_TEXT = {
+    "en": {
+        "upload": "CAN/OBD log (candump or CSV)",
+        "summary": "{frames:,} frames from {ids} CAN ids, {duration:.1f} s of log",
+        "skipped": "{skipped:,} malformed lines skipped",
+        "failed": "Could not read the log: {error}",
+        "no_signals": "No OBD-II sensor responses or numeric columns found in the log.",
+        "signals": "Sensors to plot",
+        "range": "Time window (s)",
+        "plotted": "{shown:,} of {count:,} samples plotted",
+    },
+    "pt": {
+        "upload": "Log CAN/OBD (candump ou CSV)",
+        "summary": "{frames:,} frames de {ids} ids CAN, {duration:.1f} s de log",
+        "skipped": "{skipped:,} linhas invalidas ignoradas",
+        "failed": "Nao foi possivel ler o log: {error}",
+        "no_signals": "Nenhuma resposta de sensor OBD-II ou coluna numerica encontrada no log.",
+        "signals": "Sensores no grafico",
+        "range": "Janela de tempo (s)",
+        "plotted": "{shown:,} de {count:,} amostras no grafico",
+    },
+}
+
+# The imported log stays in session state for its upload; a new upload
+# drops the previous one's sample files.
+def get_canlog(uploaded_file, lang, trace):
+    key = f"canlog_{lang}"
+    cached = st.session_state.get(key)
+    if cached is None or cached[0] != uploaded_file.file_id:
+        if cached is not None and cached[1] is not None:
+            cached[1].close()
+        st.session_state.pop(f"canlog_range_{lang}", None)
+        with trace.span("canlog_import"):
+            try:
+                cached = (uploaded_file.file_id, import_log(uploaded_file), None)
+            except (ValueError, UnicodeDecodeError) as error:
+                cached = (uploaded_file.file_id, None, str(error))
+        st.session_state[key] = cached
+    return cached[1], cached[2]
+
+def render_canlog_panel(lang, trace):
+    text = CANLOG_PANEL_TEXT[lang]
+    uploaded_file = st.file_uploader(text["upload"], type=["log", "txt", "csv"], key=f"canlog_upload_{lang}")
+    if uploaded_file is None:
+        return
+    log, error = get_canlog(uploaded_file, lang, trace)
+    if log is None:
+        st.error(text["failed"].format(error=error))
+        return
+    st.caption(text["summary"].format(frames=log.frames, ids=len(log.ids), duration=log.duration))
+    if log.skipped_lines:
+        st.caption(text["skipped"].format(skipped=log.skipped_lines))
+    if not log.signals:
+        st.info(text["no_signals"])
+        return
+    keys = st.multiselect(
+        text["signals"], list(log.signals), default=list(log.signals)[:2],
+        format_func=lambda key: log.signals[key].name[lang], key=f"canlog_signals_{lang}",
+    )
+    window = (0.0, log.duration)
+    if log.duration > 0:
+        window = st.slider(text["range"], 0.0, log.duration, window, key=f"canlog_range_{lang}")
+    zoomed = window != (0.0, log.duration)
+    for key in keys:
+        signal = log.signals[key]
+        with trace.span("canlog_downsample"):
+            times, values = signal.window(log.start + window[0], log.start + window[1]) if zoomed else signal.overview
+        label = f"{signal.name[lang]} ({signal.unit})" if signal.unit else signal.name[lang]
+        st.line_chart({"s": times - log.start, label: values}, x="s", y=label)
+        st.caption(text["plotted"].format(shown=len(times), count=signal.count))
+
+# Tracos de sensores do log CAN/OBD, rerun on its own so zooming stays local
+@st.fragment
+def canlog_panel(lang):
+    render_traced(render_canlog_panel, lang)
+
+# Largest schematic area shown at once, in pixels of the current zoom level
+SCHEMATIC_VIEWPORT = (960, 640)
+
+SCHEMATIC_PANEL_TEXT = {
+    "en": {
+        "schematic": "Schematic",
+        "sample": "Sample schematic (mockup)",
+        "zoom": "Zoom",
+        "pan_x": "Horizontal position (%)",
+        "pan_y": "Vertical position (%)",
+        "caption": "{width}x{height} px at this zoom, showing {view_width}x{view_height} px from {tiles} tiles",
+        "pdf": "Save as PDF ({pages} pages)",
+    },
+    "pt": {
+        "schematic": "Esquema",
+        "sample": "Esquema de exemplo (mockup)",
+        "zoom": "Zoom",
+        "pan_x": "Posicao horizontal (%)",
+        "pan_y": "Posicao vertical (%)",
+        "caption": "{width}x{height} px neste zoom, mostrando {view_width}x{view_height} px de {tiles} blocos",
+        "pdf": "Salvar em PDF ({pages} paginas)",
+    },
+}
+
+# Recently viewed tiles of every schematic, shared by all sessions
+@st.cache_resource
+def get_tile_cache():
+    return TileCache()
+
+# Keyed on the file's mtime and size so an edited schematic gets a new
+# pyramid; the first open of an image builds it in a child process.
+@st.cache_resource(max_entries=32)
+def get_schematic_pyramid(path, mtime_ns, size):
+    return open_pyramid(path, cache=get_tile_cache())
+
+# Print pages are written one at a time, only when the download is clicked
+def schematic_pdf(pyramid, level):
+    export = tempfile.TemporaryFile()
+    pyramid.write_pdf(export, level)
+    export.seek(0)
+    return export
+
+def render_schematic_panel(lang, trace):
+    text = SCHEMATIC_PANEL_TEXT[lang]
+    sample = os.path.join(MOCKUP_DIR, mockup_key(lang, "schematic"))
+    path = st.selectbox(
+        text["schematic"], list_schematics() + [sample], key=f"schematic_source_{lang}",
+        format_func=lambda path: text["sample"] if path == sample else os.path.basename(path),
+    )
+    stat = os.stat(path)
+    with trace.span("schematic_open"):
+        pyramid = get_schematic_pyramid(path, stat.st_mtime_ns, stat.st_size)
+    full_width = pyramid.sizes[0][0]
+    level = st.select_slider(
+        text["zoom"], list(range(pyramid.levels - 1, -1, -1)), key=f"schematic_zoom_{pyramid.key}_{lang}",
+        format_func=lambda level: f"{100 * pyramid.sizes[level][0] / full_width:.0f}%",
+    )
+    width, height = pyramid.sizes[level]
+    view_width, view_height = min(width, SCHEMATIC_VIEWPORT[0]), min(height, SCHEMATIC_VIEWPORT[1])
+    # Pan as a share of the scrollable range, so zooming keeps the place
+    pan_x, pan_y = st.columns(2)
+    x = pan_x.slider(text["pan_x"], 0, 100, 50, key=f"schematic_x_{lang}") if width > view_width else 50
+    y = pan_y.slider(text["pan_y"], 0, 100, 50, key=f"schematic_y_{lang}") if height > view_height else 50
+    left, top = round((width - view_width) * x / 100), round((height - view_height) * y / 100)
+    with trace.span("schematic_tiles"):
+        pixels = pyramid.viewport(level, left, top, view_width, view_height)
+    size = pyramid.tile_size
+    tiles = (-(-(left + view_width) // size) - left // size) * (-(-(top + view_height) // size) - top // size)
+    st.image(pixels, caption=text["caption"].format(
+        width=width, height=height, view_width=view_width, view_height=view_height, tiles=tiles))
+    st.download_button(
+        text["pdf"].format(pages=len(pyramid.pages(level))), data=lambda: schematic_pdf(pyramid, level),
+        file_name=f"{os.path.splitext(os.path.basename(path))[0]}.pdf", mime="application/pdf",
+        on_click="ignore", key=f"schematic_pdf_{lang}",
+    )
+
+# Visualizador de esquemas; zoom and pan rerun only this panel
+@st.fragment
+def schematic_panel(lang):
+    render_traced(render_schematic_panel, lang)
+
+trace = start_rerun_trace("rerun")
+with trace.span("ensure_mockups"):
+    ensure_mockups_generated()
 
 language = st.selectbox("Language / Idioma", ["Portuguese", "English"], index=0)
 
@@ -601,104 +1123,62 @@ This project demonstrates an AI-assisted automotive electronics prototype focuse
 """
     )
 
-    en_mockups = create_all_mockups_en_images()
+    with trace.span("load_mockups"):
+        en_mockups = load_mockup_images("en")
     tab1, tab2, tab3 = st.tabs(["Guided Diagnosis", "Visual Interpretation", "Dashboard"])
 
     with tab1:
         st.header("Guided Diagnosis Flow")
         st.markdown("### 1. Login Screen")
-        st.image(en_mockups["login"])
+        st.image(en_mockups["login"], output_format="PNG")
         st.markdown("**Description:** Entry point with user identification and access control.")
 
         st.markdown("### 2. Vehicle Selection")
-        st.image(en_mockups["vehicle_selection"])
+        st.image(en_mockups["vehicle_selection"], output_format="PNG")
         st.markdown("**Description:** Vehicle lookup by make/model/year/engine or chassis code.")
+        vehicle_panel("en")
 
         st.markdown("### 3. Diagnostic Interface")
-        st.image(en_mockups["diagnostic"])
+        st.image(en_mockups["diagnostic"], output_format="PNG")
         st.markdown("**Description:** Step-by-step diagnosis with test results and next actions.")
+        diagnosis_panel("en")
 
         st.markdown("### 4. Results View")
-        st.image(en_mockups["results"])
+        st.image(en_mockups["results"], output_format="PNG")
         st.markdown("**Description:** Final diagnosis summary and recommended repair path.")
+        dtc_panel("en")
 
     with tab2:
         st.header("Visual Interpretation System")
         st.markdown("### 1. Image Upload/Capture")
-        st.image(en_mockups["upload"])
+        st.image(en_mockups["upload"], output_format="PNG")
         st.markdown("**Description:** Upload or capture images of modules, labels, components, or schematics.")
 
         st.markdown("### 2. Component Recognition")
-        st.image(en_mockups["recognition"])
+        st.image(en_mockups["recognition"], output_format="PNG")
         st.markdown("**Description:** Component details and related history context.")
 
         st.markdown("### 3. Electrical Schematics View")
-        st.image(en_mockups["schematic"])
+        st.image(en_mockups["schematic"], output_format="PNG")
         st.markdown("**Description:** Related schematic with component legend and export options.")
+        schematic_panel("en")
 
         st.markdown("---")
         st.subheader("Interactive Upload/Capture Test")
         st.caption("Functional section to validate image upload in the prototype.")
-
-        image_type = st.selectbox(
-            "Image type",
-            ["ECU Module", "Label", "Component", "Schematic"],
-            index=2,
-            key="image_type_en",
-        )
-
-        col_upload, col_camera = st.columns(2)
-        uploaded_file = None
-        camera_file = None
-
-        with col_upload:
-            uploaded_file = st.file_uploader(
-                "Upload image",
-                type=["png", "jpg", "jpeg", "webp"],
-                help="Upload an image of the component or label.",
-                key="upload_en",
-            )
-
-        with col_camera:
-            enable_camera = st.checkbox(
-                "Enable camera capture",
-                value=False,
-                help="Camera permission is requested only after enabling this option.",
-                key="enable_camera_en",
-            )
-            if enable_camera:
-                camera_file = st.camera_input("Capture with camera", key="camera_en")
-            else:
-                st.caption("Camera is disabled by default. Enable above to capture.")
-
-        selected_image_file = uploaded_file or camera_file
-
-        if selected_image_file is not None:
-            image = Image.open(selected_image_file)
-            st.image(image, caption=f"Received image ({image_type})", use_container_width=True)
-
-            if st.button("Analyze image", type="primary", key="analyze_en"):
-                with st.spinner("Running sample analysis..."):
-                    width_img, height_img = image.size
-                    st.success("Image processed successfully.")
-                    st.write(f"Detected resolution: {width_img}x{height_img}")
-                    st.write(f"Color mode: {image.mode}")
-                    st.info(
-                        "This result is a placeholder. "
-                        "Connect your computer vision model here for real diagnostics."
-                    )
-        else:
-            st.info("Upload an image or enable the camera to run analysis.")
+        upload_panel("en")
 
     with tab3:
         st.header("Dashboard and Knowledge Base")
         st.markdown("### 1. Main Dashboard")
-        st.image(en_mockups["dashboard"])
+        st.image(en_mockups["dashboard"], output_format="PNG")
         st.markdown("**Description:** Operational overview with diagnostics and usage indicators.")
+        canlog_panel("en")
 
         st.markdown("### 2. Knowledge Base")
-        st.image(en_mockups["knowledge"])
+        st.image(en_mockups["knowledge"], output_format="PNG")
         st.markdown("**Description:** Technical repository organized by issue type and component.")
+        knowledge_panel("en")
 
     st.markdown(
         """
@@ -710,6 +1190,7 @@ This project demonstrates an AI-assisted automotive electronics prototype focuse
 - **Responsive Interface:** usable across workshop device types
 """
     )
+    show_rerun_timings(trace)
     st.stop()
 
 # Exibir os mockups no Streamlit
@@ -721,77 +1202,86 @@ Este projeto desenvolve uma solução de Inteligência Artificial aplicada à el
 focada em auxiliar mecânicos no diagnóstico de falhas e interpretação de esquemas elétricos.
 """)
 
+with trace.span("load_mockups"):
+    pt_mockups = load_mockup_images("pt")
+
 # Exibir os mockups em abas
 tab1, tab2, tab3 = st.tabs(["Diagnóstico Guiado", "Interpretação Visual", "Dashboard"])
 
 with tab1:
     st.header("Fluxo de Diagnóstico Guiado")
     st.markdown("### 1. Tela de Login")
-    st.image("mockups/login.png")
+    st.image(pt_mockups["login"], output_format="PNG")
     st.markdown("""
     **Descrição:** Interface inicial onde o mecânico se identifica no sistema. Permite controle de acesso
     e personalização da experiência com base no histórico do usuário.
     """)
     
     st.markdown("### 2. Seleção de Veículo")
-    st.image("mockups/vehicle_selection.png")
+    st.image(pt_mockups["vehicle_selection"], output_format="PNG")
     st.markdown("""
     **Descrição:** Permite ao mecânico selecionar o veículo a ser diagnosticado através de marca, modelo, 
     ano e motor, ou diretamente pelo código do chassi. Exibe também veículos recentemente diagnosticados.
     """)
+    vehicle_panel("pt")
     
     st.markdown("### 3. Interface de Diagnóstico")
-    st.image("mockups/diagnostic.png")
+    st.image(pt_mockups["diagnostic"], output_format="PNG")
     st.markdown("""
     **Descrição:** Guia o mecânico através de um processo de diagnóstico passo a passo, solicitando testes 
     específicos e coletando resultados. A IA analisa as respostas e determina os próximos passos mais relevantes.
     """)
+    diagnosis_panel("pt")
     
     st.markdown("### 4. Visualização de Resultados")
-    st.image("mockups/results.png")
+    st.image(pt_mockups["results"], output_format="PNG")
     st.markdown("""
     **Descrição:** Apresenta o diagnóstico final com o problema identificado, resumo das verificações realizadas
     e solução recomendada. Inclui informações detalhadas sobre a peça a ser substituída e esquema elétrico relacionado.
     """)
+    dtc_panel("pt")
 
 with tab2:
     st.header("Sistema de Interpretação Visual")
     st.markdown("### 1. Upload/Captura de Imagem")
-    st.image("mockups/upload.png")
+    st.image(pt_mockups["upload"], output_format="PNG")
     st.markdown("""
     **Descrição:** Interface para envio ou captura de imagens de componentes, módulos, etiquetas ou esquemas elétricos.
     Inclui dicas para obter imagens de qualidade que facilitem o reconhecimento pela IA.
     """)
     
     st.markdown("### 2. Reconhecimento de Componentes")
-    st.image("mockups/recognition.png")
+    st.image(pt_mockups["recognition"], output_format="PNG")
     st.markdown("""
     **Descrição:** Exibe o componente identificado com informações detalhadas como tipo, fabricante, número de série
     e aplicação. Mostra também histórico de diagnósticos relacionados a este componente específico.
     """)
     
     st.markdown("### 3. Visualização de Esquemas Elétricos")
-    st.image("mockups/schematic.png")
+    st.image(pt_mockups["schematic"], output_format="PNG")
     st.markdown("""
     **Descrição:** Apresenta o esquema elétrico relacionado ao componente identificado, com legenda detalhada
     dos componentes e suas conexões. Permite ampliar, imprimir ou salvar o esquema em PDF.
     """)
+    schematic_panel("pt")
 
 with tab3:
     st.header("Dashboard e Base de Conhecimento")
     st.markdown("### 1. Dashboard Principal")
-    st.image("mockups/dashboard.png")
+    st.image(pt_mockups["dashboard"], output_format="PNG")
     st.markdown("""
     **Descrição:** Visão geral das atividades de diagnóstico, incluindo estatísticas de uso, taxa de sucesso,
     tempo médio de diagnóstico, histórico recente e gráficos de problemas mais frequentes.
     """)
+    canlog_panel("pt")
     
     st.markdown("### 2. Base de Conhecimento")
-    st.image("mockups/knowledge.png")
+    st.image(pt_mockups["knowledge"], output_format="PNG")
     st.markdown("""
     **Descrição:** Repositório de soluções e informações técnicas organizadas por tipo de problema, componente
     ou modelo de veículo. Permite busca, filtragem e contribuição de novas soluções pelos mecânicos.
     """)
+    knowledge_panel("pt")
 
 st.markdown("""
 ## Recursos Técnicos Implementados
@@ -806,53 +1296,5 @@ st.markdown("""
 st.markdown("---")
 st.subheader("Teste Interativo de Upload/Captura")
 st.caption("Sessao funcional para validar envio de imagem no prototipo.")
-
-image_type_pt = st.selectbox(
-    "Tipo de imagem",
-    ["Modulo ECU", "Etiqueta", "Componente", "Esquema"],
-    index=2,
-    key="image_type_pt",
-)
-
-col_upload_pt, col_camera_pt = st.columns(2)
-uploaded_file_pt = None
-camera_file_pt = None
-
-with col_upload_pt:
-    uploaded_file_pt = st.file_uploader(
-        "Carregar imagem",
-        type=["png", "jpg", "jpeg", "webp"],
-        help="Envie uma imagem do componente ou etiqueta.",
-        key="upload_pt",
-    )
-
-with col_camera_pt:
-    enable_camera_pt = st.checkbox(
-        "Ativar captura por camera",
-        value=False,
-        help="A camera so sera solicitada apos ativar esta opcao.",
-        key="enable_camera_pt",
-    )
-    if enable_camera_pt:
-        camera_file_pt = st.camera_input("Capturar com camera", key="camera_pt")
-    else:
-        st.caption("Camera desativada por padrao. Ative acima para capturar.")
-
-selected_image_file_pt = uploaded_file_pt or camera_file_pt
-
-if selected_image_file_pt is not None:
-    image_pt = Image.open(selected_image_file_pt)
-    st.image(image_pt, caption=f"Imagem recebida ({image_type_pt})", use_container_width=True)
-
-    if st.button("Analisar imagem", type="primary", key="analyze_pt"):
-        with st.spinner("Executando analise de exemplo..."):
-            width_img_pt, height_img_pt = image_pt.size
-            st.success("Imagem processada com sucesso.")
-            st.write(f"Resolucao detectada: {width_img_pt}x{height_img_pt}")
-            st.write(f"Modo de cor: {image_pt.mode}")
-            st.info(
-                "Este resultado e um placeholder. "
-                "Conecte aqui seu modelo de visao computacional para diagnostico real."
-            )
-else:
-    st.info("Envie uma imagem ou ative a camera para habilitar a analise.")
+upload_panel("pt")
+show_rerun_timings(trace)
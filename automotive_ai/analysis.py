@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+
+from automotive_ai.preprocessing import preprocess
+from automotive_ai.uploads import load_analysis_image
+
+# Worker threads shared by every session, and how many jobs may wait on top
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "2"))
+ANALYSIS_MAX_QUEUE = int(os.environ.get("ANALYSIS_MAX_QUEUE", "8"))
+# Finished jobs nobody came back for are dropped after this many seconds
+ANALYSIS_RESULT_TTL = 600
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class AnalysisQueueFull(RuntimeError):
+    def __init__(self, depth):
+        super().__init__(f"analysis queue is full ({depth} jobs waiting)")
+        self.depth = depth
+
+
+@dataclass
+class AnalysisJob:
+    job_id: str
+    status: str = PENDING
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float = None
+    finished_at: float = None
+    result: dict = None
+    error: str = None
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+
+# Bounded pool for image analyses. submit() never blocks: when every worker is
+# busy and max_queue jobs are already waiting it raises AnalysisQueueFull.
+# An analysis may return a Future for work it handed elsewhere; its worker is
+# free at once and the job, still holding its slot, finishes with the future.
+class AnalysisService:
+    def __init__(self, workers=None, max_queue=None, result_ttl=ANALYSIS_RESULT_TTL):
+        workers = ANALYSIS_WORKERS if workers is None else workers
+        max_queue = ANALYSIS_MAX_QUEUE if max_queue is None else max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._result_ttl = result_ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        self._expire_finished()
+        if not self._slots.acquire(blocking=False):
+            raise AnalysisQueueFull(self.queue_depth())
+        job = AnalysisJob(job_id=uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.job_id
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = time.monotonic()
+        job.status = RUNNING
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            self._finish(job, error=exc)
+            return
+        if isinstance(result, Future):
+            result.add_done_callback(lambda future: self._finish(job, *_outcome(future)))
+        else:
+            self._finish(job, result)
+
+    def _finish(self, job, result=None, error=None):
+        # finished_at is set first: pollers read it once the status says done
+        job.finished_at = time.monotonic()
+        if error is None:
+            job.result = result
+            job.status = DONE
+        else:
+            job.error = f"{type(error).__name__}: {error}"
+            job.status = FAILED
+        self._slots.release()
+
+    def status(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # Hands a finished job to its session and forgets it
+    def pop(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished:
+                del self._jobs[job_id]
+            return job
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == PENDING)
+
+    def _expire_finished(self):
+        cutoff = time.monotonic() - self._result_ttl
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def _outcome(future):
+    error = future.exception()
+    return (None, error) if error is not None else (future.result(), None)
+
+
+# Analysis run on the worker pool: the quality gate and preprocessing, then
+# recognition of accepted photos through the shared micro-batcher. The
+# worker does not wait for recognition: accepted photos return a future
+# that completes when the batch they joined has run.
+def analyze_upload(data, recognizer=None):
+    image = load_analysis_image(BytesIO(data))
+    prepared = preprocess(image, None if recognizer is None else recognizer.input_size)
+    result = {
+        "analysis_size": image.size,
+        "mode": image.mode,
+        "accepted": prepared.accepted,
+        "reasons": prepared.reasons,
+        "sharpness": prepared.sharpness,
+        "brightness": prepared.exposure["mean"],
+        "skew": prepared.skew,
+        "crop": prepared.crop,
+        "preprocess_ms": sum(prepared.timings.values()),
+    }
+    if not prepared.accepted or recognizer is None:
+        return result
+    analysed = Future()
+
+    def recognized(future):
+        error = future.exception()
+        if error is not None:
+            analysed.set_exception(error)
+            return
+        recognition = future.result()
+        result.update(
+            components=recognition.top,
+            backend=recognizer.backend.name,
+            trained=recognizer.backend.trained,
+            batch_size=recognition.batch_size,
+            recognition_ms=recognition.queue_ms + recognition.inference_ms,
+        )
+        analysed.set_result(result)
+
+    recognizer.submit(prepared.tensor).add_done_callback(recognized)
+    return analysed
@@ -0,0 +1,211 @@
+"""Batch photo uploads, inspected as a stream on a shared thread pool.
+
+A mechanic documenting a harness uploads 20-50 photos at once. Each one
+gets a PhotoReport: a JPEG thumbnail, the original dimensions and format,
+a few EXIF fields (camera, capture time, orientation, GPS present) and
+the preprocessing quality verdict, computed on a decode of at most
+BATCH_DECODE_PIXELS (JPEGs are scaled down while decoding).
+
+Files are fed to the pool through a sliding window: a batch never has
+more than BATCH_WORKERS files queued or running, and the next file is
+submitted as one finishes. Each photo is decoded straight from the file
+object it came in, and the decoded image is dropped once its report is
+written, so decoding holds at most BATCH_WORKERS photos at a time; only
+the small reports accumulate. Reports land in their slot of the BatchJob
+as they finish, for the page to show while the rest of the batch is still
+running.
+
+This does not bound the uploaded bytes. Streamlit's multi-file uploader
+keeps every file of a batch in the session, so in the app a batch is only
+limited by the uploader (server.maxUploadSize, 200 MB per file by
+default). The command line reads each file from disk when its turn comes.
+
+    python -m automotive_ai.batch_upload photos/*.jpg --workers 4
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import BytesIO
+
+from PIL import Image
+
+from automotive_ai.preprocessing import preprocess
+from automotive_ai.uploads import decode_image, source_info
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "2"))
+BATCH_DECODE_PIXELS = int(os.environ.get("BATCH_DECODE_PIXELS", "3000000"))
+BATCH_THUMBNAIL_SIZE = int(os.environ.get("BATCH_THUMBNAIL_SIZE", "320"))
+
+# EXIF tags: base IFD, then the Exif and GPS sub-IFD pointers
+_EXIF_MAKE = 0x010F
+_EXIF_MODEL = 0x0110
+_EXIF_ORIENTATION = 0x0112
+_EXIF_DATETIME = 0x0132
+_EXIF_IFD = 0x8769
+_GPS_IFD = 0x8825
+_EXIF_DATETIME_ORIGINAL = 0x9003
+
+
+@dataclass
+class PhotoReport:
+    name: str
+    # JPEG bytes, at most BATCH_THUMBNAIL_SIZE on the long side
+    thumbnail: bytes = None
+    # Original dimensions, EXIF orientation applied
+    size: tuple = None
+    format: str = None
+    exif: dict = field(default_factory=dict)
+    accepted: bool = False
+    reasons: list = field(default_factory=list)
+    sharpness: float = 0.0
+    brightness: float = 0.0
+    error: str = None
+    elapsed_ms: float = 0.0
+
+
+def read_exif(image):
+    exif = image.getexif()
+    camera = " ".join(str(exif[tag]).strip("\x00 ") for tag in (_EXIF_MAKE, _EXIF_MODEL) if exif.get(tag))
+    taken = exif.get_ifd(_EXIF_IFD).get(_EXIF_DATETIME_ORIGINAL) or exif.get(_EXIF_DATETIME)
+    summary = {
+        "camera": camera or None,
+        "taken": str(taken).strip("\x00 ") if taken else None,
+        "orientation": exif.get(_EXIF_ORIENTATION),
+        "gps": bool(exif.get_ifd(_GPS_IFD)),
+    }
+    return {key: value for key, value in summary.items() if value}
+
+
+def inspect_photo(file, name=None):
+    start = time.perf_counter()
+    report = PhotoReport(name=name or getattr(file, "name", "photo"))
+    try:
+        file.seek(0)
+        source = Image.open(file)
+        report.size, _, report.format = source_info(source)
+        report.exif = read_exif(source)
+        image = decode_image(file, BATCH_DECODE_PIXELS)
+        prepared = preprocess(image)
+        report.accepted, report.reasons = prepared.accepted, prepared.reasons
+        report.sharpness, report.brightness = prepared.sharpness, prepared.exposure["mean"]
+        image.thumbnail((BATCH_THUMBNAIL_SIZE, BATCH_THUMBNAIL_SIZE))
+        thumbnail = BytesIO()
+        image.convert("RGB").save(thumbnail, "JPEG", quality=80)
+        report.thumbnail = thumbnail.getvalue()
+    except Exception as exc:
+        report.error = f"{type(exc).__name__}: {exc}"
+    report.elapsed_ms = (time.perf_counter() - start) * 1000
+    return report
+
+
+class BatchJob:
+    def __init__(self, files):
+        self.batch_id = uuid.uuid4().hex
+        self.names = [getattr(file, "name", f"photo {index + 1}") for index, file in enumerate(files)]
+        # One slot per file, filled in completion order
+        self.reports = [None] * len(files)
+        self.done = 0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self._files = list(files)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        return len(self.reports)
+
+    @property
+    def finished(self):
+        return self.done == self.total
+
+    def _take(self):
+        with self._lock:
+            if self._next == len(self._files):
+                return None, None
+            index = self._next
+            self._next += 1
+            # The job stops holding the file once a worker has it
+            file, self._files[index] = self._files[index], None
+            return index, file
+
+    def _finish(self, index, report):
+        with self._lock:
+            self.reports[index] = report
+            self.done += 1
+            if self.done == self.total:
+                self.finished_at = time.monotonic()
+
+    def completed(self):
+        with self._lock:
+            return [(index, report) for index, report in enumerate(self.reports) if report is not None]
+
+
+# Thread pool shared by every session's batches. Each batch keeps at most
+# `window` files on the pool; a finished file's callback submits the next.
+class BatchService:
+    def __init__(self, workers=None, window=None):
+        workers = BATCH_WORKERS if workers is None else workers
+        self.window = workers if window is None else window
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+
+    def submit(self, files):
+        job = BatchJob(files)
+        for _ in range(min(self.window, job.total)):
+            self._submit_next(job)
+        return job
+
+    def _submit_next(self, job):
+        index, file = job._take()
+        if file is None:
+            return
+        future = self._executor.submit(inspect_photo, file, job.names[index])
+        future.add_done_callback(lambda future: self._done(job, index, future))
+
+    def _done(self, job, index, future):
+        job._finish(index, future.result())
+        self._submit_next(job)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.batch_upload", description=__doc__.splitlines()[0])
+    parser.add_argument("photos", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    service = BatchService(args.workers)
+    files = [open(path, "rb") for path in args.photos]
+    try:
+        job = service.submit(files)
+        shown = set()
+        while len(shown) < job.total:
+            for index, report in job.completed():
+                if index in shown:
+                    continue
+                shown.add(index)
+                if report.error:
+                    print(f"{report.name}: failed: {report.error}")
+                    continue
+                verdict = "ok" if report.accepted else "retake: " + ", ".join(report.reasons)
+                details = ", ".join(f"{key} {value}" for key, value in report.exif.items())
+                print(f"{report.name}: {report.size[0]}x{report.size[1]} {report.format}, {verdict},"
+                      f" sharpness {report.sharpness:.0f} ({report.elapsed_ms:.0f} ms){'; ' + details if details else ''}")
+            time.sleep(0.01)
+        elapsed = job.finished_at - job.started_at
+        print(f"{job.total} photos in {elapsed:.2f} s ({job.total / elapsed:.1f} photos/s)")
+    finally:
+        for file in files:
+            file.close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
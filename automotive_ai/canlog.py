@@ -0,0 +1,427 @@
+"""CAN/OBD log import with downsampled sensor traces.
+
+Logs are read in chunks of CANLOG_CHUNK_LINES lines and parsed into NumPy
+columns: candump files ("(1436509052.249713) can0 7E8#04410C1AF8" or the
+"-ta" terminal layout) and CSV exports with one frame per row, or CSVs of
+already decoded signals (a time column plus one column per sensor). OBD-II
+mode 01 responses in the frames are decoded into sensor signals.
+
+Each chunk's samples are appended to raw files on disk and folded into a
+streaming largest-triangle-three-buckets (LTTB) overview, so memory
+follows the chunk size rather than the log length. Zooming into a time
+range runs LTTB again over the memory-mapped samples of that range only.
+
+    python -m automotive_ai.canlog capture.log --pid 0C 0D 05
+"""
+import csv
+import io
+import itertools
+import os
+import re
+import shutil
+import tempfile
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+
+CANLOG_CHUNK_LINES = int(os.environ.get("CANLOG_CHUNK_LINES", "100000"))
+CANLOG_PLOT_POINTS = int(os.environ.get("CANLOG_PLOT_POINTS", "2000"))
+
+# candump -l: "(1436509052.249713) can0 7E8#04410C1AF8AAAAAA"; CAN FD ("##") is skipped
+_CANDUMP_LOG = re.compile(rb"\((\d+(?:\.\d+)?)\)\s+\S+\s+([0-9A-Fa-f]{1,8})#([0-9A-Fa-f]{0,16})\s*$", re.MULTILINE)
+# candump -ta: " (1436509052.249713)  can0  7E8   [8]  04 41 0C 1A F8 AA AA AA"
+_CANDUMP_TERMINAL = re.compile(
+    rb"\((\d+(?:\.\d+)?)\)\s+\S+\s+([0-9A-Fa-f]{1,8})\s+\[\d\]\s+((?:[0-9A-Fa-f]{2}[ \t]*){0,8})\s*$", re.MULTILINE
+)
+_TIME_COLUMNS = ("time", "timestamp", "time stamp", "t", "seconds", "tempo")
+_ID_COLUMNS = ("id", "can id", "can_id", "arbitration_id", "arbitration id", "identifier")
+_DATA_COLUMNS = ("data", "payload", "bytes")
+_HEX_DIGITS = np.zeros(256, dtype=bool)
+_HEX_DIGITS[np.frombuffer(b"0123456789abcdefABCDEF", dtype=np.uint8)] = True
+# Response ids of OBD-II ECUs: 7E8-7EF, or 18DAF1xx on 29-bit buses
+_OBD_RESPONSE = 0x41
+
+
+@dataclass
+class Pid:
+    pid: int
+    key: str
+    name: dict
+    unit: str
+    # Value from the A and B data bytes, as float arrays
+    decode: object
+
+
+def _load(a, b):
+    return a * 100.0 / 255.0
+
+
+def _temperature(a, b):
+    return a - 40.0
+
+
+def _trim(a, b):
+    return (a - 128.0) * 100.0 / 128.0
+
+
+PIDS = {
+    pid.pid: pid
+    for pid in (
+        Pid(0x04, "engine_load", {"en": "Engine load", "pt": "Carga do motor"}, "%", _load),
+        Pid(0x05, "coolant_temp", {"en": "Coolant temperature", "pt": "Temperatura do motor"}, "°C", _temperature),
+        Pid(0x06, "short_fuel_trim", {"en": "Short-term fuel trim", "pt": "Correcao de mistura curta"}, "%", _trim),
+        Pid(0x07, "long_fuel_trim", {"en": "Long-term fuel trim", "pt": "Correcao de mistura longa"}, "%", _trim),
+        Pid(0x0B, "map", {"en": "Intake manifold pressure", "pt": "Pressao do coletor"}, "kPa", lambda a, b: a),
+        Pid(0x0C, "rpm", {"en": "Engine RPM", "pt": "Rotacao do motor"}, "rpm", lambda a, b: (a * 256.0 + b) / 4.0),
+        Pid(0x0D, "speed", {"en": "Vehicle speed", "pt": "Velocidade"}, "km/h", lambda a, b: a),
+        Pid(0x0E, "timing_advance", {"en": "Timing advance", "pt": "Avanco de ignicao"}, "°", lambda a, b: a / 2.0 - 64.0),
+        Pid(0x0F, "intake_temp", {"en": "Intake air temperature", "pt": "Temperatura do ar"}, "°C", _temperature),
+        Pid(0x10, "maf", {"en": "Air flow (MAF)", "pt": "Fluxo de ar (MAF)"}, "g/s", lambda a, b: (a * 256.0 + b) / 100.0),
+        Pid(0x11, "throttle", {"en": "Throttle position", "pt": "Posicao da borboleta"}, "%", _load),
+        Pid(0x42, "module_voltage", {"en": "Module voltage", "pt": "Tensao do modulo"}, "V", lambda a, b: (a * 256.0 + b) / 1000.0),
+    )
+}
+
+
+@dataclass
+class FrameChunk:
+    # Seconds as logged, CAN id, and 8 data bytes per frame (short frames zero-padded)
+    time: np.ndarray
+    can_id: np.ndarray
+    data: np.ndarray
+
+
+def parse_pid(text):
+    text = str(text).strip().lower()
+    for pid in PIDS.values():
+        if text == pid.key:
+            return pid.pid
+    return int(text, 16)
+
+
+def _hex_column(values, width, dtype):
+    # All frames' hex digits joined into one string and converted at once
+    joined = "".join(value.decode("ascii").replace(" ", "").replace("\t", "").ljust(width, "0") for value in values)
+    return np.frombuffer(bytes.fromhex(joined), dtype=dtype)
+
+
+# Which values are at most `width` hex digits, for a whole chunk at once:
+# every character is looked up, and bad ones are mapped back to their row
+def _valid_hex(values, width):
+    lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+    digits = np.frombuffer(b"".join(values), dtype=np.uint8)
+    valid = lengths <= width
+    valid[np.searchsorted(np.cumsum(lengths), np.flatnonzero(~_HEX_DIGITS[digits]), side="right")] = False
+    return valid
+
+
+def _frames(times, ids, payloads):
+    if not len(times):
+        return FrameChunk(np.zeros(0), np.zeros(0, dtype=np.uint32), np.zeros((0, 8), dtype=np.uint8))
+    return FrameChunk(
+        np.asarray(times, dtype=np.float64),
+        _hex_column([can_id.rjust(8, b"0") for can_id in ids], 8, ">u4").astype(np.uint32),
+        _hex_column(payloads, 16, np.uint8).reshape(-1, 8),
+    )
+
+
+def _column(header, names):
+    for index, name in enumerate(header):
+        if name.strip().lower() in names:
+            return index
+    return None
+
+
+def _read_chunks(stream, chunk_lines):
+    while True:
+        lines = list(itertools.islice(stream, chunk_lines))
+        if not lines:
+            return
+        yield lines
+
+
+class LogReader:
+    """Chunked parser; kind is "candump", "frames_csv" or "signals_csv"."""
+
+    def __init__(self, stream, chunk_lines=None):
+        self.stream = stream
+        self.chunk_lines = CANLOG_CHUNK_LINES if chunk_lines is None else chunk_lines
+        first = stream.readline()
+        self._pending = [first]
+        text = first.decode("utf-8", "replace").lstrip("\ufeff")
+        self.header = None
+        # Lines or rows dropped as malformed so far
+        self.skipped = 0
+        if _CANDUMP_LOG.search(first) or _CANDUMP_TERMINAL.search(first):
+            self.kind = "candump"
+            self._pattern = _CANDUMP_LOG if _CANDUMP_LOG.search(first) else _CANDUMP_TERMINAL
+            return
+        try:
+            self.dialect = csv.Sniffer().sniff(text, delimiters=",;\t")
+        except csv.Error:
+            self.dialect = csv.excel
+        self.header = next(csv.reader([text], self.dialect))
+        self._pending = []
+        lowered = [name.strip().lower() for name in self.header]
+        self.time_column = _column(lowered, _TIME_COLUMNS)
+        self.id_column = _column(lowered, _ID_COLUMNS)
+        data_column = _column(lowered, _DATA_COLUMNS)
+        # SavvyCAN-style D1..D8 columns, or a single hex payload column
+        self.byte_columns = [index for index, name in enumerate(lowered) if re.fullmatch(r"d(?:ata)?\s*\[?[0-8]\]?", name)]
+        if data_column is not None:
+            self.byte_columns = [data_column]
+        if self.time_column is None:
+            raise ValueError("CSV log needs a time/timestamp column")
+        self.kind = "frames_csv" if self.id_column is not None and self.byte_columns else "signals_csv"
+
+    def chunks(self):
+        lines = self._pending + list(itertools.islice(self.stream, max(0, self.chunk_lines - len(self._pending))))
+        self._pending = []
+        while lines:
+            yield self._parse(lines)
+            lines = list(itertools.islice(self.stream, self.chunk_lines))
+
+    def _parse(self, lines):
+        if self.kind == "candump":
+            matches = self._pattern.findall(b"".join(lines))
+            self.skipped += sum(1 for line in lines if line.strip()) - len(matches)
+            return _frames(*zip(*matches)) if matches else _frames([], [], [])
+        parsed = [row for row in csv.reader(io.StringIO(b"".join(lines).decode("utf-8", "replace")), self.dialect) if row]
+        width = len(self.header)
+        rows = [row for row in parsed if len(row) >= width]
+        self.skipped += len(parsed) - len(rows)
+        if self.kind == "signals_csv":
+            table = np.array([row[:width] for row in rows], dtype=object)
+            columns = {}
+            for index, name in enumerate(self.header):
+                if index == self.time_column:
+                    continue
+                columns[name.strip()] = _to_float(table[:, index] if rows else [])
+            return _to_float(table[:, self.time_column] if rows else []), columns
+        times = _to_float([row[self.time_column] for row in rows])
+        # Non-ASCII characters become "?" and fail the hex check below
+        ids = [row[self.id_column].strip().lower().replace("0x", "").encode("ascii", "replace") for row in rows]
+        if len(self.byte_columns) == 1:
+            payloads = ["".join(row[self.byte_columns[0]].split()).encode("ascii", "replace") for row in rows]
+            keep = ~np.isnan(times)
+        else:
+            cells = [[row[index].strip() for index in self.byte_columns] for row in rows]
+            payloads = [b"".join(cell.rjust(2, "0").encode("ascii", "replace") for cell in row_cells if cell) for row_cells in cells]
+            # A byte cell of more than two digits would shift the bytes after it
+            keep = ~np.isnan(times) & np.array([all(len(cell) <= 2 for cell in row_cells) for row_cells in cells], dtype=bool)
+        if rows:
+            keep &= _valid_hex(ids, 8) & _valid_hex(payloads, 16)
+        self.skipped += int(len(rows) - keep.sum())
+        return _frames(times[keep], [ids[index] for index in np.flatnonzero(keep)],
+                       [payloads[index] for index in np.flatnonzero(keep)])
+
+
+# Unparseable cells become NaN; decimal commas are accepted
+def _to_float(values):
+    values = [str(value).strip().replace(",", ".") for value in values]
+    try:
+        return np.array(values, dtype=str).astype(np.float64)
+    except ValueError:
+        out = np.full(len(values), np.nan)
+        for index, value in enumerate(values):
+            try:
+                out[index] = float(value)
+            except ValueError:
+                pass
+        return out
+
+
+# OBD-II mode 01 responses in a chunk of frames, per requested PID
+def decode_obd(frames, pids):
+    is_response = ((frames.can_id >= 0x7E8) & (frames.can_id <= 0x7EF)) | ((frames.can_id >> 8) == 0x18DAF1)
+    is_response &= frames.data[:, 1] == _OBD_RESPONSE
+    signals = {}
+    for pid in pids:
+        mask = is_response & (frames.data[:, 2] == pid)
+        if mask.any():
+            a = frames.data[mask, 3].astype(np.float64)
+            b = frames.data[mask, 4].astype(np.float64)
+            signals[PIDS[pid].key] = (frames.time[mask], PIDS[pid].decode(a, b))
+    return signals
+
+
+# Largest-triangle-three-buckets: keeps first and last points and, in each
+# bucket between, the point forming the largest triangle with the point
+# kept before it and the average of the next bucket.
+def lttb(x, y, points):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = len(x)
+    if points >= count or points < 3:
+        return x, y
+    edges = np.linspace(1, count - 1, points - 1).astype(np.int64)
+    kept = np.empty(points, dtype=np.int64)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+        px, py = x[previous], y[previous]
+        area = np.abs((px - next_x) * (y[start:stop] - py) - (px - x[start:stop]) * (next_y - py))
+        previous = start + int(area.argmax())
+        kept[bucket + 1] = previous
+    return x[kept], y[kept]
+
+
+# LTTB over a stream: each chunk is reduced on arrival and the kept points
+# are reduced again whenever they pass four times the target.
+class StreamingLttb:
+    def __init__(self, points):
+        self.points = points
+        self._x = []
+        self._y = []
+        self._kept = 0
+
+    def add(self, x, y):
+        x, y = lttb(x, y, self.points)
+        self._x.append(x)
+        self._y.append(y)
+        self._kept += len(x)
+        if self._kept > 4 * self.points:
+            x, y = lttb(np.concatenate(self._x), np.concatenate(self._y), 2 * self.points)
+            self._x, self._y, self._kept = [x], [y], len(x)
+
+    def result(self):
+        if not self._x:
+            return np.zeros(0), np.zeros(0)
+        return lttb(np.concatenate(self._x), np.concatenate(self._y), self.points)
+
+
+class Signal:
+    def __init__(self, key, name, unit, directory, points):
+        self.key = key
+        self.name = name
+        self.unit = unit
+        self.count = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self._paths = (os.path.join(directory, f"{key}.time.f64"), os.path.join(directory, f"{key}.value.f32"))
+        self._files = [open(path, "wb") for path in self._paths]
+        self._overview = StreamingLttb(points)
+        self._maps = None
+
+    def append(self, time, value):
+        keep = ~np.isnan(value) & ~np.isnan(time)
+        time, value = time[keep], value[keep]
+        if not len(time):
+            return
+        self._files[0].write(time.astype(np.float64).tobytes())
+        self._files[1].write(value.astype(np.float32).tobytes())
+        self.count += len(time)
+        self.minimum = min(self.minimum, float(value.min()))
+        self.maximum = max(self.maximum, float(value.max()))
+        self._overview.add(time, value)
+
+    def close(self):
+        for signal_file in self._files:
+            signal_file.close()
+        self.overview = self._overview.result()
+        self._overview = None
+
+    def _samples(self):
+        if self._maps is None:
+            self._maps = (
+                np.memmap(self._paths[0], dtype=np.float64, mode="r") if self.count else np.zeros(0),
+                np.memmap(self._paths[1], dtype=np.float32, mode="r") if self.count else np.zeros(0, dtype=np.float32),
+            )
+        return self._maps
+
+    # Downsampled samples between start and end (log seconds), read from
+    # the memory-mapped raw files. Logs are time-ordered per signal.
+    def window(self, start, end, points=None):
+        points = CANLOG_PLOT_POINTS if points is None else points
+        time, value = self._samples()
+        lo = np.searchsorted(time, start, side="left")
+        hi = np.searchsorted(time, end, side="right")
+        return lttb(time[lo:hi], value[lo:hi], points)
+
+
+class CanLog:
+    def __init__(self, kind, directory):
+        self.kind = kind
+        self.directory = directory
+        self.signals = {}
+        self.frames = 0
+        self.skipped_lines = 0
+        self.ids = set()
+        self.start = None
+        self.end = None
+        # Raw sample files go when the log is garbage collected
+        self._cleanup = weakref.finalize(self, shutil.rmtree, directory, True)
+
+    @property
+    def duration(self):
+        return 0.0 if self.start is None else self.end - self.start
+
+    def _signal(self, key, name, unit, points):
+        if key not in self.signals:
+            self.signals[key] = Signal(key, name, unit, self.directory, points)
+        return self.signals[key]
+
+    def _span(self, time):
+        if len(time):
+            self.start = float(time[0]) if self.start is None else min(self.start, float(time[0]))
+            self.end = float(time[-1]) if self.end is None else max(self.end, float(time[-1]))
+
+    def close(self):
+        self._cleanup()
+
+
+def import_log(stream, pids=None, chunk_lines=None, points=None, directory=None):
+    points = CANLOG_PLOT_POINTS if points is None else points
+    pids = sorted(PIDS) if pids is None else pids
+    reader = LogReader(stream, chunk_lines)
+    log = CanLog(reader.kind, directory or tempfile.mkdtemp(prefix="canlog-"))
+    for chunk in reader.chunks():
+        if reader.kind == "signals_csv":
+            time, columns = chunk
+            log._span(time[~np.isnan(time)])
+            for name, values in columns.items():
+                key = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "signal"
+                log._signal(key, {"en": name, "pt": name}, "", points).append(time, values)
+            continue
+        log.frames += len(chunk.time)
+        log.ids.update(np.unique(chunk.can_id).tolist())
+        log._span(chunk.time)
+        for key, (time, values) in decode_obd(chunk, pids).items():
+            pid = next(pid for pid in PIDS.values() if pid.key == key)
+            log._signal(key, pid.name, pid.unit, points).append(time, values)
+    for signal in log.signals.values():
+        signal.close()
+    log.skipped_lines = reader.skipped
+    return log
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.canlog", description=__doc__.splitlines()[0])
+    parser.add_argument("log", help="candump log or CSV export")
+    parser.add_argument("--pid", nargs="+", type=parse_pid, help="PIDs to decode, hex or name (default: all known)")
+    parser.add_argument("--points", type=int, default=CANLOG_PLOT_POINTS)
+    parser.add_argument("--chunk-lines", type=int, default=CANLOG_CHUNK_LINES)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with open(args.log, "rb") as stream:
+        log = import_log(stream, args.pid, args.chunk_lines, args.points)
+    elapsed = time.perf_counter() - start
+    print(f"{log.kind}: {log.frames} frames, {len(log.ids)} CAN ids, {log.duration:.1f}s of log, imported in {elapsed:.2f}s"
+          + (f", {log.skipped_lines} malformed lines skipped" if log.skipped_lines else ""))
+    for signal in log.signals.values():
+        print(f"  {signal.key:16s} {signal.count:9d} samples  {signal.minimum:9.2f} .. {signal.maximum:9.2f} {signal.unit}"
+              f"  ({len(signal.overview[0])} plotted)")
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Guided diagnosis: decision trees compiled into flat transition tables.
+
+Trees (data/diagnosis_trees.json) are written per symptom, optionally
+specialised for some vehicles with "extends". Compiling gives every node a
+global id and a row of flat arrays. A measurement node quantises the value
+onto a grid of its own resolution, so the next step is one index into the
+cell table; a check node indexes the table with the chosen option. The
+engine is immutable and shared by every session; a session is a few
+dozen bytes of node ids and measured values.
+"""
+import json
+import math
+import os
+import struct
+import unicodedata
+from array import array
+
+DIAGNOSIS_TREES = os.environ.get("DIAGNOSIS_TREES", os.path.join("data", "diagnosis_trees.json"))
+
+MEASURE = 0
+CHECK = 1
+RESULT = 2
+_KINDS = {"measure": MEASURE, "check": CHECK, "result": RESULT}
+# Largest grid a measurement node may compile to
+MAX_CELLS = 100000
+
+_SESSION_HEADER = struct.Struct("<HIH")
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).split())
+
+
+class DiagnosisSession:
+    __slots__ = ("tree", "node", "path", "values")
+
+    def __init__(self, tree, node):
+        self.tree = tree
+        self.node = node
+        # Nodes answered so far and the value given at each. Values are
+        # doubles so a reading on an expected bound stays on it.
+        self.path = array("I")
+        self.values = array("d")
+
+    # Fixed header plus the two arrays; 12 bytes per answered step
+    def to_bytes(self):
+        return _SESSION_HEADER.pack(self.tree, self.node, len(self.path)) + self.path.tobytes() + self.values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        tree, node, steps = _SESSION_HEADER.unpack_from(data)
+        session = cls(tree, node)
+        offset = _SESSION_HEADER.size
+        session.path.frombytes(data[offset : offset + 4 * steps])
+        session.values.frombytes(data[offset + 4 * steps : offset + 12 * steps])
+        return session
+
+
+def _resolve_trees(source_trees):
+    by_id = {tree["id"]: tree for tree in source_trees}
+    resolved = {}
+
+    def resolve(tree_id, seen=()):
+        if tree_id in resolved:
+            return resolved[tree_id]
+        if tree_id in seen:
+            raise ValueError(f"diagnosis tree {tree_id!r} extends itself")
+        tree = by_id[tree_id]
+        if "extends" in tree:
+            base = resolve(tree["extends"], seen + (tree_id,))
+            merged = dict(base, **{key: value for key, value in tree.items() if key != "nodes"})
+            merged["nodes"] = dict(base["nodes"], **tree.get("nodes", {}))
+            merged["symptom_id"] = base["symptom_id"]
+        else:
+            merged = dict(tree, symptom_id=tree_id)
+        resolved[tree_id] = merged
+        return merged
+
+    return [resolve(tree["id"]) for tree in source_trees]
+
+
+class DiagnosisEngine:
+    def __init__(self, source_trees):
+        self.trees = []
+        self.nodes = []
+        self._kind = array("B")
+        self._lo = array("d")
+        self._inv_step = array("d")
+        self._cell_start = array("I")
+        self._cell_count = array("I")
+        self._cells = array("I")
+        self._depth = array("H")
+        # Stable names to compiled ids, for sessions stored by name
+        self._tree_ids = {}
+        self._node_ids = {}
+        for tree in _resolve_trees(source_trees):
+            self._compile_tree(tree)
+
+    @classmethod
+    def from_file(cls, path=None):
+        path = DIAGNOSIS_TREES if path is None else path
+        with open(path, encoding="utf-8") as trees_file:
+            return cls(json.load(trees_file)["trees"])
+
+    def _compile_tree(self, tree):
+        base = len(self.nodes)
+        names = list(tree["nodes"])
+        ids = {name: base + index for index, name in enumerate(names)}
+        self._tree_ids[tree["id"]] = len(self.trees)
+        for name in names:
+            self._node_ids[len(self.trees), name] = ids[name]
+            node = tree["nodes"][name]
+            kind = _KINDS[node["kind"]]
+            targets = [ids[target] for target in node.get("next", [])]
+            self.nodes.append(dict(node, name=name, tree=len(self.trees)))
+            self._kind.append(kind)
+            self._cell_start.append(len(self._cells))
+            if kind == MEASURE:
+                lo, step, cells = self._measure_cells(name, node, targets)
+            elif kind == CHECK:
+                if len(targets) != len(node["options"]["en"]):
+                    raise ValueError(f"{tree['id']}.{name}: one next node per option")
+                lo, step, cells = 0.0, 1.0, targets
+            else:
+                lo, step, cells = 0.0, 1.0, []
+            self._lo.append(lo)
+            self._inv_step.append(1.0 / step)
+            self._cell_count.append(len(cells))
+            self._cells.extend(cells)
+
+        depth = {}
+
+        # Longest run of steps from a node to a result, rejecting cycles
+        def walk(node_id, stack):
+            if node_id in depth:
+                return depth[node_id]
+            if node_id in stack:
+                raise ValueError(f"{tree['id']}: cycle through {self.nodes[node_id]['name']!r}")
+            start, count = self._cell_start[node_id], self._cell_count[node_id]
+            successors = set(self._cells[start : start + count])
+            depth[node_id] = 0 if not successors else 1 + max(walk(next_id, stack | {node_id}) for next_id in successors)
+            return depth[node_id]
+
+        for node_id in range(base, len(self.nodes)):
+            self._depth.append(walk(node_id, frozenset()))
+        self.trees.append({
+            "id": tree["id"],
+            "symptom_id": tree["symptom_id"],
+            "symptom": tree["symptom"],
+            "vehicles": [_fold(vehicle) for vehicle in tree.get("vehicles", ["*"])],
+            "start": ids[tree["start"]],
+        })
+
+    # Grid of cells one resolution wide: cell 0 is below the first
+    # threshold, the last cell at or above the last one, and every cell in
+    # between falls inside a single branch.
+    @staticmethod
+    def _measure_cells(name, node, targets):
+        thresholds = sorted(node["thresholds"])
+        if len(targets) != len(thresholds) + 1:
+            raise ValueError(f"{name}: needs one next node per threshold interval")
+        step = float(node.get("resolution", 1))
+        lo = thresholds[0]
+        inner = round((thresholds[-1] - lo) / step)
+        for threshold in thresholds:
+            offset = (threshold - lo) / step
+            if abs(offset - round(offset)) > 1e-6:
+                raise ValueError(f"{name}: threshold {threshold} is not a multiple of the resolution {step}")
+        if inner + 2 > MAX_CELLS:
+            raise ValueError(f"{name}: resolution too fine for the threshold range")
+        cells = [targets[0]]
+        for cell in range(inner):
+            lower = lo + cell * step
+            cells.append(targets[sum(1 for threshold in thresholds if threshold <= lower + step / 2)])
+        cells.append(targets[-1])
+        return lo, step, cells
+
+    def symptoms(self, lang):
+        seen = {}
+        for tree in self.trees:
+            seen.setdefault(tree["symptom_id"], tree["symptom"][lang])
+        return seen
+
+    # Most specific tree for the vehicle: make and model, then make, then any
+    def select_tree(self, symptom_id, vehicle=None):
+        keys = ["*"]
+        if vehicle is not None:
+            keys = [_fold(f"{vehicle.make} {vehicle.model}"), _fold(vehicle.make), "*"]
+        best = None
+        for index, tree in enumerate(self.trees):
+            if tree["symptom_id"] != symptom_id:
+                continue
+            for rank, key in enumerate(keys):
+                if key in tree["vehicles"] and (best is None or rank < best[0]):
+                    best = (rank, index)
+        if best is None:
+            raise KeyError(symptom_id)
+        return best[1]
+
+    def start(self, tree_index):
+        return DiagnosisSession(tree_index, self.trees[tree_index]["start"])
+
+    def tree_index(self, tree_id):
+        return self._tree_ids[tree_id]
+
+    def find_node(self, tree_index, name):
+        return self._node_ids.get((tree_index, name))
+
+    # Rebuilds a session from stored (node name, value) answers, stopping
+    # where the trees no longer match them
+    def replay(self, tree_index, answers):
+        session = self.start(tree_index)
+        for name, value in answers:
+            if self.nodes[session.node]["name"] != name or self.finished(session):
+                break
+            self.answer(session, value)
+        return session
+
+    # Constant-time transition: one grid index for a measurement, the
+    # option index for a check
+    def next_node(self, node, value):
+        kind = self._kind[node]
+        count = self._cell_count[node]
+        if kind == RESULT:
+            raise ValueError("diagnosis already finished")
+        if kind == MEASURE:
+            cell = math.floor(round((value - self._lo[node]) * self._inv_step[node], 6)) + 1
+            cell = min(max(cell, 0), count - 1)
+        else:
+            cell = int(value)
+            if not 0 <= cell < count:
+                raise ValueError(f"option {value} out of range")
+        return self._cells[self._cell_start[node] + cell]
+
+    def answer(self, session, value):
+        next_node = self.next_node(session.node, value)
+        session.path.append(session.node)
+        session.values.append(value)
+        session.node = next_node
+        return next_node
+
+    def back(self, session):
+        if session.path:
+            session.node = session.path.pop()
+            session.values.pop()
+
+    def finished(self, session):
+        return self._kind[session.node] == RESULT
+
+    # (current step, total steps) on the longest path still possible
+    def progress(self, session):
+        done = len(session.path)
+        return done + 1, done + self._depth[session.node]
+
+    def node(self, node_id):
+        return self.nodes[node_id]
+
+    def kind(self, node_id):
+        return self._kind[node_id]
+
+    # Answered steps with the value as entered and whether it was expected.
+    # The first option of a check is its normal outcome.
+    def history(self, session, lang):
+        steps = []
+        for node_id, value in zip(session.path, session.values):
+            node = self.nodes[node_id]
+            if self._kind[node_id] == MEASURE:
+                low, high = node["expected"]
+                shown = f"{round(value, 3):g} {node['unit']}"
+                steps.append((node["label"][lang], shown, low <= value <= high))
+            else:
+                steps.append((node["label"][lang], node["options"][lang][int(value)], int(value) == 0))
+        return steps
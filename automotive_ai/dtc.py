@@ -0,0 +1,224 @@
+"""Diagnostic trouble code (DTC) dictionary.
+
+data/dtc_codes.csv lists generic OBD-II codes (empty make) and
+manufacturer-specific meanings of the same or other codes. It is compiled
+into a directory of .npy files: a sorted uint32 key per row, built from
+the code and the make, plus every text field in one UTF-8 blob with an
+offsets table. Opening it memory-maps those files without parsing them.
+A batch of codes is looked up with two vectorised binary searches, first
+for the vehicle's make and then for the generic meaning.
+
+    python -m automotive_ai.dtc P0300 P1136 U0100 --make VW
+"""
+import csv
+import hashlib
+import os
+import re
+import shutil
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DTC_SOURCE = os.environ.get("DTC_SOURCE", os.path.join("data", "dtc_codes.csv"))
+DTC_INDEX_DIR = os.environ.get("DTC_INDEX_DIR", os.path.join("data", "dtc_index"))
+# Bump when the index layout changes, so dictionaries are recompiled.
+DTC_INDEX_VERSION = 1
+
+# Code letter by system; the key keeps its index in the top bits
+SYSTEMS = {"P": "powertrain", "C": "chassis", "B": "body", "U": "network"}
+TEXT_FIELDS = ("description_pt", "description_en", "causes_pt", "causes_en")
+# Bits below the code number holding the make id (0 is generic)
+_MAKE_BITS = 8
+DTC_PATTERN = re.compile(r"\b([PCBU][0-3][0-9A-F]{3})\b", re.IGNORECASE)
+
+
+def fold(text):
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).split())
+
+
+# "P0120" -> 0x00120, "U0100" -> 0x30100; None if not a DTC
+def code_number(code):
+    code = str(code).strip().upper()
+    if len(code) != 5 or not DTC_PATTERN.fullmatch(code):
+        return None
+    return list(SYSTEMS).index(code[0]) << 16 | int(code[1:], 16)
+
+
+def code_text(number):
+    return f"{list(SYSTEMS)[number >> 16]}{number & 0xFFFF:04X}"
+
+
+# Codes in the order a scan tool printed them, without repeats
+def parse_codes(text):
+    return list(dict.fromkeys(match.upper() for match in DTC_PATTERN.findall(str(text))))
+
+
+@dataclass
+class TroubleCode:
+    code: str
+    system: str
+    # Empty for the generic OBD-II meaning
+    make: str = ""
+    description: str = ""
+    causes: list = field(default_factory=list)
+
+
+def compile_dictionary(source_path, index_dir):
+    with open(source_path, newline="", encoding="utf-8") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+    make_labels = {"": ""}
+    for row in rows:
+        make_labels.setdefault(fold(row["make"]), row["make"].strip())
+    if len(make_labels) > 1 << _MAKE_BITS:
+        raise ValueError(f"at most {(1 << _MAKE_BITS) - 1} makes")
+    makes = sorted(make_labels)
+    make_ids = {make: index for index, make in enumerate(makes)}
+
+    keyed = {}
+    for row in rows:
+        number = code_number(row["code"])
+        if number is None:
+            raise ValueError(f"not a trouble code: {row['code']!r}")
+        # A later row for the same code and make replaces the earlier one
+        keyed[number << _MAKE_BITS | make_ids[fold(row["make"])]] = row
+    keys = sorted(keyed)
+
+    blob = bytearray()
+    offsets = [0]
+    for key in keys:
+        for name in TEXT_FIELDS:
+            blob += keyed[key][name].strip().encode("utf-8")
+            offsets.append(len(blob))
+    os.makedirs(index_dir)
+    np.save(os.path.join(index_dir, "keys.npy"), np.array(keys, dtype=np.uint32))
+    np.save(os.path.join(index_dir, "makes.npy"), np.array(makes, dtype=str))
+    np.save(os.path.join(index_dir, "make_labels.npy"), np.array([make_labels[make] for make in makes], dtype=str))
+    np.save(os.path.join(index_dir, "text_offsets.npy"), np.array(offsets, dtype=np.int64))
+    np.save(os.path.join(index_dir, "text.npy"), np.frombuffer(bytes(blob), dtype=np.uint8))
+
+
+class DtcDictionary:
+    def __init__(self, source_path=None, index_dir=None):
+        self.source_path = DTC_SOURCE if source_path is None else source_path
+        self.index_dir = DTC_INDEX_DIR if index_dir is None else index_dir
+        self._tables = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._load()["keys"])
+
+    # Compiles the CSV into a directory named after its hash the first
+    # time it is needed, then memory-maps it.
+    def _load(self):
+        if self._tables is not None:
+            return self._tables
+        with self._lock:
+            if self._tables is None:
+                digest = hashlib.sha256(str(DTC_INDEX_VERSION).encode())
+                with open(self.source_path, "rb") as source_file:
+                    digest.update(source_file.read())
+                compiled = os.path.join(self.index_dir, f"dtc-{digest.hexdigest()[:16]}")
+                if not os.path.isdir(compiled):
+                    os.makedirs(self.index_dir, exist_ok=True)
+                    tmp_dir = f"{compiled}.tmp-{os.getpid()}-{threading.get_ident()}"
+                    compile_dictionary(self.source_path, tmp_dir)
+                    try:
+                        os.rename(tmp_dir, compiled)
+                    except OSError:
+                        # Another process compiled the same source first
+                        shutil.rmtree(tmp_dir, ignore_errors=True)
+                    for name in os.listdir(self.index_dir):
+                        if name.startswith("dtc-") and name != os.path.basename(compiled) and ".tmp-" not in name:
+                            shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+                self._tables = {
+                    name[: -len(".npy")]: np.load(os.path.join(compiled, name), mmap_mode="r")
+                    for name in os.listdir(compiled)
+                }
+        return self._tables
+
+    def _text(self, row, name):
+        tables = self._load()
+        slot = row * len(TEXT_FIELDS) + TEXT_FIELDS.index(name)
+        start, end = tables["text_offsets"][slot : slot + 2]
+        return bytes(tables["text"][start:end]).decode("utf-8")
+
+    # Row of each key in the sorted table, -1 where it is missing
+    def _find(self, keys):
+        table = self._load()["keys"]
+        rows = np.searchsorted(table, keys)
+        found = rows < len(table)
+        found[found] = table[rows[found]] == keys[found]
+        return np.where(found, rows, -1)
+
+    def _make_id(self, make):
+        makes = self._load()["makes"]
+        make = fold(make or "")
+        index = int(np.searchsorted(makes, make))
+        return index if make and index < len(makes) and makes[index] == make else 0
+
+    # One entry per code, in order: the vehicle make's meaning when there
+    # is one, else the generic meaning, else None
+    def lookup_many(self, codes, make=None, lang="en"):
+        numbers = [code_number(code) for code in codes]
+        valid = np.array([number for number in numbers if number is not None], dtype=np.uint32)
+        rows = self._find(valid << _MAKE_BITS)
+        make_id = self._make_id(make)
+        if make_id:
+            specific = self._find(valid << _MAKE_BITS | make_id)
+            rows = np.where(specific >= 0, specific, rows)
+
+        keys = self._load()["keys"]
+        labels = self._load()["make_labels"]
+        row_iter = iter(rows.tolist())
+        results = []
+        for number in numbers:
+            row = None if number is None else next(row_iter)
+            if row is None or row < 0:
+                results.append(None)
+                continue
+            causes = self._text(row, f"causes_{lang}")
+            results.append(TroubleCode(
+                code=code_text(number),
+                system=SYSTEMS[code_text(number)[0]],
+                make=str(labels[int(keys[row]) & ((1 << _MAKE_BITS) - 1)]),
+                description=self._text(row, f"description_{lang}"),
+                causes=causes.split("|") if causes else [],
+            ))
+        return results
+
+    def lookup(self, code, make=None, lang="en"):
+        return self.lookup_many([code], make, lang)[0]
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.dtc", description=__doc__.splitlines()[0])
+    parser.add_argument("codes", nargs="+", help="codes, or a scan-tool dump to pick them from")
+    parser.add_argument("--make", help="vehicle make, for manufacturer-specific meanings")
+    parser.add_argument("--lang", choices=("en", "pt"), default="en")
+    args = parser.parse_args(argv)
+
+    codes = parse_codes(" ".join(args.codes))
+    if not codes:
+        parser.error("no trouble codes found")
+    dictionary = DtcDictionary()
+    start = time.perf_counter()
+    results = dictionary.lookup_many(codes, args.make, args.lang)
+    elapsed = time.perf_counter() - start
+    for code, info in zip(codes, results):
+        if info is None:
+            print(f"{code}: not in the dictionary")
+            continue
+        print(f"{info.code} [{info.system}{', ' + info.make if info.make else ''}] {info.description}")
+        for cause in info.causes:
+            print(f"  - {cause}")
+    print(f"{elapsed * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
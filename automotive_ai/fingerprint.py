@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+# Cached analyses, and how many differing hash bits still count as the same image
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_MAX_DISTANCE = int(os.environ.get("RESULT_CACHE_MAX_DISTANCE", "6"))
+
+_HASH_INPUT_SIZE = 32
+_HASH_BITS_SIZE = 8
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+_DCT = _dct_matrix(_HASH_INPUT_SIZE)
+_BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+
+# 64-bit DCT perceptual hash: survives re-compression, resizing and small
+# crops, unlike a byte hash of the upload.
+def perceptual_hash(image):
+    small = image.convert("L").resize((_HASH_INPUT_SIZE, _HASH_INPUT_SIZE), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:_HASH_BITS_SIZE, :_HASH_BITS_SIZE].ravel()
+    # Skip the DC term so overall brightness does not move the median
+    bits = low > np.median(low[1:])
+    return int(np.bitwise_or.reduce(_BIT_WEIGHTS[bits]))
+
+
+def hamming_distances(fingerprint, fingerprints):
+    diff = np.bitwise_xor(np.asarray(fingerprints, dtype=np.uint64), np.uint64(fingerprint))
+    return np.unpackbits(diff.view(np.uint8)).reshape(len(diff), 64).sum(axis=1)
+
+
+# LRU of analysis results keyed by perceptual hash; a lookup matches the
+# closest stored hash within max_distance bits.
+class ResultCache:
+    def __init__(self, maxsize=None, max_distance=None):
+        self.maxsize = RESULT_CACHE_SIZE if maxsize is None else maxsize
+        self.max_distance = RESULT_CACHE_MAX_DISTANCE if max_distance is None else max_distance
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint):
+        with self._lock:
+            match = self._closest(fingerprint)
+            if match is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(match)
+            return self._entries[match]
+
+    def put(self, fingerprint, result):
+        with self._lock:
+            self._entries[fingerprint] = result
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _closest(self, fingerprint):
+        if fingerprint in self._entries:
+            return fingerprint
+        if not self._entries:
+            return None
+        keys = list(self._entries)
+        distances = hamming_distances(fingerprint, keys)
+        best = int(np.argmin(distances))
+        return keys[best] if distances[best] <= self.max_distance else None
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -0,0 +1,555 @@
+"""Streaming ingestion of technical chat groups and service manuals.
+
+Each input file is read as a stream of lines from a saved position and
+split into records: one per message for WhatsApp chat exports, one per
+section for service manuals (plain text, or PDF through the optional
+pypdf package). A record is tagged with the vehicles, components and
+trouble codes it mentions, fingerprinted with a 64-bit SimHash and turned
+into a knowledge-base entry.
+
+Files are processed in chunks of INGEST_BATCH records. With workers,
+chunks of different files run in parallel processes. The parent drops
+near-duplicates across all files, appends each batch to the knowledge-base
+contributions log and only then records the file position in the
+checkpoint, so an interrupted run resumes after the last committed batch.
+Memory is bounded by the chunks in flight and the deduplication window,
+not by the size of the input.
+
+    python -m automotive_ai.ingestion exports/grupo.txt manuals/*.pdf --workers 4
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from automotive_ai.dtc import parse_codes
+from automotive_ai.fingerprint import hamming_distances
+from automotive_ai.knowledge_base import (
+    KNOWLEDGE_BASE_SOURCE,
+    KNOWLEDGE_CONTRIBUTIONS,
+    analyze,
+    append_entries,
+    build_index,
+    file_sha256,
+    read_entries,
+)
+from automotive_ai.vehicle_catalog import VehicleCatalog
+
+INGEST_CHECKPOINT = os.environ.get("INGEST_CHECKPOINT", os.path.join("data", "ingestion_checkpoint.json"))
+INGEST_COMPONENT_TERMS = os.environ.get("INGEST_COMPONENT_TERMS", os.path.join("data", "component_terms.csv"))
+# Records per chunk, and per append to the contributions log
+INGEST_BATCH = int(os.environ.get("INGEST_BATCH", "500"))
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "0"))
+# Recent fingerprints compared against, and differing bits still counted as the same post
+INGEST_DEDUPE_WINDOW = int(os.environ.get("INGEST_DEDUPE_WINDOW", "200000"))
+INGEST_DEDUPE_DISTANCE = int(os.environ.get("INGEST_DEDUPE_DISTANCE", "3"))
+INGEST_MIN_CHARS = int(os.environ.get("INGEST_MIN_CHARS", "40"))
+# Bump when positions or record splitting change, so files are read again.
+CHECKPOINT_VERSION = 1
+
+KINDS = ("chat", "manual")
+MANUAL_SECTION_CHARS = 1500
+# Longest record kept; the rest of a runaway message or paragraph is cut
+MAX_RECORD_CHARS = 20000
+TITLE_CHARS = 90
+# Spelled-out makes mentioned in posts, by catalog make
+MAKE_ALIASES = {"volkswagen": "VW", "chevy": "Chevrolet", "gm": "Chevrolet"}
+# Checkpoint files are matched by their first bytes
+_HEAD_BYTES = 1 << 16
+# Fingerprints kept per band value
+_BUCKET_SIZE = 64
+# A PDF position is the page in the high bits and the line on it below
+_PDF_LINE_BITS = 20
+
+# "12/03/2024 14:35 - João: ..." (Android) or "[12/03/2024, 14:35:12] João: ..." (iOS)
+_CHAT_HEADER = re.compile(
+    r"^\u200e?\[?(\d{1,2}/\d{1,2}/\d{2,4}),? (\d{1,2}:\d{2}(?::\d{2})?)(?:\s?[APap]\.?[Mm]\.?)?\]?(?: -)? (.*)$"
+)
+_CHAT_AUTHOR = re.compile(r"^([^:]{1,60}): (.*)$")
+_CHAT_NOISE = re.compile(
+    r"<[^>]*(?:omitted|oculta|ocultada|editada|edited)>|\u200e|"
+    r"^(?:This message was deleted|Mensagem apagada|Voce apagou esta mensagem|Você apagou esta mensagem)\.?$",
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+# 64-bit SimHash over analysed words and word pairs: reposts, forwards and
+# small edits land a few bits apart
+def simhash(tokens):
+    features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    votes = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little").sum(axis=0)
+    return int(np.packbits(votes * 2 > len(features), bitorder="little").view("<u8")[0])
+
+
+# Fingerprints of the last `window` records. Two hashes within max_distance
+# bits agree on at least one of max_distance + 1 bands, so only hashes
+# sharing a band value are compared. Templated posts crowd a few band
+# values, so each keeps only its most recent fingerprints.
+class NearDuplicates:
+    def __init__(self, window=None, max_distance=None):
+        self.window = INGEST_DEDUPE_WINDOW if window is None else window
+        self.max_distance = INGEST_DEDUPE_DISTANCE if max_distance is None else max_distance
+        self._bands = self.max_distance + 1
+        self._band_bits = 64 // self._bands
+        self._buckets = {}
+        self._order = deque()
+
+    def _keys(self, fingerprint):
+        mask = (1 << self._band_bits) - 1
+        return [(band, (fingerprint >> (band * self._band_bits)) & mask) for band in range(self._bands)]
+
+    def add(self, fingerprint):
+        for key in self._keys(fingerprint):
+            bucket = self._buckets.setdefault(key, [])
+            bucket.append(fingerprint)
+            if len(bucket) > _BUCKET_SIZE:
+                del bucket[0]
+        self._order.append(fingerprint)
+        if len(self._order) > self.window:
+            oldest = self._order.popleft()
+            for key in self._keys(oldest):
+                bucket = self._buckets[key]
+                # Already pushed out of a full bucket
+                if bucket and bucket[0] == oldest:
+                    del bucket[0]
+                if not bucket:
+                    del self._buckets[key]
+
+    # True for a near-duplicate of a recent record; otherwise remembers it.
+    # Similar posts share several bands, so candidates are merged first.
+    def seen(self, fingerprint):
+        candidates = set()
+        for key in self._keys(fingerprint):
+            candidates.update(self._buckets.get(key, ()))
+        if fingerprint in candidates:
+            return True
+        if candidates and hamming_distances(fingerprint, list(candidates)).min() <= self.max_distance:
+            return True
+        self.add(fingerprint)
+        return False
+
+
+class Extractor:
+    def __init__(self, vehicles, components):
+        # Analysed phrase -> (label, rank); models rank before bare makes
+        self.vehicles = vehicles
+        # Analysed phrase -> (component, problem type)
+        self.components = components
+        # Phrase lengths to try at each first word, longest first
+        self._lengths = {}
+        for phrase in list(vehicles) + list(components):
+            self._lengths.setdefault(phrase[0], set()).add(len(phrase))
+        self._lengths = {word: sorted(lengths, reverse=True) for word, lengths in self._lengths.items()}
+
+    @classmethod
+    def from_sources(cls, catalog=None, terms_path=None, knowledge_source=None):
+        catalog = VehicleCatalog() if catalog is None else catalog
+        terms_path = INGEST_COMPONENT_TERMS if terms_path is None else terms_path
+        knowledge_source = KNOWLEDGE_BASE_SOURCE if knowledge_source is None else knowledge_source
+        vehicles = {}
+        for make, model in catalog.model_names():
+            vehicles.setdefault(tuple(analyze(make)), (make, 1))
+            vehicles[tuple(analyze(model))] = (f"{make} {model}", 0)
+            vehicles[tuple(analyze(f"{make} {model}"))] = (f"{make} {model}", 0)
+        makes = {label for label, rank in vehicles.values() if rank == 1}
+        for alias, make in MAKE_ALIASES.items():
+            if make in makes:
+                vehicles.setdefault(tuple(analyze(alias)), (make, 1))
+        components = {}
+        with open(terms_path, newline="", encoding="utf-8") as terms_file:
+            for row in csv.DictReader(terms_file):
+                components[tuple(analyze(row["term"]))] = (row["component"], row["problem_type"])
+        # Components already used by the knowledge base, under the same label
+        for entry in read_entries(knowledge_source):
+            if entry.get("component"):
+                components.setdefault(tuple(analyze(entry["component"])), (entry["component"], entry.get("problem_type", "")))
+        vehicles.pop((), None)
+        components.pop((), None)
+        return cls(vehicles, components)
+
+    # Values of the phrases found in tokens, longest match first, in order
+    def _scan(self, phrases, tokens):
+        found = []
+        index = 0
+        while index < len(tokens):
+            for size in self._lengths.get(tokens[index], ()):
+                value = phrases.get(tuple(tokens[index : index + size]))
+                if value is not None:
+                    if value not in found:
+                        found.append(value)
+                    index += size
+                    break
+            else:
+                index += 1
+        return found
+
+    # (fingerprint, entry), or None for a record too short or, in a chat,
+    # one that mentions no vehicle, component or trouble code
+    def entry(self, kind, text, heading, source):
+        text = " ".join(_CHAT_NOISE.sub(" ", text).split())[:MAX_RECORD_CHARS]
+        if len(text) < INGEST_MIN_CHARS:
+            return None
+        tokens = analyze(text)
+        vehicles = sorted(self._scan(self.vehicles, tokens), key=lambda value: value[1])
+        components = self._scan(self.components, tokens)
+        codes = parse_codes(text)
+        if kind == "chat" and not (vehicles or components or codes):
+            return None
+        fingerprint = simhash(tokens)
+        title = heading if kind == "manual" and heading else _SENTENCE_END.split(text, 1)[0]
+        entry = {
+            "title": title[:TITLE_CHARS],
+            "symptoms": "",
+            "solution": text,
+            "vehicle": vehicles[0][0] if vehicles else "",
+            "component": components[0][0] if components else "",
+            "problem_type": components[0][1] if components else "",
+            "codes": codes,
+            "source": source,
+            "simhash": f"{fingerprint:016x}",
+        }
+        return fingerprint, entry
+
+
+def _text_lines(path, position):
+    with open(path, "rb") as source_file:
+        source_file.seek(position)
+        for raw in source_file:
+            yield position, raw.decode("utf-8", "replace").rstrip("\r\n").lstrip("\ufeff")
+            position += len(raw)
+    yield position, None
+
+
+def _pdf_lines(path, position):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError(f"{path}: reading PDF manuals needs pypdf (pip install pypdf), or extract them to .txt")
+    reader = PdfReader(path)
+    first_page, first_line = position >> _PDF_LINE_BITS, position & ((1 << _PDF_LINE_BITS) - 1)
+    for page_index in range(first_page, len(reader.pages)):
+        lines = (reader.pages[page_index].extract_text() or "").splitlines()
+        for line_index in range(first_line if page_index == first_page else 0, len(lines)):
+            yield page_index << _PDF_LINE_BITS | line_index, lines[line_index]
+    yield len(reader.pages) << _PDF_LINE_BITS, None
+
+
+def _lines(path, position):
+    return _pdf_lines(path, position) if path.lower().endswith(".pdf") else _text_lines(path, position)
+
+
+# (start, end, author, text) per message; end is where the next one starts.
+# Lines without a date header continue the previous message.
+def split_chat(lines):
+    start, author, parts, size = None, None, [], 0
+    for position, line in lines:
+        if line is None:
+            break
+        header = _CHAT_HEADER.match(line)
+        if header:
+            if start is not None:
+                yield start, position, author, "\n".join(parts)
+            body = _CHAT_AUTHOR.match(header.group(3))
+            # Lines without "author:" are notices (joined, left, encryption)
+            author, first = (body.group(1), body.group(2)) if body else (None, header.group(3))
+            start, parts, size = position, [first], len(first)
+        elif start is not None and size < MAX_RECORD_CHARS:
+            parts.append(line)
+            size += len(line)
+    if start is not None:
+        yield start, position, author, "\n".join(parts)
+
+
+def _is_heading(paragraph):
+    text = paragraph[0]
+    return (
+        len(paragraph) == 1
+        and 3 <= len(text) <= 80
+        and not text.endswith((".", ",", ";", ":"))
+        and (text[0].isupper() or text[0].isdigit())
+    )
+
+
+# (start, end, heading, text) per section: paragraphs under the same
+# heading, cut at MANUAL_SECTION_CHARS. Restarting at an end with the
+# section's heading continues the split where it stopped.
+def split_manual(lines, heading=""):
+    section, section_start, section_len = [], None, 0
+    paragraph, paragraph_start = [], None
+    for position, line in lines:
+        if line is not None and line.strip():
+            if paragraph_start is None:
+                paragraph_start = position
+            if sum(map(len, paragraph)) < MAX_RECORD_CHARS:
+                paragraph.append(line.strip())
+            continue
+        if paragraph:
+            if _is_heading(paragraph):
+                if section:
+                    yield section_start, paragraph_start, heading, "\n\n".join(section)
+                    section, section_len = [], 0
+                heading = paragraph[0]
+            else:
+                text = " ".join(paragraph)
+                if not section:
+                    section_start = paragraph_start
+                section.append(text)
+                section_len += len(text)
+                if section_len >= MANUAL_SECTION_CHARS:
+                    yield section_start, position, heading, "\n\n".join(section)
+                    section, section_len = [], 0
+            paragraph, paragraph_start = [], None
+        if line is None:
+            break
+    if section:
+        yield section_start, position, heading, "\n\n".join(section)
+
+
+# A file is a chat export when its first lines carry message date headers
+def detect_kind(path):
+    if path.lower().endswith(".pdf"):
+        return "manual"
+    with open(path, "rb") as source_file:
+        head = source_file.read(_HEAD_BYTES).decode("utf-8", "replace").lstrip("\ufeff")
+    lines = [line for line in head.splitlines()[:50] if line.strip()]
+    headers = sum(1 for line in lines if _CHAT_HEADER.match(line))
+    return "chat" if lines and headers * 2 >= len(lines) else "manual"
+
+
+# Reads up to `limit` records from position. Returns the entries and where
+# the next chunk starts; "eof" once the file is exhausted.
+def process_chunk(path, kind, position, state, limit, extractor):
+    last = [position]
+
+    def tracked(lines):
+        for item in lines:
+            last[0] = item[0]
+            yield item
+
+    lines = tracked(_lines(path, position))
+    if kind == "chat":
+        records = split_chat(lines)
+    else:
+        records = split_manual(lines, state.get("heading", ""))
+    source = f"{kind}:{os.path.basename(path)}"
+    entries, read, dropped, end, eof = [], 0, 0, position, True
+    for start, end, label, text in records:
+        read += 1
+        result = extractor.entry(kind, text, label, source) if kind == "manual" or label is not None else None
+        if result is None:
+            dropped += 1
+        else:
+            entries.append(result)
+        if kind == "manual":
+            state = {"heading": label}
+        if read >= limit:
+            eof = False
+            break
+    if eof:
+        end = last[0]
+    return {"entries": entries, "position": end, "state": state, "eof": eof, "read": read, "dropped": dropped}
+
+
+_worker_extractor = None
+
+
+def _init_worker(extractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _run_chunk(task):
+    return process_chunk(*task, extractor=_worker_extractor)
+
+
+def _head_sha256(path, size):
+    with open(path, "rb") as source_file:
+        return hashlib.sha256(source_file.read(size)).hexdigest()
+
+
+def load_checkpoint(path=None):
+    path = INGEST_CHECKPOINT if path is None else path
+    try:
+        with open(path, encoding="utf-8") as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+    except (OSError, ValueError):
+        checkpoint = None
+    if not checkpoint or checkpoint.get("version") != CHECKPOINT_VERSION:
+        checkpoint = {"version": CHECKPOINT_VERSION, "files": {}}
+    return checkpoint
+
+
+def save_checkpoint(checkpoint, path=None):
+    path = INGEST_CHECKPOINT if path is None else path
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+# Saved progress for path, if the file is still the one that was read: same
+# first bytes and not shorter. A chat export that grew continues at its end.
+def _resume_state(saved, path, size):
+    if not saved or size < saved["size"] or _head_sha256(path, saved["head_bytes"]) != saved["head"]:
+        head_bytes = min(size, _HEAD_BYTES)
+        return {
+            "kind": None, "size": size, "head_bytes": head_bytes, "head": _head_sha256(path, head_bytes),
+            "position": 0, "state": {}, "eof": False, "read": 0, "loaded": 0, "duplicates": 0, "dropped": 0,
+        }
+    if size > saved["size"]:
+        saved = dict(saved, size=size, eof=False)
+    return saved
+
+
+# Near-duplicate check also covers what earlier runs already loaded
+def _prime_duplicates(duplicates, contributions):
+    if not os.path.exists(contributions):
+        return
+    pattern = re.compile(r'"simhash": "([0-9a-f]{16})"')
+    recent = deque(maxlen=duplicates.window)
+    with open(contributions, encoding="utf-8") as log_file:
+        for line in log_file:
+            match = pattern.search(line)
+            if match:
+                recent.append(int(match.group(1), 16))
+    for fingerprint in recent:
+        duplicates.add(fingerprint)
+
+
+def ingest(paths, kind="auto", workers=None, batch=None, checkpoint_path=None, contributions=None,
+           index_dir=None, source=None, build=True, extractor=None, log=print):
+    workers = INGEST_WORKERS if workers is None else workers
+    batch = INGEST_BATCH if batch is None else batch
+    checkpoint_path = INGEST_CHECKPOINT if checkpoint_path is None else checkpoint_path
+    contributions = KNOWLEDGE_CONTRIBUTIONS if contributions is None else contributions
+    source = KNOWLEDGE_BASE_SOURCE if source is None else source
+    extractor = Extractor.from_sources() if extractor is None else extractor
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    duplicates = NearDuplicates()
+    _prime_duplicates(duplicates, contributions)
+    totals = {"files": 0, "read": 0, "loaded": 0, "duplicates": 0, "dropped": 0, "bytes": 0}
+    queue = deque()
+    for path in paths:
+        key = os.path.abspath(path)
+        size = os.path.getsize(path)
+        file_state = _resume_state(checkpoint["files"].get(key), path, size)
+        if file_state["kind"] is None:
+            file_state["kind"] = detect_kind(path) if kind == "auto" else kind
+        checkpoint["files"][key] = file_state
+        totals["files"] += 1
+        if file_state["eof"]:
+            log(f"{path}: already ingested")
+        else:
+            queue.append(key)
+
+    def task(key):
+        file_state = checkpoint["files"][key]
+        return key, file_state["kind"], file_state["position"], file_state["state"], batch
+
+    # Single writer: append the batch, then advance the file's checkpoint
+    def commit(key, result):
+        kept = [entry for fingerprint, entry in result["entries"] if not duplicates.seen(fingerprint)]
+        if kept:
+            append_entries(contributions, kept, sync=True)
+        file_state = checkpoint["files"][key]
+        # PDF positions count pages, not bytes
+        if not key.lower().endswith(".pdf"):
+            totals["bytes"] += result["position"] - file_state["position"]
+        counts = {
+            "read": result["read"],
+            "loaded": len(kept),
+            "duplicates": len(result["entries"]) - len(kept),
+            "dropped": result["dropped"],
+        }
+        for name, count in counts.items():
+            file_state[name] += count
+            totals[name] += count
+        file_state.update(position=result["position"], state=result["state"], eof=result["eof"])
+        save_checkpoint(checkpoint, checkpoint_path)
+        if result["eof"]:
+            log(
+                f"{key}: {file_state['read']} records, {file_state['loaded']} loaded,"
+                f" {file_state['duplicates']} near-duplicates, {file_state['dropped']} skipped"
+            )
+
+    if workers > 0 and queue:
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(extractor,)) as pool:
+            in_flight = {}
+            while queue or in_flight:
+                # One chunk per file at a time keeps each file's batches in order
+                while queue and len(in_flight) < 2 * workers:
+                    key = queue.popleft()
+                    in_flight[pool.submit(_run_chunk, task(key))] = key
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = in_flight.pop(future)
+                    result = future.result()
+                    commit(key, result)
+                    if not result["eof"]:
+                        queue.append(key)
+    else:
+        while queue:
+            key = queue[0]
+            result = process_chunk(*task(key), extractor=extractor)
+            commit(key, result)
+            if result["eof"]:
+                queue.popleft()
+
+    if build and totals["loaded"]:
+        contributed = read_entries(contributions)
+        build_index(read_entries(source) + contributed, index_dir, file_sha256(source), len(contributed))
+    return totals
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.ingestion", description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="chat exports (.txt) and manuals (.txt, .pdf)")
+    parser.add_argument("--kind", choices=("auto",) + KINDS, default="auto", help="default: detect per file")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="worker processes (default: %(default)s)")
+    parser.add_argument("--batch", type=int, default=INGEST_BATCH, help="records per chunk (default: %(default)s)")
+    parser.add_argument("--checkpoint", default=INGEST_CHECKPOINT, help="progress file (default: %(default)s)")
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and read every file again")
+    parser.add_argument("--no-build", action="store_true", help="leave the new entries in the delta until next open")
+    args = parser.parse_args(argv)
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    start = time.perf_counter()
+    try:
+        totals = ingest(args.paths, args.kind, args.workers, args.batch, args.checkpoint, build=not args.no_build)
+    except KeyboardInterrupt:
+        print(f"interrupted; rerun the same command to resume from {args.checkpoint}")
+        raise SystemExit(130)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{totals['files']} files, {totals['read']} records: {totals['loaded']} loaded,"
+        f" {totals['duplicates']} near-duplicates, {totals['dropped']} skipped;"
+        f" {totals['bytes'] / 1e6:.1f} MB of text in {elapsed:.1f}s ({totals['bytes'] / 1e6 / max(elapsed, 1e-9):.1f} MB/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
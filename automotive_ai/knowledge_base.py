@@ -0,0 +1,490 @@
+"""Knowledge-base search: BM25 over an on-disk inverted index.
+
+Solutions come from a JSONL source file (one entry per line with title,
+symptoms, solution, vehicle, component and problem_type) plus the
+mechanics' contributions log. They are compiled into a segment directory
+of NumPy arrays that is memory-mapped, so opening the index costs little
+more than reading its vocabulary. Contributions appended after the last
+build are kept in a small in-memory delta and searched alongside it.
+
+    python -m automotive_ai.knowledge_base build
+    python -m automotive_ai.knowledge_base search "relé de partida" --problem-type Elétricos
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+KNOWLEDGE_BASE_SOURCE = os.environ.get("KNOWLEDGE_BASE_SOURCE", os.path.join("data", "knowledge_base.jsonl"))
+KNOWLEDGE_INDEX_DIR = os.environ.get("KNOWLEDGE_INDEX_DIR", os.path.join("data", "knowledge_index"))
+KNOWLEDGE_CONTRIBUTIONS = os.environ.get(
+    "KNOWLEDGE_CONTRIBUTIONS", os.path.join("data", "knowledge_contributions.jsonl")
+)
+# Contributions kept in the in-memory delta before open() folds them into a new segment
+KNOWLEDGE_COMPACT_THRESHOLD = int(os.environ.get("KNOWLEDGE_COMPACT_THRESHOLD", "500"))
+# Bump when analysis or the segment layout changes, so indexes are rebuilt.
+KNOWLEDGE_INDEX_VERSION = 1
+
+FACETS = ("vehicle", "component", "problem_type")
+TEXT_FIELDS = ("title", "symptoms", "solution", "vehicle", "component")
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Palavras vazias em português e inglês, já sem acento. "nao"/"not" stay:
+# "compressor nao liga" is a symptom.
+_STOPWORDS = frozenset(
+    "a ao aos as com da das de do dos e em na nas no nos o os ou para pela pelo por que se sem um uma"
+    " an and are at be by for from if in is it of on or the to with".split()
+)
+# Plural endings (pt and en) and their singular form, longest first
+_PLURAL_RULES = (
+    ("coes", "cao"), ("oes", "ao"), ("aes", "ao"), ("ies", "y"), ("ais", "al"), ("eis", "el"),
+    ("ois", "ol"), ("res", "r"), ("zes", "z"), ("ns", "m"),
+)
+
+
+# Accent-folded form of each character met so far, for str.translate
+class _FoldTable(dict):
+    def __missing__(self, code):
+        folded = unicodedata.normalize("NFKD", chr(code))
+        self[code] = "".join(char for char in folded if not unicodedata.combining(char))
+        return self[code]
+
+
+_FOLD_TABLE = _FoldTable()
+
+
+def fold(text):
+    text = text.lower()
+    return text if text.isascii() else text.translate(_FOLD_TABLE)
+
+
+# Light stemmer shared by both languages: plural to singular, a few verb
+# and adverb endings, then a final a/e/o so "partida"/"partidas" and
+# "relé"/"relés" meet. Words are already accent-folded.
+@lru_cache(maxsize=65536)
+def stem(word):
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in _PLURAL_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            word = word[: -len(suffix)] + replacement
+            break
+    else:
+        if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            word = word[:-1]
+    if word.endswith("mente") and len(word) >= 9:
+        word = word[:-5]
+    elif word.endswith("ing") and len(word) >= 6:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) >= 5 and not word.endswith("eed"):
+        word = word[:-2]
+    if word[-1] in "aeo" and len(word) >= 4:
+        word = word[:-1]
+    return word
+
+
+def analyze(text):
+    return [stem(token) for token in _TOKEN_RE.findall(fold(text)) if token not in _STOPWORDS]
+
+
+def entry_terms(entry):
+    return Counter(analyze(" ".join(str(entry.get(name) or "") for name in TEXT_FIELDS)))
+
+
+def facet_key(value):
+    return " ".join(fold(value or "").split())
+
+
+def read_entries(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as entries_file:
+        return [json.loads(line) for line in entries_file if line.strip()]
+
+
+# One write per batch; with sync the lines are on disk when it returns
+def append_entries(path, entries, sync=False):
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+    with open(path, "a", encoding="utf-8") as log_file:
+        log_file.write(lines)
+        if sync:
+            log_file.flush()
+            os.fsync(log_file.fileno())
+
+
+def file_sha256(path):
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _bm25(tf, doc_len, idf, avgdl):
+    return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avgdl))
+
+
+@dataclass
+class SearchHit:
+    doc_id: int
+    score: float
+    entry: dict
+
+
+# Writes one immutable segment: postings sorted by term, then by doc id.
+def write_segment(entries, segment_dir):
+    os.makedirs(segment_dir)
+    vocab = {}
+    term_ids, doc_ids, tfs = [], [], []
+    doc_len = np.zeros(len(entries), dtype=np.uint32)
+    facet_values = {name: {"": 0} for name in FACETS}
+    facet_codes = {name: np.zeros(len(entries), dtype=np.uint32) for name in FACETS}
+    offsets = np.zeros(len(entries) + 1, dtype=np.uint64)
+
+    with open(os.path.join(segment_dir, "docs.jsonl"), "wb") as docs_file:
+        for doc_id, entry in enumerate(entries):
+            terms = entry_terms(entry)
+            doc_len[doc_id] = sum(terms.values())
+            for term, tf in terms.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+            for name in FACETS:
+                values = facet_values[name]
+                facet_codes[name][doc_id] = values.setdefault(facet_key(entry.get(name)), len(values))
+            docs_file.write(json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n")
+            offsets[doc_id + 1] = docs_file.tell()
+
+    term_ids = np.asarray(term_ids, dtype=np.uint32)
+    order = np.argsort(term_ids, kind="stable")
+    df = np.bincount(term_ids, minlength=len(vocab))
+    starts = np.concatenate(([0], np.cumsum(df)[:-1])) if len(vocab) else np.zeros(0, dtype=np.int64)
+    np.save(os.path.join(segment_dir, "postings_docs.npy"), np.asarray(doc_ids, dtype=np.uint32)[order])
+    np.save(
+        os.path.join(segment_dir, "postings_tf.npy"),
+        np.minimum(np.asarray(tfs, dtype=np.uint32), np.iinfo(np.uint16).max).astype(np.uint16)[order],
+    )
+    np.save(os.path.join(segment_dir, "doc_len.npy"), doc_len)
+    np.save(os.path.join(segment_dir, "doc_offsets.npy"), offsets)
+    for name in FACETS:
+        np.save(os.path.join(segment_dir, f"facet_{name}.npy"), facet_codes[name])
+
+    with open(os.path.join(segment_dir, "vocab.json"), "w", encoding="utf-8") as vocab_file:
+        json.dump({term: [int(starts[i]), int(df[i])] for term, i in vocab.items()}, vocab_file)
+    meta = {
+        "version": KNOWLEDGE_INDEX_VERSION,
+        "docs": len(entries),
+        "total_len": int(doc_len.sum()),
+        # Display form of each facet value, in code order
+        "facets": {name: _facet_labels(entries, name, facet_values[name]) for name in FACETS},
+    }
+    with open(os.path.join(segment_dir, "meta.json"), "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file, ensure_ascii=False)
+
+
+def _facet_labels(entries, name, values):
+    labels = [""] * len(values)
+    for entry in entries:
+        value = entry.get(name)
+        code = values[facet_key(value)]
+        if not labels[code]:
+            labels[code] = value or ""
+    return labels
+
+
+class Segment:
+    def __init__(self, segment_dir):
+        self.path = segment_dir
+        with open(os.path.join(segment_dir, "meta.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        with open(os.path.join(segment_dir, "vocab.json"), encoding="utf-8") as vocab_file:
+            self.vocab = json.load(vocab_file)
+        self.docs = meta["docs"]
+        self.total_len = meta["total_len"]
+        self.facet_labels = meta["facets"]
+        self.facet_codes = {
+            name: {facet_key(label): code for code, label in enumerate(labels)}
+            for name, labels in self.facet_labels.items()
+        }
+
+        def load(name):
+            return np.load(os.path.join(segment_dir, name), mmap_mode="r")
+
+        # Empty arrays cannot be memory-mapped
+        if self.docs:
+            self.postings_docs = load("postings_docs.npy")
+            self.postings_tf = load("postings_tf.npy")
+            self.doc_len = load("doc_len.npy")
+            self.facets = {name: load(f"facet_{name}.npy") for name in FACETS}
+        self.doc_offsets = np.load(os.path.join(segment_dir, "doc_offsets.npy"))
+        self._docs_file = open(os.path.join(segment_dir, "docs.jsonl"), "rb")
+        self._docs_lock = threading.Lock()
+
+    def df(self, term):
+        posting = self.vocab.get(term)
+        return posting[1] if posting else 0
+
+    def entry(self, doc_id):
+        start, end = int(self.doc_offsets[doc_id]), int(self.doc_offsets[doc_id + 1])
+        with self._docs_lock:
+            self._docs_file.seek(start)
+            return json.loads(self._docs_file.read(end - start))
+
+    # Doc mask for the facet filters, None when nothing is filtered
+    def filter_mask(self, filters):
+        mask = None
+        for name, value in filters.items():
+            code = self.facet_codes[name].get(facet_key(value))
+            if code is None:
+                return np.zeros(self.docs, dtype=bool)
+            match = np.asarray(self.facets[name]) == code
+            mask = match if mask is None else mask & match
+        return mask
+
+    def score(self, terms, idfs, avgdl, mask):
+        doc_parts, score_parts = [], []
+        for term, idf in zip(terms, idfs):
+            posting = self.vocab.get(term)
+            if not posting:
+                continue
+            start, count = posting
+            docs = self.postings_docs[start : start + count]
+            tf = self.postings_tf[start : start + count].astype(np.float32)
+            doc_parts.append(docs)
+            score_parts.append(_bm25(tf, self.doc_len[docs], idf, avgdl))
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.bincount(np.concatenate(doc_parts), np.concatenate(score_parts), minlength=self.docs)
+        if mask is not None:
+            scores[~mask] = 0
+        doc_ids = np.flatnonzero(scores)
+        return doc_ids, scores[doc_ids]
+
+    def close(self):
+        self._docs_file.close()
+
+
+class KnowledgeBase:
+    def __init__(self, index_dir, segment, contributions_path, delta_entries):
+        self.index_dir = index_dir
+        self.contributions_path = contributions_path
+        self._segment = segment
+        self._delta = []
+        self._delta_postings = defaultdict(list)
+        self._delta_len = 0
+        self._lock = threading.Lock()
+        for entry in delta_entries:
+            self._add_to_delta(entry)
+
+    # Opens the index, rebuilding it when the source file changed or too many
+    # contributions are waiting in the delta.
+    @classmethod
+    def open(cls, index_dir=None, source=None, contributions=None, compact_threshold=None):
+        index_dir = KNOWLEDGE_INDEX_DIR if index_dir is None else index_dir
+        source = KNOWLEDGE_BASE_SOURCE if source is None else source
+        contributions = KNOWLEDGE_CONTRIBUTIONS if contributions is None else contributions
+        compact_threshold = KNOWLEDGE_COMPACT_THRESHOLD if compact_threshold is None else compact_threshold
+
+        current = _read_current(index_dir)
+        contributed = read_entries(contributions)
+        stale = (
+            current is None
+            or current.get("version") != KNOWLEDGE_INDEX_VERSION
+            or current.get("source_sha256") != file_sha256(source)
+            or current.get("contributions", 0) > len(contributed)
+            or len(contributed) - current.get("contributions", 0) > compact_threshold
+        )
+        if stale:
+            current = build_index(read_entries(source) + contributed, index_dir, file_sha256(source), len(contributed))
+        segment = Segment(os.path.join(index_dir, current["segment"]))
+        return cls(index_dir, segment, contributions, contributed[current["contributions"] :])
+
+    def __len__(self):
+        return self._segment.docs + len(self._delta)
+
+    def _add_to_delta(self, entry):
+        terms = entry_terms(entry)
+        for term in terms:
+            self._delta_postings[term].append(len(self._delta))
+        self._delta.append((entry, terms, sum(terms.values())))
+        self._delta_len += sum(terms.values())
+
+    # Appends to the contributions log first, so a restart replays it
+    def add_entry(self, entry):
+        entry = {name: entry.get(name, "") for name in ("title", "symptoms", "solution") + FACETS}
+        with self._lock:
+            append_entries(self.contributions_path, [entry])
+            self._add_to_delta(entry)
+            return self._segment.docs + len(self._delta) - 1
+
+    def entry(self, doc_id):
+        if doc_id < self._segment.docs:
+            return self._segment.entry(doc_id)
+        return self._delta[doc_id - self._segment.docs][0]
+
+    def facet_values(self, name):
+        with self._lock:
+            delta_values = [entry.get(name) for entry, _, _ in self._delta]
+        values = {}
+        for value in self._segment.facet_labels[name] + delta_values:
+            if value:
+                values.setdefault(facet_key(value), value)
+        return sorted(values.values(), key=facet_key)
+
+    def search(self, query, limit=10, **filters):
+        filters = {name: value for name, value in filters.items() if value}
+        unknown = set(filters) - set(FACETS)
+        if unknown:
+            raise ValueError(f"unknown facet(s): {', '.join(sorted(unknown))}")
+        with self._lock:
+            delta = list(self._delta)
+            delta_len = self._delta_len
+            terms = list(dict.fromkeys(analyze(query)))
+            delta_postings = {term: list(self._delta_postings.get(term, ())) for term in terms}
+        segment = self._segment
+        base = segment.docs
+
+        def delta_matches(indexes):
+            return [
+                base + index
+                for index in indexes
+                if all(facet_key(delta[index][0].get(name)) == facet_key(value) for name, value in filters.items())
+            ]
+
+        mask = segment.filter_mask(filters) if base else None
+        if not terms:
+            delta_ids = delta_matches(range(len(delta)))
+            # No query text: browse the filtered entries, newest first
+            base_ids = np.flatnonzero(mask) if mask is not None else np.arange(base)
+            doc_ids = delta_ids[::-1] + base_ids[::-1][: max(0, limit - len(delta_ids))].tolist()
+            return [SearchHit(doc_id, 0.0, self.entry(doc_id)) for doc_id in doc_ids[:limit]]
+
+        docs = base + len(delta)
+        avgdl = max(1.0, (segment.total_len + delta_len) / max(1, docs))
+        idfs = []
+        for term in terms:
+            df = segment.df(term) + len(delta_postings[term])
+            idfs.append(math.log(1 + (docs - df + 0.5) / (df + 0.5)))
+
+        if base:
+            doc_ids, scores = segment.score(terms, idfs, avgdl, mask)
+        else:
+            doc_ids, scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+        extra_ids, extra_scores = [], []
+        for doc_id in delta_matches(sorted(set().union(*delta_postings.values()))):
+            _, doc_terms, doc_len = delta[doc_id - base]
+            score = sum(
+                _bm25(doc_terms[term], doc_len, idf, avgdl) for term, idf in zip(terms, idfs) if term in doc_terms
+            )
+            if score:
+                extra_ids.append(doc_id)
+                extra_scores.append(score)
+        if extra_ids:
+            doc_ids = np.concatenate((doc_ids, extra_ids))
+            scores = np.concatenate((scores, extra_scores))
+
+        if len(doc_ids) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            doc_ids, scores = doc_ids[top], scores[top]
+        order = np.lexsort((doc_ids, -scores))
+        return [SearchHit(int(doc_ids[i]), float(scores[i]), self.entry(int(doc_ids[i]))) for i in order]
+
+    def close(self):
+        self._segment.close()
+
+
+def _read_current(index_dir):
+    try:
+        with open(os.path.join(index_dir, "current.json"), encoding="utf-8") as current_file:
+            return json.load(current_file)
+    except (OSError, ValueError):
+        return None
+
+
+# Builds a new segment next to the live one, then swaps current.json
+# atomically; readers of the old segment keep their memory maps.
+def build_index(entries, index_dir=None, source_sha256=None, contributions=0):
+    index_dir = KNOWLEDGE_INDEX_DIR if index_dir is None else index_dir
+    os.makedirs(index_dir, exist_ok=True)
+    previous = _read_current(index_dir)
+    generation = previous.get("generation", 0) + 1 if previous else 1
+    segment_name = f"segment-{generation:06d}"
+    segment_dir = os.path.join(index_dir, segment_name)
+    if os.path.exists(segment_dir):
+        shutil.rmtree(segment_dir)
+    write_segment(entries, segment_dir)
+
+    current = {
+        "version": KNOWLEDGE_INDEX_VERSION,
+        "generation": generation,
+        "segment": segment_name,
+        "source_sha256": source_sha256,
+        "contributions": contributions,
+    }
+    tmp_path = os.path.join(index_dir, "current.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as current_file:
+        json.dump(current, current_file)
+    os.replace(tmp_path, os.path.join(index_dir, "current.json"))
+
+    # Older generations are no longer referenced
+    for name in os.listdir(index_dir):
+        if name.startswith("segment-") and name != segment_name:
+            shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+    return current
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.knowledge_base", description=__doc__.splitlines()[0])
+    parser.add_argument("--index", default=KNOWLEDGE_INDEX_DIR, help="index directory (default: %(default)s)")
+    parser.add_argument("--source", default=KNOWLEDGE_BASE_SOURCE, help="JSONL solutions (default: %(default)s)")
+    parser.add_argument("--contributions", default=KNOWLEDGE_CONTRIBUTIONS, help="contributions log")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="compile the source and every contribution into a new segment")
+    search_parser = commands.add_parser("search", help="run one query")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+    for name in FACETS:
+        search_parser.add_argument(f"--{name.replace('_', '-')}", dest=name)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "build":
+        contributed = read_entries(args.contributions)
+        entries = read_entries(args.source) + contributed
+        build_index(entries, args.index, file_sha256(args.source), len(contributed))
+        print(f"{len(entries)} entries indexed in {time.perf_counter() - start:.2f}s")
+        return
+
+    knowledge_base = KnowledgeBase.open(args.index, args.source, args.contributions)
+    opened = time.perf_counter()
+    hits = knowledge_base.search(args.query, args.limit, **{name: getattr(args, name) for name in FACETS})
+    searched = time.perf_counter()
+    for hit in hits:
+        print(f"{hit.score:7.3f}  {hit.entry['title']}  [{hit.entry.get('vehicle', '')}]")
+    print(
+        f"{len(hits)} of {len(knowledge_base)} entries; open {(opened - start) * 1000:.1f} ms,"
+        f" search {(searched - opened) * 1000:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
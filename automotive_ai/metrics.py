@@ -0,0 +1,191 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Exporters, both off by default: a Prometheus text endpoint on
+# 127.0.0.1:METRICS_PORT/metrics, and a summary log line every
+# METRICS_LOG_SECONDS seconds.
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_LOG_SECONDS = float(os.environ.get("METRICS_LOG_SECONDS", "0"))
+
+METRICS_PREFIX = "automotive_ai"
+# Upper bounds (s) of the histogram buckets, from 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the +Inf overflow, not cumulative
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    # Estimated from the buckets, interpolating linearly inside one
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+# Span durations by name. One registry lives per process and one per
+# session; every span is observed into both.
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def summary(self):
+        with self._lock:
+            return {
+                name: {
+                    "count": histogram.count,
+                    "total_s": histogram.sum,
+                    "p50_s": histogram.quantile(0.5),
+                    "p95_s": histogram.quantile(0.95),
+                }
+                for name, histogram in sorted(self._histograms.items())
+            }
+
+    def render_prometheus(self, prefix=METRICS_PREFIX):
+        metric = f"{prefix}_span_seconds"
+        lines = [
+            f"# HELP {metric} Time spent in instrumented sections of a Streamlit rerun.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def log_line(self):
+        parts = [
+            f"{name} n={stats['count']} p50={stats['p50_s'] * 1000:.1f}ms p95={stats['p95_s'] * 1000:.1f}ms"
+            for name, stats in self.summary().items()
+        ]
+        return "; ".join(parts)
+
+
+# Spans of a single script run (kind "rerun") or fragment-only run (kind
+# "fragment"), kept in order for the sidebar breakdown.
+class RerunTrace:
+    def __init__(self, kind, registries):
+        self.kind = kind
+        self.spans = []
+        self.total = None
+        self._registries = registries
+        self._started = time.perf_counter()
+
+    @property
+    def finished(self):
+        return self.total is not None
+
+    def record(self, name, seconds):
+        self.spans.append((name, seconds))
+        for registry in self._registries:
+            registry.observe(name, seconds)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def finish(self):
+        if self.total is None:
+            self.total = time.perf_counter() - self._started
+            for registry in self._registries:
+                registry.observe(self.kind, self.total)
+
+
+def _metrics_handler(registry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def start_metrics_server(registry, port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), _metrics_handler(registry))
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
+
+
+def start_metrics_logger(registry, interval):
+    # Streamlit only configures its own loggers; make sure the line is printed
+    if not logger.hasHandlers():
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+
+    def run():
+        while True:
+            time.sleep(interval)
+            line = registry.log_line()
+            if line:
+                logger.info("rerun metrics: %s", line)
+
+    thread = threading.Thread(target=run, name="metrics-log", daemon=True)
+    thread.start()
+    return thread
+
+
+# Process-wide registry with whichever exporters are configured
+def create_process_metrics(port=None, log_seconds=None):
+    port = METRICS_PORT if port is None else port
+    log_seconds = METRICS_LOG_SECONDS if log_seconds is None else log_seconds
+    registry = MetricsRegistry()
+    if port:
+        try:
+            start_metrics_server(registry, port)
+        except OSError as exc:
+            logger.warning("metrics endpoint not started on port %s: %s", port, exc)
+    if log_seconds > 0:
+        start_metrics_logger(registry, log_seconds)
+    return registry
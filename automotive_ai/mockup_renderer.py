@@ -0,0 +1,765 @@
+"""Headless mockup renderer.
+
+Importing this module is cheap and has no side effects: Pillow and
+multiprocessing are loaded only when something is actually rendered, and
+Streamlit is never imported. Pre-bake every screen and locale with:
+
+    python -m automotive_ai.mockup_renderer [--out mockups] [--locale pt en]
+"""
+import os
+import base64
+import hashlib
+import json
+from functools import lru_cache, partial
+from io import BytesIO
+
+MOCKUP_DIR = "mockups"
+MOCKUP_MANIFEST_NAME = "manifest.json"
+# Bump when create_mockup changes how a spec is drawn, so every screen is rebuilt.
+MOCKUP_RENDERER_VERSION = 1
+# Dimensões padrão dos mockups
+MOCKUP_WIDTH, MOCKUP_HEIGHT = 670, 850
+# Worker processes for render_mockups; 0 or 1 keeps the serial path.
+MOCKUP_RENDER_WORKERS = int(os.environ.get("MOCKUP_RENDER_WORKERS", "0"))
+
+# Família usada por create_mockup e diretórios extras onde procurar a fonte
+MOCKUP_FONT_FAMILY = os.environ.get("MOCKUP_FONT_FAMILY", "arial")
+MOCKUP_FONT_PATH = [path for path in os.environ.get("MOCKUP_FONT_PATH", "").split(os.pathsep) if path]
+
+# Resolved once per family, so a host without the font pays for the failed
+# lookup a single time instead of on every screen.
+@lru_cache(maxsize=None)
+def _find_font_file(family):
+    filename = f"{family}.ttf"
+    for directory in MOCKUP_FONT_PATH:
+        candidate = os.path.join(directory, filename)
+        if os.path.isfile(candidate):
+            return candidate
+    # Pillow's own lookup (working directory and system font folders)
+    from PIL import ImageFont
+
+    try:
+        ImageFont.truetype(filename, 12)
+    except IOError:
+        return None
+    return filename
+
+# Registro de fontes do processo, por família e tamanho
+@lru_cache(maxsize=None)
+def get_font(family, size):
+    from PIL import ImageFont
+
+    font_file = _find_font_file(family)
+    if font_file is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_file, size)
+
+def set_font_search_path(paths):
+    MOCKUP_FONT_PATH[:] = list(paths)
+    _find_font_file.cache_clear()
+    get_font.cache_clear()
+    text_bbox.cache_clear()
+
+@lru_cache(maxsize=None)
+def _measure_draw():
+    from PIL import Image, ImageDraw
+
+    return ImageDraw.Draw(Image.new("RGB", (1, 1)))
+
+# Medidas de texto em cache por (fonte, texto)
+@lru_cache(maxsize=4096)
+def text_bbox(font, text):
+    return _measure_draw().textbbox((0, 0), text, font=font)
+
+# Cores de cada tema (temas desconhecidos usam o claro)
+MOCKUP_THEMES = {
+    "light": {"text_color": "#333333", "accent_color": "#2c7be5", "secondary_bg": "#e9ecef"},
+    "dark": {"text_color": "#FFFFFF", "accent_color": "#4287f5", "secondary_bg": "#2c3e50"},
+}
+
+def get_theme_colors(theme):
+    return MOCKUP_THEMES.get(theme, MOCKUP_THEMES["light"])
+
+# Fundo e cabeçalho pré-renderizados por (largura, altura, fundo, tema).
+# Nunca desenhar direto nesta imagem: create_mockup trabalha sobre uma cópia.
+@lru_cache(maxsize=32)
+def _base_layer(width, height, bg_color, theme):
+    from PIL import Image, ImageDraw
+
+    img = Image.new('RGB', (width, height), color=bg_color)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([(0, 0), (width, 60)], fill=get_theme_colors(theme)["accent_color"])
+    return img
+
+# Função para criar imagens de mockup
+def create_mockup(width, height, title, elements=None, bg_color="#f0f2f6", theme="light"):
+    from PIL import ImageDraw
+
+    # Copiar a camada base e desenhar só título e elementos por cima
+    img = _base_layer(width, height, bg_color, theme).copy()
+    draw = ImageDraw.Draw(img)
+    
+    colors = get_theme_colors(theme)
+    text_color = colors["text_color"]
+    accent_color = colors["accent_color"]
+    secondary_bg = colors["secondary_bg"]
+    
+    # Fontes do registro (fonte padrão do Pillow se a família não existir)
+    font_title = get_font(MOCKUP_FONT_FAMILY, 24)
+    font_normal = get_font(MOCKUP_FONT_FAMILY, 16)
+    font_small = get_font(MOCKUP_FONT_FAMILY, 12)
+    
+    # Adicionar título
+    draw.text((20, 15), title, fill="#FFFFFF", font=font_title)
+    
+    # Adicionar elementos personalizados se fornecidos
+    if elements:
+        for elem in elements:
+            elem_type = elem.get("type")
+            x, y = elem.get("position", (0, 0))
+            
+            if elem_type == "text":
+                draw.text((x, y), elem.get("content", ""), fill=elem.get("color", text_color), font=font_normal)
+            
+            elif elem_type == "rectangle":
+                width_rect = elem.get("width", 100)
+                height_rect = elem.get("height", 40)
+                draw.rectangle([(x, y), (x + width_rect, y + height_rect)], 
+                              fill=elem.get("fill", secondary_bg),
+                              outline=elem.get("outline", accent_color))
+            
+            elif elem_type == "button":
+                width_btn = elem.get("width", 120)
+                height_btn = elem.get("height", 40)
+                draw.rectangle([(x, y), (x + width_btn, y + height_btn)], 
+                              fill=elem.get("fill", accent_color),
+                              outline=elem.get("outline", "#1a5cb0"))
+                
+                # Texto do botão
+                btn_text = elem.get("text", "Botão")
+                # Calcular tamanho do texto (medida em cache)
+                bbox = text_bbox(font_normal, btn_text)
+                text_w = bbox[2] - bbox[0]
+                text_h = bbox[3] - bbox[1]
+                text_x = x + (width_btn - text_w) // 2
+                text_y = y + (height_btn - text_h) // 2
+                draw.text((text_x, text_y), btn_text, fill="#FFFFFF", font=font_normal)
+            
+            elif elem_type == "input":
+                width_input = elem.get("width", 200)
+                height_input = elem.get("height", 40)
+                draw.rectangle([(x, y), (x + width_input, y + height_input)], 
+                              fill="#FFFFFF",
+                              outline="#cccccc")
+                
+                # Placeholder
+                placeholder = elem.get("placeholder", "")
+                draw.text((x + 10, y + 10), placeholder, fill="#999999", font=font_normal)
+            
+            elif elem_type == "image_placeholder":
+                width_img = elem.get("width", 150)
+                height_img = elem.get("height", 150)
+                draw.rectangle([(x, y), (x + width_img, y + height_img)], 
+                              fill="#e0e0e0",
+                              outline="#cccccc")
+                
+                # Ícone de imagem
+                icon_text = "📷"
+                draw.text((x + width_img//2 - 10, y + height_img//2 - 10), icon_text, fill="#999999", font=font_title)
+            
+            elif elem_type == "card":
+                width_card = elem.get("width", 300)
+                height_card = elem.get("height", 200)
+                draw.rectangle([(x, y), (x + width_card, y + height_card)], 
+                              fill="#FFFFFF",
+                              outline="#dddddd")
+                
+                # Título do card
+                card_title = elem.get("title", "")
+                draw.text((x + 15, y + 15), card_title, fill=text_color, font=font_normal)
+                
+                # Conteúdo do card
+                card_content = elem.get("content", "")
+                draw.text((x + 15, y + 50), card_content, fill=text_color, font=font_small)
+            
+            elif elem_type == "menu":
+                menu_items = elem.get("items", [])
+                item_height = 40
+                menu_width = elem.get("width", 200)
+                
+                for i, item in enumerate(menu_items):
+                    item_y = y + (i * item_height)
+                    # Fundo do item
+                    draw.rectangle([(x, item_y), (x + menu_width, item_y + item_height)], 
+                                  fill=secondary_bg if i % 2 == 0 else "#FFFFFF")
+                    # Texto do item
+                    draw.text((x + 15, item_y + 10), item, fill=text_color, font=font_normal)
+    
+    return img
+
+# Função para converter imagem para base64 (para exibição no Streamlit)
+def get_image_base64(img):
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    img_str = base64.b64encode(buffered.getvalue()).decode()
+    return img_str
+
+# Função para salvar mockup
+def save_mockup(img, filename):
+    os.makedirs(MOCKUP_DIR, exist_ok=True)
+    filepath = os.path.join(MOCKUP_DIR, filename)
+    img.save(filepath)
+    return filepath
+
+# Especificação de uma tela: tudo o que create_mockup precisa para desenhá-la
+def mockup_spec(width, height, title, elements, bg_color="#f0f2f6", theme="light"):
+    return {
+        "width": width,
+        "height": height,
+        "title": title,
+        "elements": elements,
+        "bg_color": bg_color,
+        "theme": theme,
+    }
+
+def render_mockup_spec(spec):
+    return create_mockup(
+        spec["width"],
+        spec["height"],
+        spec["title"],
+        spec["elements"],
+        bg_color=spec["bg_color"],
+        theme=spec["theme"],
+    )
+
+# Hash de conteúdo da especificação (elementos, tamanho do canvas e tema)
+def mockup_spec_hash(spec):
+    payload = json.dumps(
+        {"renderer_version": MOCKUP_RENDERER_VERSION, "spec": spec},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_mockup_manifest(out_dir=MOCKUP_DIR):
+    try:
+        with open(os.path.join(out_dir, MOCKUP_MANIFEST_NAME), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+def save_mockup_manifest(manifest, out_dir=MOCKUP_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MOCKUP_MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+        manifest_file.write("\n")
+    os.replace(tmp_path, manifest_path)
+
+# Especificação (título e elementos) de cada tela em português
+def get_mockup_specs(width, height):
+    specs = {}
+    
+    # 1. Tela de Login
+    login_elements = [
+        {"type": "text", "position": (width//2-150, 100), "content": "Diagnóstico Inteligente Automotivo", "color": "#333333"},
+        {"type": "text", "position": (width//2-100, 150), "content": "Acesso ao Sistema", "color": "#666666"},
+        {"type": "text", "position": (width//2-150, 200), "content": "Usuário:", "color": "#333333"},
+        {"type": "input", "position": (width//2-150, 230), "width": 300, "placeholder": "Digite seu nome de usuário"},
+        {"type": "text", "position": (width//2-150, 290), "content": "Senha:", "color": "#333333"},
+        {"type": "input", "position": (width//2-150, 320), "width": 300, "placeholder": "Digite sua senha"},
+        {"type": "button", "position": (width//2-150, 390), "width": 300, "text": "Entrar"},
+        {"type": "text", "position": (width//2-100, 450), "content": "Esqueceu sua senha?", "color": "#2c7be5"},
+    ]
+    specs["login"] = mockup_spec(width, height, "Login - IA para Eletrônica Automotiva", login_elements)
+    
+    # 2. Tela de Seleção de Veículo
+    vehicle_elements = [
+        {"type": "text", "position": (20, 80), "content": "Selecione o Veículo", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Marca:", "color": "#666666"},
+        {"type": "input", "position": (20, 150), "width": 300, "placeholder": "Selecione a marca"},
+        {"type": "text", "position": (350, 120), "content": "Modelo:", "color": "#666666"},
+        {"type": "input", "position": (350, 150), "width": 300, "placeholder": "Selecione o modelo"},
+        {"type": "text", "position": (20, 210), "content": "Ano:", "color": "#666666"},
+        {"type": "input", "position": (20, 240), "width": 300, "placeholder": "Selecione o ano"},
+        {"type": "text", "position": (350, 210), "content": "Motor:", "color": "#666666"},
+        {"type": "input", "position": (350, 240), "width": 300, "placeholder": "Selecione o motor"},
+        {"type": "text", "position": (20, 300), "content": "Ou insira o código do chassi:", "color": "#666666"},
+        {"type": "input", "position": (20, 330), "width": 630, "placeholder": "Digite o código do chassi"},
+        {"type": "button", "position": (530, 390), "width": 120, "text": "Continuar"},
+        {"type": "text", "position": (20, 390), "content": "Veículos recentes:", "color": "#333333"},
+        {"type": "card", "position": (20, 430), "width": 200, "height": 100, "title": "Fiat Uno 2019", "content": "Motor 1.0 Fire\nÚltimo acesso: 25/05/2025"},
+        {"type": "card", "position": (240, 430), "width": 200, "height": 100, "title": "VW Gol 2018", "content": "Motor 1.6 MSI\nÚltimo acesso: 20/05/2025"},
+        {"type": "card", "position": (460, 430), "width": 200, "height": 100, "title": "Toyota Corolla 2020", "content": "Motor 2.0 Flex\nÚltimo acesso: 15/05/2025"},
+    ]
+    specs["vehicle_selection"] = mockup_spec(width, height, "Seleção de Veículo", vehicle_elements)
+    
+    # 3. Interface de Diagnóstico
+    diagnostic_elements = [
+        {"type": "text", "position": (20, 80), "content": "Diagnóstico Guiado - VW Gol 2018 (Motor 1.6 MSI)", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Problema relatado: Falha na partida", "color": "#666666"},
+        {"type": "text", "position": (20, 160), "content": "Passo 1 de 5: Verificação da bateria", "color": "#333333"},
+        {"type": "text", "position": (20, 200), "content": "Realize a medição da tensão da bateria com o veículo desligado:", "color": "#666666"},
+        {"type": "input", "position": (20, 230), "width": 200, "placeholder": "Digite a tensão (V)"},
+        {"type": "button", "position": (240, 230), "width": 120, "text": "Confirmar"},
+        {"type": "text", "position": (20, 280), "content": "Histórico de verificações:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 310), "width": 630, "height": 150},
+        {"type": "text", "position": (30, 320), "content": "• Tensão da bateria: 12.3V (Dentro do esperado: 12.0V - 12.8V)", "color": "#333333"},
+        {"type": "text", "position": (30, 350), "content": "• Teste de carga da bateria: Aprovado", "color": "#333333"},
+        {"type": "text", "position": (30, 380), "content": "• Verificação visual dos cabos: Sem oxidação", "color": "#333333"},
+        {"type": "text", "position": (30, 410), "content": "• Teste do motor de arranque: Pendente", "color": "#999999"},
+        {"type": "text", "position": (20, 480), "content": "Próxima verificação recomendada:", "color": "#333333"},
+        {"type": "card", "position": (20, 510), "width": 630, "height": 80, "title": "Verificar tensão nos terminais do motor de arranque durante a tentativa de partida", 
+         "content": "Conecte o multímetro aos terminais e peça para um auxiliar tentar dar a partida. Registre a tensão."},
+        {"type": "button", "position": (530, 610), "width": 120, "text": "Próximo Passo"},
+        {"type": "button", "position": (390, 610), "width": 120, "text": "Sugerir Solução"},
+    ]
+    specs["diagnostic"] = mockup_spec(width, height, "Diagnóstico Guiado", diagnostic_elements)
+    
+    # 4. Visualização de Resultados
+    results_elements = [
+        {"type": "text", "position": (20, 80), "content": "Resultados do Diagnóstico - VW Gol 2018 (Motor 1.6 MSI)", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Problema identificado: Falha no relé de partida", "color": "#2c7be5"},
+        {"type": "text", "position": (20, 160), "content": "Resumo das verificações:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 190), "width": 630, "height": 180},
+        {"type": "text", "position": (30, 200), "content": "• Tensão da bateria: 12.3V (Normal)", "color": "#333333"},
+        {"type": "text", "position": (30, 230), "content": "• Teste de carga da bateria: Aprovado", "color": "#333333"},
+        {"type": "text", "position": (30, 260), "content": "• Verificação visual dos cabos: Sem oxidação", "color": "#333333"},
+        {"type": "text", "position": (30, 290), "content": "• Tensão nos terminais do motor de arranque: 0.3V (Abaixo do esperado: >10V)", "color": "#ff0000"},
+        {"type": "text", "position": (30, 320), "content": "• Teste do relé de partida: Falha detectada", "color": "#ff0000"},
+        {"type": "text", "position": (30, 350), "content": "• Verificação do chicote elétrico: Sem danos visíveis", "color": "#333333"},
+        {"type": "text", "position": (20, 390), "content": "Solução recomendada:", "color": "#333333"},
+        {"type": "card", "position": (20, 420), "width": 630, "height": 100, "title": "Substituição do relé de partida", 
+         "content": "O relé de partida apresenta falha e não está enviando corrente suficiente ao motor de arranque.\nLocalização: Caixa de fusíveis principal, posição R7. Código da peça: 5U0 951 253 A"},
+        {"type": "text", "position": (20, 540), "content": "Esquema elétrico relacionado:", "color": "#333333"},
+        {"type": "image_placeholder", "position": (20, 570), "width": 630, "height": 200},
+        {"type": "button", "position": (530, 790), "width": 120, "text": "Finalizar"},
+        {"type": "button", "position": (390, 790), "width": 120, "text": "Imprimir"},
+    ]
+    specs["results"] = mockup_spec(width, height, "Resultados do Diagnóstico", results_elements)
+    
+    # 5. Interface de Upload/Captura de Imagem
+    upload_elements = [
+        {"type": "text", "position": (20, 80), "content": "Interpretação Visual - VW Gol 2018", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Selecione o tipo de imagem:", "color": "#666666"},
+        {"type": "button", "position": (20, 150), "width": 150, "text": "Módulo ECU"},
+        {"type": "button", "position": (190, 150), "width": 150, "text": "Etiqueta"},
+        {"type": "button", "position": (360, 150), "width": 150, "text": "Componente"},
+        {"type": "button", "position": (530, 150), "width": 150, "text": "Esquema"},
+        {"type": "text", "position": (20, 210), "content": "Envie ou capture a imagem:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 240), "width": 630, "height": 300},
+        {"type": "image_placeholder", "position": (235, 290), "width": 200, "height": 200},
+        {"type": "button", "position": (20, 560), "width": 200, "text": "Carregar Imagem"},
+        {"type": "button", "position": (240, 560), "width": 200, "text": "Usar Câmera"},
+        {"type": "button", "position": (460, 560), "width": 190, "text": "Analisar Imagem"},
+        {"type": "text", "position": (20, 610), "content": "Dicas:", "color": "#333333"},
+        {"type": "text", "position": (20, 640), "content": "• Certifique-se de que a imagem está bem iluminada e focada", "color": "#666666"},
+        {"type": "text", "position": (20, 670), "content": "• Evite reflexos e sombras sobre o componente", "color": "#666666"},
+        {"type": "text", "position": (20, 700), "content": "• Para etiquetas, aproxime o máximo possível mantendo a legibilidade", "color": "#666666"},
+    ]
+    specs["upload"] = mockup_spec(width, height, "Upload/Captura de Imagem", upload_elements)
+    
+    # 6. Reconhecimento de Componentes
+    recognition_elements = [
+        {"type": "text", "position": (20, 80), "content": "Reconhecimento de Componentes - Módulo ECU", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Componentes identificados:", "color": "#666666"},
+        {"type": "image_placeholder", "position": (20, 150), "width": 300, "height": 300},
+        {"type": "rectangle", "position": (340, 150), "width": 310, "height": 300},
+        {"type": "text", "position": (350, 160), "content": "Informações do Componente", "color": "#333333"},
+        {"type": "text", "position": (350, 190), "content": "Tipo: Módulo de Controle do Motor (ECU)", "color": "#666666"},
+        {"type": "text", "position": (350, 220), "content": "Fabricante: Bosch", "color": "#666666"},
+        {"type": "text", "position": (350, 250), "content": "Número de Série: 032 906 032 BF", "color": "#666666"},
+        {"type": "text", "position": (350, 280), "content": "Aplicação: VW Gol 1.6 MSI (2017-2019)", "color": "#666666"},
+        {"type": "text", "position": (350, 310), "content": "Compatibilidade: Original", "color": "#666666"},
+        {"type": "text", "position": (350, 340), "content": "Status: Componente identificado com sucesso", "color": "#2c7be5"},
+        {"type": "button", "position": (350, 380), "width": 300, "text": "Ver Esquema Elétrico"},
+        {"type": "text", "position": (20, 470), "content": "Histórico de diagnósticos deste componente:", "color": "#333333"},
+        {"type": "card", "position": (20, 500), "width": 300, "height": 80, "title": "Falha P0120", 
+         "content": "Sensor de posição do acelerador - Circuito aberto\nFrequência: Alta (23 casos registrados)"},
+        {"type": "card", "position": (340, 500), "width": 300, "height": 80, "title": "Falha P0322", 
+         "content": "Sensor de rotação - Sem sinal\nFrequência: Média (12 casos registrados)"},
+        {"type": "card", "position": (20, 600), "width": 300, "height": 80, "title": "Falha P0505", 
+         "content": "Sistema de controle de marcha lenta\nFrequência: Baixa (5 casos registrados)"},
+        {"type": "card", "position": (340, 600), "width": 300, "height": 80, "title": "Falha P0130", 
+         "content": "Sensor de oxigênio - Circuito defeituoso\nFrequência: Baixa (3 casos registrados)"},
+        {"type": "button", "position": (530, 700), "width": 120, "text": "Exportar Dados"},
+    ]
+    specs["recognition"] = mockup_spec(width, height, "Reconhecimento de Componentes", recognition_elements)
+    
+    # 7. Visualização de Esquemas Elétricos
+    schematic_elements = [
+        {"type": "text", "position": (20, 80), "content": "Esquema Elétrico - Módulo ECU VW Gol 1.6 MSI", "color": "#333333"},
+        {"type": "image_placeholder", "position": (20, 120), "width": 630, "height": 400},
+        {"type": "text", "position": (20, 540), "content": "Legenda de Componentes:", "color": "#333333"},
+        {"type": "text", "position": (20, 570), "content": "1. Módulo ECU (032 906 032 BF)", "color": "#666666"},
+        {"type": "text", "position": (20, 600), "content": "2. Sensor de posição do acelerador (G79)", "color": "#666666"},
+        {"type": "text", "position": (20, 630), "content": "3. Sensor de rotação do motor (G28)", "color": "#666666"},
+        {"type": "text", "position": (20, 660), "content": "4. Sensor de oxigênio pré-catalisador (G39)", "color": "#666666"},
+        {"type": "text", "position": (350, 570), "content": "5. Válvula EGR (N18)", "color": "#666666"},
+        {"type": "text", "position": (350, 600), "content": "6. Bobina de ignição (N70)", "color": "#666666"},
+        {"type": "text", "position": (350, 630), "content": "7. Injetores de combustível (N30-N33)", "color": "#666666"},
+        {"type": "text", "position": (350, 660), "content": "8. Relé da bomba de combustível (J17)", "color": "#666666"},
+        {"type": "button", "position": (20, 700), "width": 150, "text": "Ampliar"},
+        {"type": "button", "position": (190, 700), "width": 150, "text": "Imprimir"},
+        {"type": "button", "position": (360, 700), "width": 150, "text": "Salvar PDF"},
+        {"type": "button", "position": (530, 700), "width": 120, "text": "Voltar"},
+    ]
+    specs["schematic"] = mockup_spec(width, height, "Esquema Elétrico", schematic_elements)
+    
+    # 8. Dashboard Principal
+    dashboard_elements = [
+        {"type": "text", "position": (20, 80), "content": "Dashboard - Visão Geral", "color": "#333333"},
+        {"type": "card", "position": (20, 120), "width": 200, "height": 100, "title": "Diagnósticos Realizados", "content": "Total: 157\nEste mês: 23\nHoje: 3"},
+        {"type": "card", "position": (240, 120), "width": 200, "height": 100, "title": "Taxa de Sucesso", "content": "Geral: 92%\nEste mês: 95%\nComponentes: 89%"},
+        {"type": "card", "position": (460, 120), "width": 200, "height": 100, "title": "Tempo Médio", "content": "Diagnóstico: 12 min\nInterpretação: 3 min\nTotal: 15 min"},
+        {"type": "text", "position": (20, 240), "content": "Diagnósticos Recentes:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 270), "width": 630, "height": 150},
+        {"type": "text", "position": (30, 280), "content": "Data       | Veículo           | Problema                  | Solução                  | Mecânico", "color": "#333333"},
+        {"type": "text", "position": (30, 310), "content": "28/05/2025 | VW Gol 2018      | Falha na partida          | Substituição de relé     | Carlos Silva", "color": "#333333"},
+        {"type": "text", "position": (30, 340), "content": "27/05/2025 | Fiat Uno 2019    | Luz de injeção acesa      | Sensor MAP substituído   | Maria Oliveira", "color": "#333333"},
+        {"type": "text", "position": (30, 370), "content": "27/05/2025 | Toyota Corolla 20| Consumo elevado           | Limpeza de bicos         | João Pereira", "color": "#333333"},
+        {"type": "text", "position": (30, 400), "content": "26/05/2025 | Honda Civic 2021 | Ar condicionado sem frio  | Recarga de gás           | Carlos Silva", "color": "#333333"},
+        {"type": "text", "position": (20, 440), "content": "Problemas Mais Frequentes:", "color": "#333333"},
+        {"type": "image_placeholder", "position": (20, 470), "width": 300, "height": 200},
+        {"type": "text", "position": (340, 440), "content": "Componentes Mais Substituídos:", "color": "#333333"},
+        {"type": "image_placeholder", "position": (340, 470), "width": 300, "height": 200},
+        {"type": "text", "position": (20, 690), "content": "Base de Conhecimento:", "color": "#333333"},
+        {"type": "button", "position": (200, 690), "width": 150, "text": "Acessar"},
+        {"type": "text", "position": (370, 690), "content": "Relatórios:", "color": "#333333"},
+        {"type": "button", "position": (470, 690), "width": 180, "text": "Gerar Relatório"},
+    ]
+    specs["dashboard"] = mockup_spec(width, height, "Dashboard Principal", dashboard_elements)
+    
+    # 9. Base de Conhecimento
+    knowledge_elements = [
+        {"type": "text", "position": (20, 80), "content": "Base de Conhecimento", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Pesquisar:", "color": "#666666"},
+        {"type": "input", "position": (100, 120), "width": 450, "placeholder": "Digite o problema, componente ou modelo de veículo"},
+        {"type": "button", "position": (570, 120), "width": 80, "text": "Buscar"},
+        {"type": "text", "position": (20, 170), "content": "Filtrar por:", "color": "#666666"},
+        {"type": "button", "position": (100, 170), "width": 100, "text": "Todos"},
+        {"type": "button", "position": (210, 170), "width": 100, "text": "Elétricos"},
+        {"type": "button", "position": (320, 170), "width": 100, "text": "Mecânicos"},
+        {"type": "button", "position": (430, 170), "width": 100, "text": "Sensores"},
+        {"type": "button", "position": (540, 170), "width": 110, "text": "Injeção"},
+        {"type": "text", "position": (20, 220), "content": "Soluções Populares:", "color": "#333333"},
+        {"type": "card", "position": (20, 250), "width": 630, "height": 100, "title": "Falha P0120 - Sensor de posição do acelerador", 
+         "content": "Sintomas: Marcha lenta irregular, aceleração instável, luz de injeção acesa.\nSolução: Verificar conexões do sensor TPS, medir resistência (deve estar entre 0.5-4.5 kΩ), substituir se necessário."},
+        {"type": "card", "position": (20, 370), "width": 630, "height": 100, "title": "Falha na Partida - Relé de Partida", 
+         "content": "Sintomas: Motor de arranque não gira, sem ruído de partida, luzes do painel funcionam normalmente.\nSolução: Testar tensão nos terminais do motor de arranque, verificar relé na caixa de fusíveis, substituir relé."},
+        {"type": "card", "position": (20, 490), "width": 630, "height": 100, "title": "Ar Condicionado sem Refrigeração", 
+         "content": "Sintomas: Ventilador funciona mas ar não resfria, compressor não liga.\nSolução: Verificar pressão do gás, testar sensor de pressão, verificar relé do compressor e embreagem."},
+        {"type": "text", "position": (20, 610), "content": "Contribuir com Conhecimento:", "color": "#333333"},
+        {"type": "button", "position": (250, 610), "width": 200, "text": "Adicionar Nova Solução"},
+        {"type": "text", "position": (20, 660), "content": "Estatísticas da Base:", "color": "#666666"},
+        {"type": "text", "position": (20, 690), "content": "Total de soluções: 1.247 | Contribuições este mês: 37 | Soluções verificadas: 89%", "color": "#666666"},
+    ]
+    specs["knowledge"] = mockup_spec(width, height, "Base de Conhecimento", knowledge_elements)
+    
+    return specs
+
+# Renderiza uma especificação e devolve o PNG codificado
+def render_mockup_png(spec, optimize=False):
+    buffered = BytesIO()
+    render_mockup_spec(spec).save(buffered, format="PNG", optimize=optimize)
+    return buffered.getvalue()
+
+# Renders independent screens across a process pool; only PNG bytes cross
+# the process boundary. workers <= 1 renders serially in this process.
+def render_mockups(specs, workers=None, optimize=False):
+    if workers is None:
+        workers = MOCKUP_RENDER_WORKERS
+    names = list(specs)
+    render = partial(render_mockup_png, optimize=optimize)
+    if workers <= 1 or len(names) <= 1:
+        return {name: render(specs[name]) for name in names}
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(names))) as pool:
+        return dict(zip(names, pool.map(render, [specs[name] for name in names])))
+
+# Especificação das telas em inglês (mesmo layout, textos traduzidos)
+def get_mockup_specs_en(width, height):
+    specs = {}
+
+    # 1. Login Screen
+    login_elements_en = [
+        {"type": "text", "position": (width//2-150, 100), "content": "Smart Automotive Diagnosis", "color": "#333333"},
+        {"type": "text", "position": (width//2-90, 150), "content": "System Access", "color": "#666666"},
+        {"type": "text", "position": (width//2-150, 200), "content": "User:", "color": "#333333"},
+        {"type": "input", "position": (width//2-150, 230), "width": 300, "placeholder": "Enter your username"},
+        {"type": "text", "position": (width//2-150, 290), "content": "Password:", "color": "#333333"},
+        {"type": "input", "position": (width//2-150, 320), "width": 300, "placeholder": "Enter your password"},
+        {"type": "button", "position": (width//2-150, 390), "width": 300, "text": "Sign In"},
+        {"type": "text", "position": (width//2-100, 450), "content": "Forgot your password?", "color": "#2c7be5"},
+    ]
+    specs["login"] = mockup_spec(width, height, "Login - AI for Automotive Electronics", login_elements_en)
+
+    # 2. Vehicle Selection
+    vehicle_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Select Vehicle", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Make:", "color": "#666666"},
+        {"type": "input", "position": (20, 150), "width": 300, "placeholder": "Select make"},
+        {"type": "text", "position": (350, 120), "content": "Model:", "color": "#666666"},
+        {"type": "input", "position": (350, 150), "width": 300, "placeholder": "Select model"},
+        {"type": "text", "position": (20, 210), "content": "Year:", "color": "#666666"},
+        {"type": "input", "position": (20, 240), "width": 300, "placeholder": "Select year"},
+        {"type": "text", "position": (350, 210), "content": "Engine:", "color": "#666666"},
+        {"type": "input", "position": (350, 240), "width": 300, "placeholder": "Select engine"},
+        {"type": "text", "position": (20, 300), "content": "Or enter chassis code:", "color": "#666666"},
+        {"type": "input", "position": (20, 330), "width": 630, "placeholder": "Enter chassis code"},
+        {"type": "button", "position": (530, 390), "width": 120, "text": "Continue"},
+        {"type": "text", "position": (20, 390), "content": "Recent vehicles:", "color": "#333333"},
+        {"type": "card", "position": (20, 430), "width": 200, "height": 100, "title": "Fiat Uno 2019", "content": "1.0 Fire Engine\nLast access: 05/25/2025"},
+        {"type": "card", "position": (240, 430), "width": 200, "height": 100, "title": "VW Gol 2018", "content": "1.6 MSI Engine\nLast access: 05/20/2025"},
+        {"type": "card", "position": (460, 430), "width": 200, "height": 100, "title": "Toyota Corolla 2020", "content": "2.0 Flex Engine\nLast access: 05/15/2025"},
+    ]
+    specs["vehicle_selection"] = mockup_spec(width, height, "Vehicle Selection", vehicle_elements_en)
+
+    # 3. Guided Diagnosis
+    diagnostic_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Guided Diagnosis - VW Gol 2018 (1.6 MSI Engine)", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Reported issue: Starting failure", "color": "#666666"},
+        {"type": "text", "position": (20, 160), "content": "Step 1 of 5: Battery check", "color": "#333333"},
+        {"type": "text", "position": (20, 200), "content": "Measure battery voltage with the vehicle turned off:", "color": "#666666"},
+        {"type": "input", "position": (20, 230), "width": 200, "placeholder": "Enter voltage (V)"},
+        {"type": "button", "position": (240, 230), "width": 120, "text": "Confirm"},
+        {"type": "text", "position": (20, 280), "content": "Verification history:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 310), "width": 630, "height": 150},
+        {"type": "text", "position": (30, 320), "content": "- Battery voltage: 12.3V (Expected: 12.0V - 12.8V)", "color": "#333333"},
+        {"type": "text", "position": (30, 350), "content": "- Battery load test: Passed", "color": "#333333"},
+        {"type": "text", "position": (30, 380), "content": "- Visual cable check: No oxidation", "color": "#333333"},
+        {"type": "text", "position": (30, 410), "content": "- Starter motor test: Pending", "color": "#999999"},
+        {"type": "text", "position": (20, 480), "content": "Recommended next check:", "color": "#333333"},
+        {"type": "card", "position": (20, 510), "width": 630, "height": 80, "title": "Measure voltage at starter terminals during crank attempt",
+         "content": "Connect the multimeter to starter terminals and ask an assistant to crank the engine. Record the voltage."},
+        {"type": "button", "position": (530, 610), "width": 120, "text": "Next Step"},
+        {"type": "button", "position": (390, 610), "width": 120, "text": "Suggest Fix"},
+    ]
+    specs["diagnostic"] = mockup_spec(width, height, "Guided Diagnosis", diagnostic_elements_en)
+
+    # 4. Results View
+    results_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Diagnostic Results - VW Gol 2018 (1.6 MSI Engine)", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Identified issue: Starter relay failure", "color": "#2c7be5"},
+        {"type": "text", "position": (20, 160), "content": "Verification summary:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 190), "width": 630, "height": 180},
+        {"type": "text", "position": (30, 200), "content": "- Battery voltage: 12.3V (Normal)", "color": "#333333"},
+        {"type": "text", "position": (30, 230), "content": "- Battery load test: Passed", "color": "#333333"},
+        {"type": "text", "position": (30, 260), "content": "- Visual cable check: No oxidation", "color": "#333333"},
+        {"type": "text", "position": (30, 290), "content": "- Starter terminal voltage: 0.3V (Below expected: >10V)", "color": "#ff0000"},
+        {"type": "text", "position": (30, 320), "content": "- Starter relay test: Failure detected", "color": "#ff0000"},
+        {"type": "text", "position": (30, 350), "content": "- Harness inspection: No visible damage", "color": "#333333"},
+        {"type": "text", "position": (20, 390), "content": "Recommended solution:", "color": "#333333"},
+        {"type": "card", "position": (20, 420), "width": 630, "height": 100, "title": "Starter relay replacement",
+         "content": "The relay is faulty and not sending enough current to the starter motor.\nLocation: Main fuse box, slot R7. Part number: 5U0 951 253 A"},
+        {"type": "text", "position": (20, 540), "content": "Related electrical schematic:", "color": "#333333"},
+        {"type": "image_placeholder", "position": (20, 570), "width": 630, "height": 200},
+        {"type": "button", "position": (530, 790), "width": 120, "text": "Finish"},
+        {"type": "button", "position": (390, 790), "width": 120, "text": "Print"},
+    ]
+    specs["results"] = mockup_spec(width, height, "Diagnostic Results", results_elements_en)
+
+    # 5. Upload/Capture
+    upload_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Visual Interpretation - VW Gol 2018", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Select image type:", "color": "#666666"},
+        {"type": "button", "position": (20, 150), "width": 150, "text": "ECU Module"},
+        {"type": "button", "position": (190, 150), "width": 150, "text": "Label"},
+        {"type": "button", "position": (360, 150), "width": 150, "text": "Component"},
+        {"type": "button", "position": (530, 150), "width": 150, "text": "Schematic"},
+        {"type": "text", "position": (20, 210), "content": "Upload or capture image:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 240), "width": 630, "height": 300},
+        {"type": "image_placeholder", "position": (235, 290), "width": 200, "height": 200},
+        {"type": "button", "position": (20, 560), "width": 200, "text": "Upload Image"},
+        {"type": "button", "position": (240, 560), "width": 200, "text": "Use Camera"},
+        {"type": "button", "position": (460, 560), "width": 190, "text": "Analyze Image"},
+        {"type": "text", "position": (20, 610), "content": "Tips:", "color": "#333333"},
+        {"type": "text", "position": (20, 640), "content": "- Make sure the image is well-lit and in focus", "color": "#666666"},
+        {"type": "text", "position": (20, 670), "content": "- Avoid reflections and shadows on the component", "color": "#666666"},
+        {"type": "text", "position": (20, 700), "content": "- For labels, get close while keeping text readable", "color": "#666666"},
+    ]
+    specs["upload"] = mockup_spec(width, height, "Image Upload/Capture", upload_elements_en)
+
+    # 6. Component Recognition
+    recognition_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Component Recognition - ECU Module", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Identified components:", "color": "#666666"},
+        {"type": "image_placeholder", "position": (20, 150), "width": 300, "height": 300},
+        {"type": "rectangle", "position": (340, 150), "width": 310, "height": 300},
+        {"type": "text", "position": (350, 160), "content": "Component Information", "color": "#333333"},
+        {"type": "text", "position": (350, 190), "content": "Type: Engine Control Unit (ECU)", "color": "#666666"},
+        {"type": "text", "position": (350, 220), "content": "Manufacturer: Bosch", "color": "#666666"},
+        {"type": "text", "position": (350, 250), "content": "Serial Number: 032 906 032 BF", "color": "#666666"},
+        {"type": "text", "position": (350, 280), "content": "Application: VW Gol 1.6 MSI (2017-2019)", "color": "#666666"},
+        {"type": "text", "position": (350, 310), "content": "Compatibility: Original", "color": "#666666"},
+        {"type": "text", "position": (350, 340), "content": "Status: Component successfully identified", "color": "#2c7be5"},
+        {"type": "button", "position": (350, 380), "width": 300, "text": "View Electrical Schematic"},
+        {"type": "text", "position": (20, 470), "content": "Diagnostic history for this component:", "color": "#333333"},
+        {"type": "card", "position": (20, 500), "width": 300, "height": 80, "title": "Fault P0120",
+         "content": "Throttle position sensor - Open circuit\nFrequency: High (23 recorded cases)"},
+        {"type": "card", "position": (340, 500), "width": 300, "height": 80, "title": "Fault P0322",
+         "content": "Engine speed sensor - No signal\nFrequency: Medium (12 recorded cases)"},
+        {"type": "card", "position": (20, 600), "width": 300, "height": 80, "title": "Fault P0505",
+         "content": "Idle control system\nFrequency: Low (5 recorded cases)"},
+        {"type": "card", "position": (340, 600), "width": 300, "height": 80, "title": "Fault P0130",
+         "content": "Oxygen sensor - Circuit malfunction\nFrequency: Low (3 recorded cases)"},
+        {"type": "button", "position": (530, 700), "width": 120, "text": "Export Data"},
+    ]
+    specs["recognition"] = mockup_spec(width, height, "Component Recognition", recognition_elements_en)
+
+    # 7. Electrical Schematic
+    schematic_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Electrical Schematic - VW Gol 1.6 MSI ECU Module", "color": "#333333"},
+        {"type": "image_placeholder", "position": (20, 120), "width": 630, "height": 400},
+        {"type": "text", "position": (20, 540), "content": "Component Legend:", "color": "#333333"},
+        {"type": "text", "position": (20, 570), "content": "1. ECU Module (032 906 032 BF)", "color": "#666666"},
+        {"type": "text", "position": (20, 600), "content": "2. Throttle position sensor (G79)", "color": "#666666"},
+        {"type": "text", "position": (20, 630), "content": "3. Engine speed sensor (G28)", "color": "#666666"},
+        {"type": "text", "position": (20, 660), "content": "4. Pre-catalyst oxygen sensor (G39)", "color": "#666666"},
+        {"type": "text", "position": (350, 570), "content": "5. EGR valve (N18)", "color": "#666666"},
+        {"type": "text", "position": (350, 600), "content": "6. Ignition coil (N70)", "color": "#666666"},
+        {"type": "text", "position": (350, 630), "content": "7. Fuel injectors (N30-N33)", "color": "#666666"},
+        {"type": "text", "position": (350, 660), "content": "8. Fuel pump relay (J17)", "color": "#666666"},
+        {"type": "button", "position": (20, 700), "width": 150, "text": "Zoom"},
+        {"type": "button", "position": (190, 700), "width": 150, "text": "Print"},
+        {"type": "button", "position": (360, 700), "width": 150, "text": "Save PDF"},
+        {"type": "button", "position": (530, 700), "width": 120, "text": "Back"},
+    ]
+    specs["schematic"] = mockup_spec(width, height, "Electrical Schematic", schematic_elements_en)
+
+    # 8. Dashboard
+    dashboard_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Dashboard - Overview", "color": "#333333"},
+        {"type": "card", "position": (20, 120), "width": 200, "height": 100, "title": "Completed Diagnoses", "content": "Total: 157\nThis month: 23\nToday: 3"},
+        {"type": "card", "position": (240, 120), "width": 200, "height": 100, "title": "Success Rate", "content": "Overall: 92%\nThis month: 95%\nComponents: 89%"},
+        {"type": "card", "position": (460, 120), "width": 200, "height": 100, "title": "Average Time", "content": "Diagnosis: 12 min\nInterpretation: 3 min\nTotal: 15 min"},
+        {"type": "text", "position": (20, 240), "content": "Recent Diagnoses:", "color": "#333333"},
+        {"type": "rectangle", "position": (20, 270), "width": 630, "height": 150},
+        {"type": "text", "position": (30, 280), "content": "Date       | Vehicle           | Issue                    | Fix                      | Mechanic", "color": "#333333"},
+        {"type": "text", "position": (30, 310), "content": "05/28/2025 | VW Gol 2018      | Starting failure         | Relay replacement        | Carlos Silva", "color": "#333333"},
+        {"type": "text", "position": (30, 340), "content": "05/27/2025 | Fiat Uno 2019    | Check engine light       | MAP sensor replaced      | Maria Oliveira", "color": "#333333"},
+        {"type": "text", "position": (30, 370), "content": "05/27/2025 | Toyota Corolla 20| High fuel consumption    | Injector cleaning        | Joao Pereira", "color": "#333333"},
+        {"type": "text", "position": (30, 400), "content": "05/26/2025 | Honda Civic 2021 | AC not cooling           | Refrigerant refill       | Carlos Silva", "color": "#333333"},
+        {"type": "text", "position": (20, 440), "content": "Most Frequent Issues:", "color": "#333333"},
+        {"type": "image_placeholder", "position": (20, 470), "width": 300, "height": 200},
+        {"type": "text", "position": (340, 440), "content": "Most Replaced Components:", "color": "#333333"},
+        {"type": "image_placeholder", "position": (340, 470), "width": 300, "height": 200},
+        {"type": "text", "position": (20, 690), "content": "Knowledge Base:", "color": "#333333"},
+        {"type": "button", "position": (200, 690), "width": 150, "text": "Access"},
+        {"type": "text", "position": (370, 690), "content": "Reports:", "color": "#333333"},
+        {"type": "button", "position": (470, 690), "width": 180, "text": "Generate Report"},
+    ]
+    specs["dashboard"] = mockup_spec(width, height, "Main Dashboard", dashboard_elements_en)
+
+    # 9. Knowledge Base
+    knowledge_elements_en = [
+        {"type": "text", "position": (20, 80), "content": "Knowledge Base", "color": "#333333"},
+        {"type": "text", "position": (20, 120), "content": "Search:", "color": "#666666"},
+        {"type": "input", "position": (100, 120), "width": 450, "placeholder": "Type issue, component, or vehicle model"},
+        {"type": "button", "position": (570, 120), "width": 80, "text": "Search"},
+        {"type": "text", "position": (20, 170), "content": "Filter by:", "color": "#666666"},
+        {"type": "button", "position": (100, 170), "width": 100, "text": "All"},
+        {"type": "button", "position": (210, 170), "width": 100, "text": "Electrical"},
+        {"type": "button", "position": (320, 170), "width": 100, "text": "Mechanical"},
+        {"type": "button", "position": (430, 170), "width": 100, "text": "Sensors"},
+        {"type": "button", "position": (540, 170), "width": 110, "text": "Injection"},
+        {"type": "text", "position": (20, 220), "content": "Popular Solutions:", "color": "#333333"},
+        {"type": "card", "position": (20, 250), "width": 630, "height": 100, "title": "Fault P0120 - Throttle position sensor",
+         "content": "Symptoms: Rough idle, unstable acceleration, check-engine light on.\nSolution: Check TPS connector, measure resistance (0.5-4.5 kOhm), replace if needed."},
+        {"type": "card", "position": (20, 370), "width": 630, "height": 100, "title": "Starting Failure - Starter Relay",
+         "content": "Symptoms: Starter does not crank, no start noise, dashboard lights normal.\nSolution: Measure starter terminal voltage, check relay in fuse box, replace relay."},
+        {"type": "card", "position": (20, 490), "width": 630, "height": 100, "title": "AC Without Cooling",
+         "content": "Symptoms: Blower works but air is not cold, compressor does not engage.\nSolution: Check refrigerant pressure, pressure sensor, compressor relay and clutch."},
+        {"type": "text", "position": (20, 610), "content": "Contribute Knowledge:", "color": "#333333"},
+        {"type": "button", "position": (250, 610), "width": 200, "text": "Add New Solution"},
+        {"type": "text", "position": (20, 660), "content": "Knowledge Base Stats:", "color": "#666666"},
+        {"type": "text", "position": (20, 690), "content": "Total solutions: 1,247 | Contributions this month: 37 | Verified solutions: 89%", "color": "#666666"},
+    ]
+    specs["knowledge"] = mockup_spec(width, height, "Knowledge Base", knowledge_elements_en)
+
+    return specs
+
+
+# Telas de cada idioma: subpasta dentro do diretório de saída e especificações
+MOCKUP_LOCALES = {
+    "pt": ("", get_mockup_specs),
+    "en": ("en", get_mockup_specs_en),
+}
+
+# Manifest key of a screen, e.g. "login.png" or "en/login.png"
+def mockup_key(locale, name):
+    subdir = MOCKUP_LOCALES[locale][0]
+    return f"{subdir}/{name}.png" if subdir else f"{name}.png"
+
+def get_locale_specs(locale):
+    return MOCKUP_LOCALES[locale][1](MOCKUP_WIDTH, MOCKUP_HEIGHT)
+
+# Lê os PNGs já gerados de um idioma
+def load_mockup_files(locale="pt", out_dir=MOCKUP_DIR):
+    mockups = {}
+    for name in get_locale_specs(locale):
+        with open(os.path.join(out_dir, mockup_key(locale, name)), "rb") as mockup_file:
+            mockups[name] = mockup_file.read()
+    return mockups
+
+# Função para criar e salvar os mockups (todos, ou apenas os nomes informados)
+def create_all_mockups(names=None, workers=None, locale="pt", out_dir=MOCKUP_DIR):
+    specs = get_locale_specs(locale)
+    if names is not None:
+        specs = {name: spec for name, spec in specs.items() if name in names}
+    mockups = {}
+    for name, png in render_mockups(specs, workers, optimize=True).items():
+        filepath = os.path.join(out_dir, mockup_key(locale, name))
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        with open(filepath, "wb") as mockup_file:
+            mockup_file.write(png)
+        mockups[name] = filepath
+    return mockups
+
+# Only screens whose file is missing or whose spec hash changed are re-rendered.
+# Returns the manifest keys that were rendered.
+def regenerate_stale_mockups(workers=None, locales=("pt",), out_dir=MOCKUP_DIR, force=False):
+    manifest = load_mockup_manifest(out_dir)
+    hashes = dict(manifest)
+    rendered = []
+    for locale in locales:
+        stale = []
+        for name, spec in get_locale_specs(locale).items():
+            key = mockup_key(locale, name)
+            hashes[key] = mockup_spec_hash(spec)
+            if force or manifest.get(key) != hashes[key] or not os.path.exists(os.path.join(out_dir, key)):
+                stale.append(name)
+        if stale:
+            create_all_mockups(stale, workers, locale, out_dir)
+            rendered.extend(mockup_key(locale, name) for name in stale)
+    if rendered or manifest != hashes:
+        save_mockup_manifest(hashes, out_dir)
+    return rendered
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        prog="python -m automotive_ai.mockup_renderer",
+        description="Render every mockup screen to disk, skipping screens the manifest marks as current.",
+    )
+    parser.add_argument("--out", default=MOCKUP_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--locale", nargs="+", choices=sorted(MOCKUP_LOCALES), default=list(MOCKUP_LOCALES))
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: MOCKUP_RENDER_WORKERS)")
+    parser.add_argument("--force", action="store_true", help="re-render screens even if they are current")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rendered = regenerate_stale_mockups(args.workers, args.locale, args.out, args.force)
+    for key in rendered:
+        print(os.path.join(args.out, key))
+    print(f"{len(rendered)} screen(s) rendered in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
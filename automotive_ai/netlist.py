@@ -0,0 +1,332 @@
+"""Schematic netlists compiled into CSR graphs with precomputed queries.
+
+data/netlists.json describes each vehicle circuit as components with pins
+(fuses, relays, connectors, splices, ground points, loads) and the nets
+joining those pins. Compiling a netlist lays out one graph node per pin
+and per net, stored as CSR arrays: pins conduct to their nets, and a
+component's pins conduct to each other only where the part passes current
+(fuse 1-2, relay contact 30-87, switch positions). Two tables are then
+filled once, so each query is a slice of an index array:
+
+- feed path: for every component, the parts on any simple path from the
+  battery positive to one of its pins, found with the block-cut tree of
+  the power side of the graph (ground nets removed), ordered from the
+  battery outwards;
+- ground groups: for every ground point, the components whose return
+  reaches it through wires, connectors and splices only.
+
+    python -m automotive_ai.netlist feed starter --vehicle "VW Gol"
+    python -m automotive_ai.netlist ground ecu
+"""
+import json
+import os
+import unicodedata
+from collections import deque
+
+import numpy as np
+
+NETLISTS = os.environ.get("NETLISTS", os.path.join("data", "netlists.json"))
+
+TYPES = ("battery", "fuse", "relay", "switch", "connector", "splice", "ground", "starter", "alternator",
+         "module", "motor", "lamp", "sensor", "load")
+# Parts current passes through on its way somewhere else
+PATH_TYPES = ("fuse", "relay", "switch", "connector", "splice")
+# Conducting pin pairs when a component does not list its own "through"
+_THROUGH = {"fuse": [["1", "2"]], "relay": [["30", "87"]]}
+# Wires, connectors and splices carry a return to its ground point
+_PASSIVE = ("connector", "splice")
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).split())
+
+
+def _csr(count, edges):
+    edges = np.unique(np.array(edges, dtype=np.int32).reshape(-1, 2), axis=0)
+    edges = np.concatenate([edges, edges[:, ::-1]])
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+    indptr = np.zeros(count + 1, dtype=np.int32)
+    np.cumsum(np.bincount(edges[:, 0], minlength=count), out=indptr[1:])
+    return indptr, np.ascontiguousarray(edges[:, 1])
+
+
+def _pack(rows):
+    indptr = np.zeros(len(rows) + 1, dtype=np.int32)
+    np.cumsum([len(row) for row in rows], out=indptr[1:])
+    indices = np.concatenate([np.asarray(row, dtype=np.int32) for row in rows]) if rows else np.zeros(0, dtype=np.int32)
+    return indptr, indices.astype(np.int32)
+
+
+class Netlist:
+    def __init__(self, source):
+        self.id = source["id"]
+        self.title = source["title"]
+        self.vehicles = [_fold(vehicle) for vehicle in source.get("vehicles", ["*"])]
+        self.component_ids = list(source["components"])
+        self.components = [dict(source["components"][key], id=key) for key in self.component_ids]
+        self._index = {key: index for index, key in enumerate(self.component_ids)}
+        self._roles = {}
+        self._type_masks = {}
+        for index, component in enumerate(self.components):
+            if component["type"] not in TYPES:
+                raise ValueError(f"{self.id}.{component['id']}: unknown type {component['type']!r}")
+            if "role" in component:
+                self._roles[component["role"]] = index
+        self.types = np.array([TYPES.index(component["type"]) for component in self.components], dtype=np.int8)
+
+        # Nodes: every pin, then every net
+        pin_ids = {}
+        pin_component = []
+        for index, component in enumerate(self.components):
+            for pin in component["pins"]:
+                pin_ids[f"{component['id']}.{pin}"] = len(pin_component)
+                pin_component.append(index)
+        self.pin_names = list(pin_ids)
+        self._pins = [[] for _ in self.components]
+        for pin, index in enumerate(pin_component):
+            self._pins[index].append(pin)
+        self.net_names = [net["name"] for net in source["nets"]]
+        pins = len(pin_component)
+        self.node_component = np.array(pin_component + [-1] * len(self.net_names), dtype=np.int32)
+
+        edges = []
+        for net_index, net in enumerate(source["nets"]):
+            for pin in net["pins"]:
+                if pin not in pin_ids:
+                    raise ValueError(f"{self.id}: net {net['name']!r} uses unknown pin {pin!r}")
+                edges.append((pin_ids[pin], pins + net_index))
+        for component in self.components:
+            for group in component.get("through", _THROUGH.get(component["type"], [])):
+                ends = [pin_ids[f"{component['id']}.{pin}"] for pin in group]
+                edges.extend((ends[0], end) for end in ends[1:])
+        self.indptr, self.indices = _csr(len(self.node_component), edges)
+
+        grounds = self._ground_groups()
+        self._compile_feeds(grounds)
+
+    def _neighbors(self, node):
+        return self.indices[self.indptr[node] : self.indptr[node + 1]].tolist()
+
+    # Per ground point, the nets and components its return reaches; the
+    # walk crosses nets, connectors and splices, not loads or other grounds
+    def _ground_groups(self):
+        ground_type = TYPES.index("ground")
+        passive = [TYPES.index(name) for name in _PASSIVE]
+        component = self.node_component.tolist()
+        ground_nets = set()
+        members = []
+        self.ground_ids = [index for index, kind in enumerate(self.types.tolist()) if kind == ground_type]
+        for ground in self.ground_ids:
+            starts = self._pins[ground]
+            seen = set(starts)
+            queue = deque(starts)
+            reached = set()
+            while queue:
+                node = queue.popleft()
+                owner = component[node]
+                if owner >= 0 and node not in starts and self.types[owner] not in passive:
+                    if owner != ground and self.types[owner] != ground_type:
+                        reached.add(owner)
+                    continue
+                if owner < 0:
+                    ground_nets.add(node)
+                elif owner != ground:
+                    reached.add(owner)
+                for neighbor in self._neighbors(node):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        queue.append(neighbor)
+            members.append(sorted(reached))
+        self._ground_indptr, self._ground_members = _pack(members)
+        by_component = [[] for _ in self.components]
+        for group, row in enumerate(members):
+            for member in row:
+                by_component[member].append(group)
+        self._component_grounds_indptr, self._component_grounds = _pack(by_component)
+        return ground_nets
+
+    # Tarjan's biconnected blocks from a virtual source joined to every
+    # battery positive; a node lies on some simple path from the source to
+    # a pin if and only if its block sits on the block-cut tree path
+    # between them, so each pin's feed set is its parent block's parts
+    # plus the feed set of that block's top vertex.
+    def _compile_feeds(self, ground_nets):
+        count = len(self.node_component)
+        source = count
+        component = self.node_component.tolist()
+        adjacency = [[neighbor for neighbor in self._neighbors(node) if neighbor not in ground_nets]
+                     if node not in ground_nets else [] for node in range(count)]
+        battery = TYPES.index("battery")
+        adjacency.append([node for node, name in enumerate(self.pin_names)
+                          if self.types[component[node]] == battery and name.endswith(".+")])
+
+        order = [-1] * (count + 1)
+        low = [0] * (count + 1)
+        depth = [-1] * (count + 1)
+        parent_block = [-1] * (count + 1)
+        block_top = []
+        block_parts = []
+        visit = [source]
+        order[source], depth[source] = 0, 0
+        stack = [(source, iter(adjacency[source]))]
+        edges = []
+        while stack:
+            node, neighbors = stack[-1]
+            for neighbor in neighbors:
+                if order[neighbor] < 0:
+                    order[neighbor] = low[neighbor] = len(visit)
+                    depth[neighbor] = depth[node] + 1
+                    visit.append(neighbor)
+                    edges.append((node, neighbor))
+                    stack.append((neighbor, iter(adjacency[neighbor])))
+                    break
+                if order[neighbor] < order[node] and (len(stack) < 2 or neighbor != stack[-2][0]):
+                    low[node] = min(low[node], order[neighbor])
+                    edges.append((node, neighbor))
+            else:
+                stack.pop()
+                if not stack:
+                    break
+                top = stack[-1][0]
+                low[top] = min(low[top], low[node])
+                if low[node] >= order[top]:
+                    block = len(block_top)
+                    nodes = set()
+                    while True:
+                        edge = edges.pop()
+                        nodes.update(edge)
+                        if edge == (top, node):
+                            break
+                    nodes.discard(top)
+                    for member in nodes:
+                        parent_block[member] = block
+                    block_top.append(top)
+                    block_parts.append(1 << component[top] if top < count and component[top] >= 0 else 0)
+                    for member in nodes:
+                        if component[member] >= 0:
+                            block_parts[block] |= 1 << component[member]
+
+        feed = [0] * (count + 1)
+        for node in visit[1:]:
+            block = parent_block[node]
+            feed[node] = block_parts[block] | feed[block_top[block]]
+        # Parts by their pins' nearest distance from the battery, the target last
+        distance = np.array([min([depth[pin] for pin in pins if depth[pin] >= 0], default=count) for pins in self._pins])
+        width = (len(self.components) + 7) // 8
+        rows = []
+        for index, pins in enumerate(self._pins):
+            parts = 0
+            for pin in pins:
+                parts |= feed[pin]
+            row = np.flatnonzero(np.unpackbits(np.frombuffer(parts.to_bytes(width, "little"), dtype=np.uint8), bitorder="little"))
+            rows.append(row[np.lexsort((row, distance[row], row == index))])
+        self._feed_indptr, self._feed = _pack(rows)
+
+    def component(self, key):
+        if key in self._index:
+            return self._index[key]
+        if key in self._roles:
+            return self._roles[key]
+        raise KeyError(key)
+
+    # Components from the battery to the target, both included; empty when
+    # the target has no feed
+    def feed_path(self, key, types=None):
+        index = self.component(key)
+        path = self._feed[self._feed_indptr[index] : self._feed_indptr[index + 1]]
+        if types is not None:
+            path = path[self._type_mask(types)[self.types[path]]]
+        return path.tolist()
+
+    def _type_mask(self, types):
+        types = tuple(types)
+        mask = self._type_masks.get(types)
+        if mask is None:
+            mask = np.zeros(len(TYPES), dtype=bool)
+            mask[[TYPES.index(name) for name in types]] = True
+            self._type_masks[types] = mask
+        return mask
+
+    def _ground_groups_of(self, index):
+        if self.types[index] == TYPES.index("ground"):
+            return [self.ground_ids.index(index)]
+        start, end = self._component_grounds_indptr[index : index + 2]
+        return self._component_grounds[start:end].tolist()
+
+    def grounds(self, key):
+        return [self.ground_ids[group] for group in self._ground_groups_of(self.component(key))]
+
+    # Components returning through the same ground point(s) as the given
+    # component, or through the given ground point
+    def shared_ground(self, key):
+        index = self.component(key)
+        rows = [self._ground_members[self._ground_indptr[group] : self._ground_indptr[group + 1]]
+                for group in self._ground_groups_of(index)]
+        if not rows:
+            return []
+        members = rows[0] if len(rows) == 1 else np.unique(np.concatenate(rows))
+        return members[members != index].tolist()
+
+    def describe(self, index, lang):
+        component = self.components[index]
+        return f"{component['id']}: {component['name'][lang]}"
+
+
+class NetlistLibrary:
+    def __init__(self, sources):
+        self.netlists = [Netlist(source) for source in sources]
+
+    @classmethod
+    def from_file(cls, path=None):
+        path = NETLISTS if path is None else path
+        with open(path, encoding="utf-8") as netlists_file:
+            return cls(json.load(netlists_file)["netlists"])
+
+    # Most specific netlist for the vehicle that has the component: make
+    # and model, then make, then any
+    def select(self, key, vehicle=None):
+        keys = ["*"]
+        if vehicle is not None:
+            keys = [_fold(f"{vehicle.make} {vehicle.model}"), _fold(vehicle.make), "*"]
+        for vehicle_key in keys:
+            for netlist in self.netlists:
+                if vehicle_key in netlist.vehicles and (key in netlist._index or key in netlist._roles):
+                    return netlist
+        raise KeyError(key)
+
+
+def main(argv=None):
+    import argparse
+    import time
+    from types import SimpleNamespace
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.netlist", description=__doc__.splitlines()[0])
+    parser.add_argument("query", choices=("feed", "ground"))
+    parser.add_argument("component", help="component id or role, e.g. K1, starter, ecu")
+    parser.add_argument("--vehicle", help='"make model", for vehicle-specific schematics')
+    parser.add_argument("--lang", choices=("en", "pt"), default="en")
+    args = parser.parse_args(argv)
+
+    library = NetlistLibrary.from_file()
+    vehicle = None
+    if args.vehicle:
+        make, _, model = args.vehicle.partition(" ")
+        vehicle = SimpleNamespace(make=make, model=model)
+    netlist = library.select(args.component, vehicle)
+    start = time.perf_counter()
+    if args.query == "feed":
+        result = netlist.feed_path(args.component)
+    else:
+        result = netlist.shared_ground(args.component)
+    elapsed = time.perf_counter() - start
+    print(netlist.title[args.lang])
+    if args.query == "ground":
+        print("ground: " + ", ".join(netlist.describe(index, args.lang) for index in netlist.grounds(args.component)))
+    for index in result:
+        print(f"  {netlist.describe(index, args.lang)}")
+    print(f"{elapsed * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Label and module photo preprocessing ahead of recognition.
+
+Runs on the decoded upload, all on NumPy arrays except for the grayscale
+conversion and box reductions, which Pillow does in C:
+
+- exposure: mean, spread, 1st/99th percentiles and clipped shadows and
+  highlights from one histogram of a small working copy;
+- crop: the band holding most of the working copy's edge energy, by rows
+  and by columns, which is where the label's print is;
+- sharpness: variance of the Laplacian of that crop, at up to
+  PREPROCESS_SHARPNESS_PIXELS;
+- skew: the angle, within +-PREPROCESS_MAX_SKEW degrees, whose projection
+  profile of the crop's edge points is sharpest;
+- contrast: tile-wise equalisation with a clip limit, interpolated between
+  tiles (CLAHE), on the straightened crop at the tensor's resolution.
+
+Captures that fail the quality gate are rejected with the reasons, before
+the recognizer sees them; accepted ones become a letterboxed float32
+tensor of PREPROCESS_TENSOR_SIZE squared, zero mean and unit variance.
+
+    python -m automotive_ai.preprocessing photo.jpg --save-crop crop.png
+"""
+import math
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image
+
+PREPROCESS_TENSOR_SIZE = int(os.environ.get("PREPROCESS_TENSOR_SIZE", "224"))
+# Working copy for exposure, crop and skew, and the budget for the label
+# crop the sharpness is measured on
+PREPROCESS_WORK_PIXELS = int(os.environ.get("PREPROCESS_WORK_PIXELS", "262144"))
+PREPROCESS_SHARPNESS_PIXELS = int(os.environ.get("PREPROCESS_SHARPNESS_PIXELS", "1000000"))
+PREPROCESS_MIN_SHARPNESS = float(os.environ.get("PREPROCESS_MIN_SHARPNESS", "25"))
+PREPROCESS_MAX_SKEW = float(os.environ.get("PREPROCESS_MAX_SKEW", "20"))
+
+BLURRY = "blurry"
+TOO_DARK = "too_dark"
+TOO_BRIGHT = "too_bright"
+LOW_CONTRAST = "low_contrast"
+NO_LABEL = "no_label"
+
+# Exposure limits on the 0-255 scale
+_DARK_MEAN, _BRIGHT_MEAN = 35, 225
+_MAX_CLIPPED = 0.4
+_MIN_RANGE = 40
+# Share of edge energy the crop keeps, and its margin
+_CROP_ENERGY = 0.9
+_CROP_MARGIN = 0.04
+# Smallest share of working pixels that must be edges for a label to be there
+_MIN_EDGE_SHARE = 0.004
+# Resolution of the skew search, in degrees
+_SKEW_STEP = 0.25
+_CLAHE_GRID = 8
+_CLAHE_CLIP = 2.5
+
+
+@dataclass
+class Preprocessed:
+    accepted: bool
+    reasons: list
+    sharpness: float
+    exposure: dict
+    # Degrees the label's print is rotated counter-clockwise
+    skew: float
+    # (left, top, right, bottom) in the input image's pixels
+    crop: tuple
+    # float32 (1, size, size); None when rejected
+    tensor: np.ndarray = None
+    timings: dict = field(default_factory=dict)
+
+
+def to_gray(image):
+    if image.mode in ("I;16", "I", "F"):
+        return Image.fromarray((np.asarray(image, dtype=np.float32) / (257 if image.mode == "I;16" else 1)).clip(0, 255).astype(np.uint8))
+    return image.convert("L")
+
+
+# Integer factor for Image.reduce that brings size under max_pixels
+def _reduce_factor(size, max_pixels):
+    return max(1, math.ceil(math.sqrt(size[0] * size[1] / max_pixels)))
+
+
+def laplacian_variance(gray):
+    pixels = np.asarray(gray, dtype=np.int16)
+    laplacian = pixels[:-2, 1:-1] + pixels[2:, 1:-1] + pixels[1:-1, :-2] + pixels[1:-1, 2:] - 4 * pixels[1:-1, 1:-1]
+    return float(laplacian.var()) if laplacian.size else 0.0
+
+
+def exposure_stats(pixels):
+    histogram = np.bincount(pixels.ravel(), minlength=256).astype(np.float64)
+    total = histogram.sum()
+    levels = np.arange(256)
+    mean = float(histogram @ levels / total)
+    cumulative = np.cumsum(histogram) / total
+    return {
+        "mean": mean,
+        "std": float(np.sqrt(histogram @ (levels - mean) ** 2 / total)),
+        "p1": int(np.searchsorted(cumulative, 0.01)),
+        "p99": int(np.searchsorted(cumulative, 0.99)),
+        "dark_clipped": float(cumulative[4]),
+        "bright_clipped": float(1 - cumulative[250]),
+    }
+
+
+def _gradients(pixels):
+    pixels = pixels.astype(np.float32)
+    gx = np.zeros_like(pixels)
+    gy = np.zeros_like(pixels)
+    gx[:, 1:-1] = pixels[:, 2:] - pixels[:, :-2]
+    gy[1:-1] = pixels[2:] - pixels[:-2]
+    return gx, gy
+
+
+# Rows and columns holding the central _CROP_ENERGY of the edge energy,
+# padded by a margin; None when there are too few edges to be a label
+def find_label(pixels):
+    gx, gy = _gradients(pixels)
+    magnitude = np.abs(gx) + np.abs(gy)
+    strong = magnitude > max(24.0, float(np.percentile(magnitude, 90)))
+    if strong.mean() < _MIN_EDGE_SHARE:
+        return None
+    energy = np.where(strong, magnitude, 0)
+    height, width = pixels.shape
+    tail = (1 - _CROP_ENERGY) / 2
+
+    def band(profile, length):
+        cumulative = np.cumsum(profile) / profile.sum()
+        low, high = int(np.searchsorted(cumulative, tail)), int(np.searchsorted(cumulative, 1 - tail))
+        margin = int(_CROP_MARGIN * length)
+        return max(0, low - margin), min(length, high + 1 + margin)
+
+    left, right = band(energy.sum(axis=0), width)
+    top, bottom = band(energy.sum(axis=1), height)
+    return left, top, right, bottom
+
+
+# Projection profile: the edge points of lines of print pile up into the
+# fewest, fullest rows when projected across the print's own angle.
+# Candidate angles are scored all at once with one offset bincount.
+def estimate_skew(pixels):
+    gx, gy = _gradients(pixels)
+    magnitude = np.abs(gx) + np.abs(gy)
+    strong = magnitude > max(24.0, float(np.percentile(magnitude, 90)))
+    ys, xs = np.nonzero(strong)
+    if len(ys) < 16:
+        return 0.0
+    angles = np.radians(np.arange(-PREPROCESS_MAX_SKEW, PREPROCESS_MAX_SKEW + _SKEW_STEP / 2, _SKEW_STEP))
+    rows = np.rint(ys[None, :] * np.cos(angles)[:, None] + xs[None, :] * np.sin(angles)[:, None]).astype(np.int64)
+    rows -= rows.min()
+    span = int(rows.max()) + 1
+    counts = np.bincount((rows + np.arange(len(angles))[:, None] * span).ravel(), minlength=len(angles) * span)
+    scores = (counts.reshape(len(angles), span).astype(np.float64) ** 2).sum(axis=1)
+    return round(float(np.degrees(angles[int(np.argmax(scores))])), 2)
+
+
+def clahe(pixels, grid=_CLAHE_GRID, clip=_CLAHE_CLIP):
+    height, width = pixels.shape
+    rows = np.minimum(np.arange(height) * grid // height, grid - 1)
+    cols = np.minimum(np.arange(width) * grid // width, grid - 1)
+    tiles = rows[:, None] * grid + cols[None, :]
+    histograms = np.bincount((tiles * 256 + pixels).ravel(), minlength=grid * grid * 256).reshape(grid * grid, 256)
+    histograms = histograms.astype(np.float64)
+    # Clip each tile's histogram and spread the excess over every level
+    limit = np.maximum(1.0, clip * histograms.sum(axis=1, keepdims=True) / 256)
+    excess = np.maximum(histograms - limit, 0).sum(axis=1, keepdims=True)
+    histograms = np.minimum(histograms, limit) + excess / 256
+    cdf = np.cumsum(histograms, axis=1)
+    luts = (255 * (cdf - cdf[:, :1]) / np.maximum(cdf[:, -1:] - cdf[:, :1], 1)).astype(np.float32)
+
+    # Tile centres, and each pixel's two nearest tiles per axis
+    def neighbours(length):
+        position = (np.arange(length) + 0.5) * grid / length - 0.5
+        low = np.clip(np.floor(position), 0, grid - 1).astype(np.int64)
+        high = np.minimum(low + 1, grid - 1)
+        return low, high, np.clip(position - low, 0, 1).astype(np.float32)
+
+    y0, y1, wy = neighbours(height)
+    x0, x1, wx = neighbours(width)
+    wy, wx = wy[:, None], wx[None, :]
+    top = luts[y0[:, None] * grid + x0[None, :], pixels] * (1 - wx) + luts[y0[:, None] * grid + x1[None, :], pixels] * wx
+    bottom = luts[y1[:, None] * grid + x0[None, :], pixels] * (1 - wx) + luts[y1[:, None] * grid + x1[None, :], pixels] * wx
+    return (top * (1 - wy) + bottom * wy).astype(np.uint8)
+
+
+# Pixels that fit in size x size, letterboxed onto a square and
+# standardised to zero mean and unit variance
+def to_tensor(pixels, size):
+    pixels = pixels.astype(np.float32)
+    canvas = np.full((size, size), pixels.mean(), dtype=np.float32)
+    top, left = (size - pixels.shape[0]) // 2, (size - pixels.shape[1]) // 2
+    canvas[top : top + pixels.shape[0], left : left + pixels.shape[1]] = pixels
+    canvas -= canvas.mean()
+    canvas /= max(float(canvas.std()), 1e-3)
+    return canvas[None]
+
+
+def quality_reasons(sharpness, exposure, box):
+    reasons = []
+    if exposure["mean"] < _DARK_MEAN or exposure["dark_clipped"] > _MAX_CLIPPED:
+        reasons.append(TOO_DARK)
+    if exposure["mean"] > _BRIGHT_MEAN or exposure["bright_clipped"] > _MAX_CLIPPED:
+        reasons.append(TOO_BRIGHT)
+    if exposure["p99"] - exposure["p1"] < _MIN_RANGE:
+        reasons.append(LOW_CONTRAST)
+    if sharpness < PREPROCESS_MIN_SHARPNESS:
+        reasons.append(BLURRY)
+    if box is None:
+        reasons.append(NO_LABEL)
+    return reasons
+
+
+def preprocess(image, size=None):
+    size = PREPROCESS_TENSOR_SIZE if size is None else size
+    timings = {}
+    start = time.perf_counter()
+
+    def lap(stage):
+        nonlocal start
+        now = time.perf_counter()
+        timings[stage] = (now - start) * 1000
+        start = now
+
+    gray = to_gray(image)
+    lap("grayscale")
+    factor = _reduce_factor(gray.size, PREPROCESS_WORK_PIXELS)
+    work = np.asarray(gray.reduce(factor))
+    exposure = exposure_stats(work)
+    lap("exposure")
+    box = find_label(work)
+    width, height = gray.size
+    crop = (0, 0, width, height)
+    if box is not None:
+        crop = (box[0] * factor, box[1] * factor, min(width, box[2] * factor), min(height, box[3] * factor))
+    lap("crop")
+    # Focus is judged on the label, not on the engine bay behind it
+    region = gray.crop(crop)
+    sharpness = laplacian_variance(region.reduce(_reduce_factor(region.size, PREPROCESS_SHARPNESS_PIXELS)))
+    lap("sharpness")
+    reasons = quality_reasons(sharpness, exposure, box)
+    if reasons:
+        return Preprocessed(False, reasons, sharpness, exposure, 0.0, crop, timings=timings)
+
+    skew = estimate_skew(work[box[1] : box[3], box[0] : box[2]])
+    lap("skew")
+    # Straightened and equalised at the tensor's resolution; the crop is
+    # first reduced to about twice that so the rotation stays cheap
+    region = region.reduce(max(1, max(region.size) // (2 * size)))
+    if skew:
+        region = region.rotate(-skew, Image.BILINEAR, expand=True, fillcolor=int(np.median(np.asarray(region))))
+    scale = size / max(region.size)
+    region = region.resize((min(size, max(1, round(region.size[0] * scale))), min(size, max(1, round(region.size[1] * scale)))), Image.BILINEAR)
+    lap("straighten")
+    equalised = clahe(np.asarray(region))
+    lap("contrast")
+    tensor = to_tensor(equalised, size)
+    lap("tensor")
+    return Preprocessed(True, [], sharpness, exposure, skew, crop, tensor, timings)
+
+
+def main(argv=None):
+    import argparse
+
+    from automotive_ai.uploads import load_analysis_image
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.preprocessing", description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--save-crop", help="write the recognizer's view of the last accepted image here")
+    args = parser.parse_args(argv)
+
+    for path in args.images:
+        with open(path, "rb") as image_file:
+            image = load_analysis_image(image_file)
+        result = preprocess(image)
+        verdict = "accepted" if result.accepted else "rejected: " + ", ".join(result.reasons)
+        print(f"{path}: {image.size[0]}x{image.size[1]} {verdict}")
+        print(f"  sharpness {result.sharpness:.1f}, mean {result.exposure['mean']:.0f}, range {result.exposure['p1']}-{result.exposure['p99']},"
+              f" skew {result.skew:+.1f} deg, crop {result.crop}")
+        print("  " + ", ".join(f"{stage} {ms:.1f} ms" for stage, ms in result.timings.items())
+              + f" (total {sum(result.timings.values()):.1f} ms)")
+        if args.save_crop and result.accepted:
+            view = result.tensor[0]
+            Image.fromarray(((view - view.min()) / max(float(np.ptp(view)), 1e-6) * 255).astype(np.uint8)).save(args.save_crop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Component recognition on preprocessed label photos, micro-batched.
+
+A backend turns a float32 batch of shape (n, 1, size, size), stacked
+from preprocessing tensors, into one probability per label in LABELS:
+
+- "numpy": a reference model in plain NumPy (pooling, two hidden dense
+  layers, softmax) with fixed seeded weights. It recognizes nothing; it
+  has the real model's input/output contract, is bound like it by reading
+  its weights when run one image at a time, and needs no extra packages.
+- "onnx": RECOGNITION_MODEL run by ONNX Runtime on the CPU (optional
+  onnxruntime package). The model takes the batch above and returns one
+  logit per label; a comma-separated "labels" metadata entry overrides
+  LABELS.
+
+The backend is loaded and warmed up once per process. Sessions do not
+call it directly: a MicroBatcher thread gathers the requests arriving
+from concurrent analyses into one batch, up to RECOGNITION_MAX_BATCH
+images or until the oldest has waited RECOGNITION_MAX_WAIT_MS, and runs
+the backend once for all of them. Batched matrix products reuse each
+weight once per batch instead of once per image.
+
+    python -m automotive_ai.recognition photo.jpg other.jpg --backend numpy
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+
+from automotive_ai.preprocessing import PREPROCESS_TENSOR_SIZE
+
+RECOGNITION_BACKEND = os.environ.get("RECOGNITION_BACKEND", "numpy")
+RECOGNITION_MODEL = os.environ.get("RECOGNITION_MODEL", os.path.join("data", "recognition.onnx"))
+RECOGNITION_MAX_BATCH = int(os.environ.get("RECOGNITION_MAX_BATCH", "16"))
+RECOGNITION_MAX_WAIT_MS = float(os.environ.get("RECOGNITION_MAX_WAIT_MS", "10"))
+# ONNX Runtime intra-op threads; 0 lets it pick
+RECOGNITION_THREADS = int(os.environ.get("RECOGNITION_THREADS", "0"))
+
+LABELS = ("ecu_module", "label", "relay", "fuse", "connector", "sensor", "ignition_coil", "injector", "schematic")
+
+# Reference model: POOL x POOL average pooling, then dense layers; about
+# 50 MB of weights at the default tensor size
+_POOL = 2
+_HIDDEN = (1024, 256)
+_SEED = 2024
+
+
+@dataclass
+class Recognition:
+    # (label, probability) pairs, most likely first
+    top: list
+    # Images in the backend call this one rode in
+    batch_size: int
+    queue_ms: float
+    inference_ms: float
+
+
+def softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+def top_labels(probabilities, labels, k=3):
+    order = np.argsort(probabilities)[::-1][:k]
+    return [(labels[index], float(probabilities[index])) for index in order]
+
+
+class NumpyBackend:
+    name = "numpy"
+    max_batch = None
+    # Seeded weights: its labels mean nothing and are not shown as findings
+    trained = False
+
+    def __init__(self, input_size=None, labels=LABELS):
+        self.input_size = PREPROCESS_TENSOR_SIZE if input_size is None else input_size
+        self.labels = tuple(labels)
+        rng = np.random.default_rng(_SEED)
+        sizes = ((self.input_size // _POOL) ** 2,) + _HIDDEN + (len(self.labels),)
+        # He initialisation keeps activations from vanishing through the ReLUs
+        self.weights = [
+            (rng.standard_normal((fan_in, fan_out), dtype=np.float32) * np.float32(np.sqrt(2 / fan_in)),
+             np.zeros(fan_out, dtype=np.float32))
+            for fan_in, fan_out in zip(sizes, sizes[1:])
+        ]
+
+    def predict(self, batch):
+        cells = self.input_size // _POOL
+        pixels = batch[:, 0, : cells * _POOL, : cells * _POOL]
+        activations = pixels.reshape(len(batch), cells, _POOL, cells, _POOL).mean(axis=(2, 4)).reshape(len(batch), -1)
+        for layer, (weight, bias) in enumerate(self.weights):
+            activations = activations @ weight + bias
+            if layer < len(self.weights) - 1:
+                np.maximum(activations, 0, out=activations)
+        return softmax(activations)
+
+
+class OnnxBackend:
+    name = "onnx"
+    trained = True
+
+    def __init__(self, path=None, threads=None):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("the onnx recognition backend needs onnxruntime (pip install onnxruntime), or set RECOGNITION_BACKEND=numpy")
+        path = RECOGNITION_MODEL if path is None else path
+        threads = RECOGNITION_THREADS if threads is None else threads
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Symbolic dimensions come back as strings
+        batch, size = model_input.shape[0], model_input.shape[-1]
+        self.max_batch = batch if isinstance(batch, int) else None
+        self.input_size = size if isinstance(size, int) else PREPROCESS_TENSOR_SIZE
+        labels = self.session.get_modelmeta().custom_metadata_map.get("labels")
+        self.labels = tuple(label.strip() for label in labels.split(",")) if labels else LABELS
+
+    def predict(self, batch):
+        return softmax(self.session.run(None, {self.input_name: batch})[0])
+
+
+def load_backend(name=None, model=None):
+    name = RECOGNITION_BACKEND if name is None else name
+    if name == "numpy":
+        backend = NumpyBackend()
+    elif name == "onnx":
+        backend = OnnxBackend(model)
+    else:
+        raise ValueError(f"unknown recognition backend {name!r} (expected numpy or onnx)")
+    # The first call allocates the backend's buffers; pay for it at load time
+    backend.predict(np.zeros((1, 1, backend.input_size, backend.input_size), dtype=np.float32))
+    return backend
+
+
+# Runs the backend on batches gathered across threads. submit() returns a
+# future at once and recognize() blocks until the batch it joined has run;
+# a batch closes when it is full or its oldest request has waited
+# max_wait_ms.
+class MicroBatcher:
+    def __init__(self, backend, max_batch=None, max_wait_ms=None, top_k=3):
+        max_batch = RECOGNITION_MAX_BATCH if max_batch is None else max_batch
+        self.backend = backend
+        self.max_batch = max(1, min(max_batch, backend.max_batch or max_batch))
+        self.max_wait = (RECOGNITION_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.top_k = top_k
+        self.batches = 0
+        self.images = 0
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="recognition-batcher", daemon=True)
+        self._thread.start()
+
+    @property
+    def input_size(self):
+        return self.backend.input_size
+
+    def submit(self, tensor):
+        future = Future()
+        self._requests.put((time.monotonic(), tensor, future))
+        return future
+
+    def recognize(self, tensor, timeout=None):
+        return self.submit(tensor).result(timeout)
+
+    def _gather(self):
+        first = self._requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Run what was gathered, then stop
+                self._requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._gather()
+            if batch is None:
+                return
+            batch = [request for request in batch if request[2].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                probabilities = self.backend.predict(np.stack([tensor for _, tensor, _ in batch]))
+            except Exception as exc:
+                for _, _, future in batch:
+                    future.set_exception(exc)
+                continue
+            finished = time.monotonic()
+            self.batches += 1
+            self.images += len(batch)
+            for (submitted, _, future), row in zip(batch, probabilities):
+                future.set_result(Recognition(
+                    top=top_labels(row, self.backend.labels, self.top_k),
+                    batch_size=len(batch),
+                    queue_ms=(started - submitted) * 1000,
+                    inference_ms=(finished - started) * 1000,
+                ))
+
+    def stats(self):
+        return {"batches": self.batches, "images": self.images, "mean_batch": self.images / max(1, self.batches)}
+
+    def close(self):
+        self._requests.put(None)
+        self._thread.join()
+
+
+def main(argv=None):
+    import argparse
+
+    from automotive_ai.preprocessing import preprocess
+    from automotive_ai.uploads import load_analysis_image
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.recognition", description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="+")
+    parser.add_argument("--backend", choices=("numpy", "onnx"), default=None)
+    parser.add_argument("--model", help="ONNX model for the onnx backend")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    backend = load_backend(args.backend, args.model)
+    print(f"{backend.name} backend loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    tensors = {}
+    for path in args.images:
+        with open(path, "rb") as image_file:
+            prepared = preprocess(load_analysis_image(image_file), backend.input_size)
+        if prepared.accepted:
+            tensors[path] = prepared.tensor
+        else:
+            print(f"{path}: rejected: {', '.join(prepared.reasons)}")
+    if not tensors:
+        return
+    start = time.perf_counter()
+    probabilities = backend.predict(np.stack(list(tensors.values())))
+    elapsed = time.perf_counter() - start
+    for path, row in zip(tensors, probabilities):
+        print(f"{path}: " + ", ".join(f"{label} {score:.0%}" for label, score in top_labels(row, backend.labels)))
+    print(f"{len(tensors)} images in one batch: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Tile pyramids for pan-and-zoom schematic viewing and PDF export.
+
+Each schematic image (data/schematics/*.png, *.jpg, *.tif...) is decoded
+once, in a child process, into a pyramid of raw pixel levels, full
+resolution first and each next level half the size, stored as .npy files
+under a directory named after the image's hash. Levels are memory-mapped, so showing a viewport
+copies only the tiles it overlaps, and recently used tiles are kept in a
+byte-bounded LRU cache shared by every viewer. PDF export writes one
+print page at a time, so the document never sits whole in memory.
+
+    python -m automotive_ai.schematic_tiles build data/schematics/*.png
+    python -m automotive_ai.schematic_tiles pdf data/schematics/gol-injection.png --level 1 --out gol.pdf
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+SCHEMATIC_DIR = os.environ.get("SCHEMATIC_DIR", os.path.join("data", "schematics"))
+SCHEMATIC_TILE_DIR = os.environ.get("SCHEMATIC_TILE_DIR", os.path.join("data", "schematic_tiles"))
+SCHEMATIC_TILE_SIZE = int(os.environ.get("SCHEMATIC_TILE_SIZE", "256"))
+SCHEMATIC_TILE_CACHE_MB = float(os.environ.get("SCHEMATIC_TILE_CACHE_MB", "64"))
+SCHEMATIC_PDF_DPI = int(os.environ.get("SCHEMATIC_PDF_DPI", "150"))
+# Bump when the pyramid layout changes, so pyramids are rebuilt.
+SCHEMATIC_TILES_VERSION = 1
+
+SCHEMATIC_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+_GRAY_MODES = ("1", "L", "LA", "I", "I;16", "F")
+# Rows converted into level 0, or downsampled, per step while building
+_STRIP_ROWS = 1024
+# A4 landscape, in inches
+_PAGE_INCHES = (11.69, 8.27)
+_BLANK = 255
+
+
+def list_schematics(directory=None):
+    directory = SCHEMATIC_DIR if directory is None else directory
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return sorted(os.path.join(directory, name) for name in names if name.lower().endswith(SCHEMATIC_EXTENSIONS))
+
+
+def _file_digest(path):
+    digest = hashlib.sha256(str(SCHEMATIC_TILES_VERSION).encode())
+    with open(path, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+# Half-size level from the one above it, averaging 2x2 blocks strip by
+# strip; odd edges repeat their last row or column.
+def _downsample(source, target):
+    height, width = source.shape[:2]
+    for top in range(0, target.shape[0], _STRIP_ROWS // 2):
+        block = np.asarray(source[2 * top : min(height, 2 * (top + _STRIP_ROWS // 2))], dtype=np.uint16)
+        if block.shape[0] % 2:
+            block = np.concatenate([block, block[-1:]])
+        if width % 2:
+            block = np.concatenate([block, block[:, -1:]], axis=1)
+        rows, cols = block.shape[0] // 2, block.shape[1] // 2
+        block = block.reshape((rows, 2, cols, 2) + block.shape[2:])
+        target[top : top + rows] = ((block.sum(axis=(1, 3)) + 2) // 4).astype(np.uint8)
+
+
+# Pillow cannot decode PNG or JPEG a band at a time, so the source is
+# decoded whole; it is then converted and copied into level 0 one strip of
+# rows at a time, so at most one strip of the converted copy exists at once.
+# open_pyramid runs this in a child process.
+def build_pyramid(source_path, directory, tile_size=None):
+    tile_size = SCHEMATIC_TILE_SIZE if tile_size is None else tile_size
+    with Image.open(source_path) as image:
+        mode = "L" if image.mode in _GRAY_MODES else "RGB"
+        width, height = image.size
+        os.makedirs(directory)
+        shape = (height, width) if mode == "L" else (height, width, 3)
+        level = np.lib.format.open_memmap(os.path.join(directory, "level-0.npy"), "w+", np.uint8, shape)
+        for top in range(0, height, _STRIP_ROWS):
+            strip = image.crop((0, top, width, min(height, top + _STRIP_ROWS))).convert(mode)
+            level[top : top + _STRIP_ROWS] = np.asarray(strip)
+    sizes = [(width, height)]
+    while width > tile_size or height > tile_size:
+        width, height = (width + 1) // 2, (height + 1) // 2
+        shape = (height, width) + level.shape[2:]
+        smaller = np.lib.format.open_memmap(os.path.join(directory, f"level-{len(sizes)}.npy"), "w+", np.uint8, shape)
+        _downsample(level, smaller)
+        level.flush()
+        level = smaller
+        sizes.append((width, height))
+    level.flush()
+    with open(os.path.join(directory, "pyramid.json"), "w", encoding="utf-8") as meta_file:
+        json.dump({"source": os.path.basename(source_path), "mode": mode, "tile_size": tile_size, "levels": sizes}, meta_file)
+
+
+class TileCache:
+    """LRU of tile arrays keyed by (pyramid, level, col, row), bounded in bytes."""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = int(SCHEMATIC_TILE_CACHE_MB * 2 ** 20) if max_bytes is None else max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def get(self, key, load):
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+        tile = load()
+        with self._lock:
+            if key not in self._tiles:
+                self._tiles[key] = tile
+                self.bytes += tile.nbytes
+            while self.bytes > self.max_bytes and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self.bytes -= evicted.nbytes
+        return tile
+
+
+class TilePyramid:
+    def __init__(self, directory, cache=None):
+        self.directory = directory
+        self.key = os.path.basename(directory)
+        with open(os.path.join(directory, "pyramid.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        self.source = meta["source"]
+        self.mode = meta["mode"]
+        self.tile_size = meta["tile_size"]
+        self.sizes = [tuple(size) for size in meta["levels"]]
+        self.cache = TileCache() if cache is None else cache
+        self._levels = [np.load(os.path.join(directory, f"level-{index}.npy"), mmap_mode="r") for index in range(len(self.sizes))]
+
+    @property
+    def levels(self):
+        return len(self.sizes)
+
+    def grid(self, level):
+        width, height = self.sizes[level]
+        return -(-width // self.tile_size), -(-height // self.tile_size)
+
+    def tile(self, level, col, row):
+        size = self.tile_size
+        pixels = self._levels[level]
+        return self.cache.get(
+            (self.key, level, col, row),
+            lambda: np.array(pixels[row * size : (row + 1) * size, col * size : (col + 1) * size]),
+        )
+
+    # Pixels of a level within the box (left, top, width, height), pasted
+    # from the tiles it overlaps; outside the schematic is left blank.
+    def viewport(self, level, left, top, width, height):
+        size = self.tile_size
+        canvas = np.full((height, width) + self._levels[level].shape[2:], _BLANK, dtype=np.uint8)
+        cols, rows = self.grid(level)
+        for row in range(max(0, top // size), min(rows, -(-(top + height) // size))):
+            for col in range(max(0, left // size), min(cols, -(-(left + width) // size))):
+                tile = self.tile(level, col, row)
+                x0, y0 = col * size, row * size
+                src_x, src_y = max(left - x0, 0), max(top - y0, 0)
+                dst_x, dst_y = max(x0 - left, 0), max(y0 - top, 0)
+                w = min(tile.shape[1] - src_x, width - dst_x)
+                h = min(tile.shape[0] - src_y, height - dst_y)
+                canvas[dst_y : dst_y + h, dst_x : dst_x + w] = tile[src_y : src_y + h, src_x : src_x + w]
+        return canvas
+
+    # Print pages of a level, A4 landscape at SCHEMATIC_PDF_DPI, left to
+    # right and top to bottom, as (left, top, width, height) boxes
+    def pages(self, level, dpi=None):
+        dpi = SCHEMATIC_PDF_DPI if dpi is None else dpi
+        page_width, page_height = int(_PAGE_INCHES[0] * dpi), int(_PAGE_INCHES[1] * dpi)
+        width, height = self.sizes[level]
+        return [
+            (left, top, min(page_width, width - left), min(page_height, height - top))
+            for top in range(0, height, page_height)
+            for left in range(0, width, page_width)
+        ]
+
+    # PDF bytes in pieces, one page at a time: each page is a single
+    # Flate-compressed image, and the page tree and cross-reference table
+    # follow the last page.
+    def pdf_chunks(self, level, dpi=None):
+        dpi = SCHEMATIC_PDF_DPI if dpi is None else dpi
+        offsets = {}
+        position = 0
+
+        def emit(number, body, stream=None):
+            nonlocal position
+            offsets[number] = position
+            data = f"{number} 0 obj\n{body}\n".encode("latin-1")
+            if stream is not None:
+                data += b"stream\n" + stream + b"\nendstream\n"
+            data += b"endobj\n"
+            position += len(data)
+            return data
+
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        position = len(header)
+        yield header
+        yield emit(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        color = "/DeviceGray" if self.mode == "L" else "/DeviceRGB"
+        kids = []
+        for index, (left, top, width, height) in enumerate(self.pages(level, dpi)):
+            page, content, picture = 3 + 3 * index, 4 + 3 * index, 5 + 3 * index
+            kids.append(f"{page} 0 R")
+            # Points at 72 per inch
+            points_w, points_h = width * 72 / dpi, height * 72 / dpi
+            yield emit(page, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {points_w:.2f} {points_h:.2f}]"
+                             f" /Resources << /XObject << /Im0 {picture} 0 R >> >> /Contents {content} 0 R >>")
+            drawing = f"q {points_w:.2f} 0 0 {points_h:.2f} 0 0 cm /Im0 Do Q".encode("latin-1")
+            yield emit(content, f"<< /Length {len(drawing)} >>", drawing)
+            pixels = zlib.compress(self.viewport(level, left, top, width, height).tobytes(), 6)
+            yield emit(picture, f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace {color}"
+                                f" /BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>", pixels)
+        yield emit(2, f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>")
+        count = max(offsets) + 1
+        xref = [f"xref\n0 {count}\n0000000000 65535 f \n"] + [f"{offsets[number]:010d} 00000 n \n" for number in range(1, count)]
+        yield "".join(xref).encode("latin-1")
+        yield f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n".encode("latin-1")
+
+    def write_pdf(self, stream, level, dpi=None):
+        for chunk in self.pdf_chunks(level, dpi):
+            stream.write(chunk)
+
+
+# Entry point of the build process. Wiring diagrams from the manuals are
+# routinely past Pillow's decompression-bomb limit; lifting it here leaves it
+# in place for uploads decoded by the parent's threads, and the whole-image
+# decode is freed when the process exits.
+def _build_process(source_path, directory, tile_size):
+    Image.MAX_IMAGE_PIXELS = None
+    build_pyramid(source_path, directory, tile_size)
+
+
+# Builds the pyramid into a directory named after the image and its hash
+# the first time it is needed, in a child process, then memory-maps it; the
+# calling process only ever opens built pyramids.
+def open_pyramid(source_path, tile_dir=None, cache=None, tile_size=None):
+    tile_dir = SCHEMATIC_TILE_DIR if tile_dir is None else tile_dir
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    compiled = os.path.join(tile_dir, f"{stem}-{_file_digest(source_path)}")
+    if not os.path.isdir(compiled):
+        os.makedirs(tile_dir, exist_ok=True)
+        tmp_dir = f"{compiled}.tmp-{os.getpid()}-{threading.get_ident()}"
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pool.submit(_build_process, source_path, tmp_dir, tile_size).result()
+        try:
+            os.rename(tmp_dir, compiled)
+        except OSError:
+            # Another process built the same schematic first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        for name in os.listdir(tile_dir):
+            if name.rsplit("-", 1)[0] == stem and name != os.path.basename(compiled) and ".tmp-" not in name:
+                shutil.rmtree(os.path.join(tile_dir, name), ignore_errors=True)
+    return TilePyramid(compiled, cache)
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.schematic_tiles", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build missing pyramids")
+    build.add_argument("images", nargs="*", help=f"schematic images (default: {SCHEMATIC_DIR})")
+    pdf = commands.add_parser("pdf", help="export a schematic as PDF print pages")
+    pdf.add_argument("image")
+    pdf.add_argument("--level", type=int, default=0, help="pyramid level, 0 is full resolution")
+    pdf.add_argument("--dpi", type=int, default=SCHEMATIC_PDF_DPI)
+    pdf.add_argument("--out", required=True)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "build":
+        for image in args.images or list_schematics():
+            pyramid = open_pyramid(image)
+            width, height = pyramid.sizes[0]
+            print(f"{image}: {width}x{height} {pyramid.mode}, {pyramid.levels} levels -> {pyramid.directory}")
+    else:
+        pyramid = open_pyramid(args.image)
+        if not 0 <= args.level < pyramid.levels:
+            parser.error(f"level must be 0..{pyramid.levels - 1}")
+        with open(args.out, "wb") as pdf_file:
+            pyramid.write_pdf(pdf_file, args.level, args.dpi)
+        print(f"{args.out}: {len(pyramid.pages(args.level, args.dpi))} pages")
+    print(f"{time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""Workshop storage: diagnosis sessions, their steps and recent vehicles.
+
+Embedded SQLite at STORAGE_PATH in WAL mode, so readers never wait for
+the writer and a commit appends to the log instead of rewriting pages.
+The process keeps a pool of STORAGE_POOL_SIZE connections shared by all
+sessions. SQL is written as fixed parameterised strings, so each pooled
+connection prepares a statement once and reuses it from its statement
+cache.
+
+Writes are queued and group-committed by one writer thread: every write
+waiting when a batch starts, up to STORAGE_BATCH, and any arriving
+within STORAGE_FLUSH_MS, go into one transaction and pay for one sync.
+Callers don't wait; flush() blocks until everything queued so far is
+committed. Rows are keyed by ids the caller generates (session UUIDs,
+step numbers), so no write needs to read back a row id first.
+
+Reads are served by indexes: recent vehicles by vehicles.last_seen, a
+vehicle's diagnoses by (vehicle_id, updated_at) and a session's steps by
+their primary key.
+
+    python -m automotive_ai.storage recent
+    python -m automotive_ai.storage history "VW" "Gol" 2012 "1.0 8V"
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from automotive_ai.vehicle_catalog import Vehicle
+
+logger = logging.getLogger(__name__)
+
+STORAGE_PATH = os.environ.get("STORAGE_PATH", os.path.join("data", "workshop.db"))
+STORAGE_POOL_SIZE = int(os.environ.get("STORAGE_POOL_SIZE", "4"))
+STORAGE_BATCH = int(os.environ.get("STORAGE_BATCH", "256"))
+STORAGE_FLUSH_MS = float(os.environ.get("STORAGE_FLUSH_MS", "20"))
+
+OPEN = "open"
+FINISHED = "finished"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vehicles (
+    id INTEGER PRIMARY KEY,
+    make TEXT NOT NULL,
+    model TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    engine TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    UNIQUE (make, model, year, engine)
+);
+CREATE INDEX IF NOT EXISTS vehicles_last_seen ON vehicles (last_seen);
+CREATE TABLE IF NOT EXISTS diagnosis_sessions (
+    id TEXT PRIMARY KEY,
+    vehicle_id INTEGER REFERENCES vehicles (id),
+    tree TEXT NOT NULL,
+    symptom TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    steps INTEGER NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_vehicle ON diagnosis_sessions (vehicle_id, updated_at);
+CREATE INDEX IF NOT EXISTS sessions_updated ON diagnosis_sessions (updated_at);
+CREATE TABLE IF NOT EXISTS diagnosis_steps (
+    session_id TEXT NOT NULL REFERENCES diagnosis_sessions (id),
+    step INTEGER NOT NULL,
+    node TEXT NOT NULL,
+    value REAL NOT NULL,
+    in_range INTEGER NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (session_id, step)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_VEHICLE = (
+    "INSERT INTO vehicles (make, model, year, engine, last_seen) VALUES (?, ?, ?, ?, ?)"
+    " ON CONFLICT (make, model, year, engine) DO UPDATE SET last_seen = excluded.last_seen"
+)
+_VEHICLE_ID = "(SELECT id FROM vehicles WHERE make = ? AND model = ? AND year = ? AND engine = ?)"
+# Starting an already stored session again (its first step re-answered) is a no-op
+_INSERT_SESSION = (
+    "INSERT INTO diagnosis_sessions (id, vehicle_id, tree, symptom, status, started_at, updated_at)"
+    f" VALUES (?, {_VEHICLE_ID}, ?, ?, '{OPEN}', ?, ?) ON CONFLICT (id) DO NOTHING"
+)
+_INSERT_SESSION_NO_VEHICLE = (
+    "INSERT INTO diagnosis_sessions (id, vehicle_id, tree, symptom, status, started_at, updated_at)"
+    f" VALUES (?, NULL, ?, ?, '{OPEN}', ?, ?) ON CONFLICT (id) DO NOTHING"
+)
+_INSERT_STEP = (
+    "INSERT INTO diagnosis_steps (session_id, step, node, value, in_range, recorded_at)"
+    " VALUES (?, ?, ?, ?, ?, ?)"
+)
+_DELETE_STEPS_FROM = "DELETE FROM diagnosis_steps WHERE session_id = ? AND step >= ?"
+_UPDATE_SESSION = "UPDATE diagnosis_sessions SET steps = ?, status = ?, result = ?, updated_at = ? WHERE id = ?"
+_TOUCH_SESSION_VEHICLE = (
+    "UPDATE vehicles SET last_seen = ? WHERE id = (SELECT vehicle_id FROM diagnosis_sessions WHERE id = ?)"
+)
+_RECENT_VEHICLES = "SELECT make, model, year, engine, last_seen FROM vehicles ORDER BY last_seen DESC LIMIT ?"
+_SESSION_COLUMNS = "id, tree, symptom, status, result, steps, started_at, updated_at"
+_VEHICLE_SESSIONS = (
+    f"SELECT {_SESSION_COLUMNS} FROM diagnosis_sessions"
+    f" WHERE vehicle_id = {_VEHICLE_ID} ORDER BY updated_at DESC LIMIT ?"
+)
+_RECENT_SESSIONS = f"SELECT {_SESSION_COLUMNS} FROM diagnosis_sessions ORDER BY updated_at DESC LIMIT ?"
+_SESSION = f"SELECT {_SESSION_COLUMNS} FROM diagnosis_sessions WHERE id = ?"
+_SESSION_STEPS = "SELECT step, node, value, in_range FROM diagnosis_steps WHERE session_id = ? ORDER BY step"
+
+
+@dataclass
+class RecentVehicle:
+    vehicle: Vehicle
+    last_seen: float
+
+
+@dataclass
+class SessionRecord:
+    session_id: str
+    # Diagnosis tree id and symptom id from data/diagnosis_trees.json
+    tree: str
+    symptom: str
+    status: str
+    # Result node name once finished
+    result: str
+    steps: int
+    started_at: float
+    updated_at: float
+
+
+@dataclass
+class StepRecord:
+    step: int
+    node: str
+    value: float
+    in_range: bool
+
+
+def _vehicle_key(vehicle):
+    return (vehicle.make, vehicle.model, int(vehicle.year), vehicle.engine)
+
+
+class Storage:
+    def __init__(self, path=None, pool_size=None, batch=None, flush_ms=None):
+        self.path = STORAGE_PATH if path is None else path
+        self.batch = STORAGE_BATCH if batch is None else batch
+        self.flush_seconds = (STORAGE_FLUSH_MS if flush_ms is None else flush_ms) / 1000
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        writer = self._connect()
+        writer.executescript(SCHEMA)
+        self._pool = queue.LifoQueue()
+        for _ in range(STORAGE_POOL_SIZE if pool_size is None else pool_size):
+            self._pool.put(self._connect())
+        self.commits = 0
+        self.writes = 0
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, args=(writer,), name="storage-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        # Autocommit; the writer opens its own transactions
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, cached_statements=64)
+        connection.execute("PRAGMA journal_mode = WAL")
+        # With WAL, NORMAL syncs at checkpoints only: the database stays
+        # consistent, a power cut may lose the last commits
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute("PRAGMA busy_timeout = 5000")
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    @contextmanager
+    def connection(self):
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    # Writes: queued, committed in batches by the writer thread
+
+    def _queue(self, sql, params):
+        self._writes.put((sql, params))
+
+    def save_vehicle(self, vehicle, when=None):
+        self._queue(_UPSERT_VEHICLE, _vehicle_key(vehicle) + (time.time() if when is None else when,))
+
+    def start_session(self, session_id, tree, symptom, vehicle=None, when=None):
+        when = time.time() if when is None else when
+        if vehicle is None:
+            self._queue(_INSERT_SESSION_NO_VEHICLE, (session_id, tree, symptom, when, when))
+            return
+        self.save_vehicle(vehicle, when)
+        self._queue(_INSERT_SESSION, (session_id,) + _vehicle_key(vehicle) + (tree, symptom, when, when))
+
+    # Records the answer to step `step` (0-based) and drops any later steps
+    # left over from before the mechanic went back
+    def record_step(self, session_id, step, node, value, in_range, result=None, when=None):
+        when = time.time() if when is None else when
+        self._queue(_DELETE_STEPS_FROM, (session_id, step))
+        self._queue(_INSERT_STEP, (session_id, step, node, float(value), int(bool(in_range)), when))
+        status = OPEN if result is None else FINISHED
+        self._queue(_UPDATE_SESSION, (step + 1, status, result, when, session_id))
+        self._queue(_TOUCH_SESSION_VEHICLE, (when, session_id))
+
+    # The mechanic went back: only the first `steps` answers still stand
+    def truncate_session(self, session_id, steps, when=None):
+        when = time.time() if when is None else when
+        self._queue(_DELETE_STEPS_FROM, (session_id, steps))
+        self._queue(_UPDATE_SESSION, (steps, OPEN, None, when, session_id))
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        self._writes.put(done)
+        return done.wait(timeout)
+
+    def _take_batch(self):
+        first = self._writes.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch and not isinstance(batch[-1], threading.Event):
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._writes.get(timeout=remaining) if remaining > 0 else self._writes.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._writes.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _commit(self, connection, writes):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for sql, params in writes:
+                connection.execute(sql, params)
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _write_loop(self, connection):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                connection.close()
+                return
+            writes = [item for item in batch if not isinstance(item, threading.Event)]
+            if writes:
+                try:
+                    self._commit(connection, writes)
+                except sqlite3.Error:
+                    # One bad write must not take the rest of the batch with it
+                    for write in writes:
+                        try:
+                            self._commit(connection, [write])
+                        except sqlite3.Error:
+                            logger.exception("storage write failed: %s", write[0])
+                self.commits += 1
+                self.writes += len(writes)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    # Reads: pooled connections, indexed queries
+
+    def recent_vehicles(self, limit=10):
+        with self.connection() as connection:
+            rows = connection.execute(_RECENT_VEHICLES, (limit,)).fetchall()
+        return [RecentVehicle(Vehicle(make, model, year, engine), last_seen) for make, model, year, engine, last_seen in rows]
+
+    def vehicle_history(self, vehicle, limit=10):
+        with self.connection() as connection:
+            rows = connection.execute(_VEHICLE_SESSIONS, _vehicle_key(vehicle) + (limit,)).fetchall()
+        return [SessionRecord(*row) for row in rows]
+
+    def recent_sessions(self, limit=10):
+        with self.connection() as connection:
+            rows = connection.execute(_RECENT_SESSIONS, (limit,)).fetchall()
+        return [SessionRecord(*row) for row in rows]
+
+    def session(self, session_id):
+        with self.connection() as connection:
+            row = connection.execute(_SESSION, (session_id,)).fetchone()
+        return SessionRecord(*row) if row else None
+
+    def session_steps(self, session_id):
+        with self.connection() as connection:
+            rows = connection.execute(_SESSION_STEPS, (session_id,)).fetchall()
+        return [StepRecord(step, node, value, bool(in_range)) for step, node, value, in_range in rows]
+
+    def close(self):
+        self._writes.put(None)
+        self._writer.join()
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.storage", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    recent = commands.add_parser("recent", help="recently diagnosed vehicles and sessions")
+    recent.add_argument("--limit", type=int, default=10)
+    history = commands.add_parser("history", help="diagnoses of one vehicle, with their steps")
+    history.add_argument("make")
+    history.add_argument("model")
+    history.add_argument("year", type=int)
+    history.add_argument("engine")
+    history.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    storage = Storage(args.db)
+    try:
+        start = time.perf_counter()
+        if args.command == "recent":
+            vehicles = storage.recent_vehicles(args.limit)
+            sessions = storage.recent_sessions(args.limit)
+            elapsed = time.perf_counter() - start
+            for item in vehicles:
+                print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(item.last_seen))}  {item.vehicle.label()}")
+            for record in sessions:
+                print(f"{record.session_id}  {record.symptom}: {record.status} {record.result or ''} ({record.steps} steps)")
+        else:
+            records = storage.vehicle_history(Vehicle(args.make, args.model, args.year, args.engine), args.limit)
+            steps = {record.session_id: storage.session_steps(record.session_id) for record in records}
+            elapsed = time.perf_counter() - start
+            for record in records:
+                print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(record.started_at))}  {record.symptom}:"
+                      f" {record.status} {record.result or ''}")
+                for step in steps[record.session_id]:
+                    print(f"    {step.step + 1}. {step.node} = {step.value:g}{'' if step.in_range else ' (out of range)'}")
+        print(f"{elapsed * 1000:.1f} ms")
+    finally:
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
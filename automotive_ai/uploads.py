@@ -0,0 +1,68 @@
+import os
+from dataclasses import dataclass
+
+from PIL import Image, ImageOps
+
+# Pixel budgets: the on-page preview, and the image handed to analysis.
+# A 48 MP phone photo is never decoded at full size for either.
+UPLOAD_PREVIEW_MAX_PIXELS = int(os.environ.get("UPLOAD_PREVIEW_MAX_PIXELS", "1000000"))
+UPLOAD_MAX_PIXELS = int(os.environ.get("UPLOAD_MAX_PIXELS", "12000000"))
+
+# EXIF orientations that rotate the stored image by 90 or 270 degrees
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+@dataclass
+class UploadPreview:
+    preview: Image.Image
+    # Tamanho e modo de cor do arquivo original, já com a orientação EXIF
+    source_size: tuple
+    source_mode: str
+    source_format: str
+
+
+def fit_pixels(size, max_pixels):
+    width, height = size
+    if width * height <= max_pixels:
+        return size
+    scale = (max_pixels / float(width * height)) ** 0.5
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def source_info(image):
+    width, height = image.size
+    if image.getexif().get(0x0112) in _TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    return (width, height), image.mode, image.format
+
+
+# Decodes at most max_pixels: JPEGs are scaled by 1/2, 1/4 or 1/8 while
+# decoding (draft mode), anything else is reduced right after loading.
+def decode_image(file, max_pixels):
+    file.seek(0)
+    image = Image.open(file)
+    if image.format == "JPEG":
+        image.draft(None, fit_pixels(image.size, max_pixels))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(fit_pixels(image.size, max_pixels))
+    return image
+
+
+def decode_upload_preview(file, max_pixels=None):
+    if max_pixels is None:
+        max_pixels = UPLOAD_PREVIEW_MAX_PIXELS
+    file.seek(0)
+    source_size, source_mode, source_format = source_info(Image.open(file))
+    return UploadPreview(
+        preview=decode_image(file, max_pixels),
+        source_size=source_size,
+        source_mode=source_mode,
+        source_format=source_format,
+    )
+
+
+# Analysis input, decoded only when an analysis runs and not kept afterwards
+def load_analysis_image(file, max_pixels=None):
+    if max_pixels is None:
+        max_pixels = UPLOAD_MAX_PIXELS
+    return decode_image(file, max_pixels)
@@ -0,0 +1,311 @@
+"""Vehicle catalog: make/model/year/engine autocomplete and chassis decoding.
+
+The CSV catalog is compiled into a columnar index of .npy files: one sorted
+table of accent-folded names per field (prefix lookups are two binary
+searches) and one row per make/model/year/engine, sorted so each make and
+make+model is a contiguous range. Tables are memory-mapped on first use;
+importing the module or creating a VehicleCatalog reads nothing.
+
+    python -m automotive_ai.vehicle_catalog complete model go --make VW
+    python -m automotive_ai.vehicle_catalog chassis 9BWZZZ377VT004251
+"""
+import csv
+import datetime
+import hashlib
+import os
+import shutil
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+
+import numpy as np
+
+VEHICLE_CATALOG_SOURCE = os.environ.get("VEHICLE_CATALOG_SOURCE", os.path.join("data", "vehicle_catalog.csv"))
+VEHICLE_WMI_SOURCE = os.environ.get("VEHICLE_WMI_SOURCE", os.path.join("data", "vehicle_wmi.csv"))
+VEHICLE_INDEX_DIR = os.environ.get("VEHICLE_INDEX_DIR", os.path.join("data", "vehicle_index"))
+# Bump when the index layout changes, so catalogs are recompiled.
+VEHICLE_INDEX_VERSION = 1
+
+NAME_FIELDS = ("make", "model", "engine")
+FIELDS = ("make", "model", "year", "engine")
+# Model-year character (10th of a VIN), repeating every 30 years from 1980
+_VIN_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+_VIN_CHARS = frozenset("ABCDEFGHJKLMNPRSTUVWXYZ0123456789")
+# Past the last valid character, for prefix range ends
+_PREFIX_END = "\U0010ffff"
+
+
+def fold(text):
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    return " ".join("".join(char for char in text if not unicodedata.combining(char)).split())
+
+
+def vin_years(code, latest=None):
+    if code not in _VIN_YEAR_CODES:
+        return []
+    latest = datetime.date.today().year + 1 if latest is None else latest
+    year = 1980 + _VIN_YEAR_CODES.index(code)
+    years = []
+    while year <= latest:
+        years.append(year)
+        year += 30
+    return years
+
+
+@dataclass
+class Vehicle:
+    make: str
+    model: str
+    year: int
+    engine: str
+
+    def label(self):
+        return f"{self.make} {self.model} {self.year} {self.engine}"
+
+
+@dataclass
+class ChassisInfo:
+    chassis: str
+    wmi: str = ""
+    makes: list = field(default_factory=list)
+    # Most recent first when the model-year character is ambiguous
+    years: list = field(default_factory=list)
+    candidates: list = field(default_factory=list)
+    error: str = ""
+
+
+def _sources_sha256(paths):
+    digest = hashlib.sha256(str(VEHICLE_INDEX_VERSION).encode())
+    for path in paths:
+        with open(path, "rb") as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def compile_catalog(catalog_path, wmi_path, index_dir):
+    rows = _read_csv(catalog_path)
+    # Display label per folded name, so "vw" and "VW" are one make
+    labels = {name: {} for name in NAME_FIELDS}
+    for row in rows:
+        for name in NAME_FIELDS:
+            labels[name].setdefault(fold(row[name]), row[name].strip())
+    keys = {name: sorted(labels[name]) for name in NAME_FIELDS}
+    ids = {name: {key: index for index, key in enumerate(keys[name])} for name in NAME_FIELDS}
+
+    columns = set()
+    for row in rows:
+        make, model, engine = (ids[name][fold(row[name])] for name in NAME_FIELDS)
+        for year in range(int(row["year_from"]), int(row["year_to"]) + 1):
+            columns.add((make, model, year, engine))
+    table = np.array(sorted(columns), dtype=np.uint32).reshape(-1, 4)
+
+    wmi_rows = sorted((row["wmi"].strip().upper(), fold(row["make"])) for row in _read_csv(wmi_path))
+    os.makedirs(index_dir)
+    for name in NAME_FIELDS:
+        np.save(os.path.join(index_dir, f"{name}_keys.npy"), np.array(keys[name], dtype=str))
+        np.save(
+            os.path.join(index_dir, f"{name}_labels.npy"),
+            np.array([labels[name][key] for key in keys[name]], dtype=str),
+        )
+    for column, name in enumerate(FIELDS):
+        np.save(os.path.join(index_dir, f"rows_{name}.npy"), table[:, column].astype(np.uint16))
+    # Lookup key of the make+model ranges
+    np.save(os.path.join(index_dir, "rows_make_model.npy"), (table[:, 0] << 16) | table[:, 1])
+    np.save(os.path.join(index_dir, "wmi_codes.npy"), np.array([wmi for wmi, _ in wmi_rows], dtype="U3"))
+    np.save(
+        os.path.join(index_dir, "wmi_makes.npy"),
+        np.array([ids["make"].get(make, -1) for _, make in wmi_rows], dtype=np.int32),
+    )
+
+
+class VehicleCatalog:
+    def __init__(self, catalog_path=None, wmi_path=None, index_dir=None):
+        self.catalog_path = VEHICLE_CATALOG_SOURCE if catalog_path is None else catalog_path
+        self.wmi_path = VEHICLE_WMI_SOURCE if wmi_path is None else wmi_path
+        self.index_dir = VEHICLE_INDEX_DIR if index_dir is None else index_dir
+        self._tables = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._tables is not None
+
+    # Compiles the catalog into a directory named after the sources' hash
+    # the first time it is needed, then memory-maps it.
+    def _load(self):
+        if self._tables is not None:
+            return self._tables
+        with self._lock:
+            if self._tables is None:
+                digest = _sources_sha256((self.catalog_path, self.wmi_path))[:16]
+                compiled = os.path.join(self.index_dir, f"catalog-{digest}")
+                if not os.path.isdir(compiled):
+                    os.makedirs(self.index_dir, exist_ok=True)
+                    tmp_dir = f"{compiled}.tmp-{os.getpid()}-{threading.get_ident()}"
+                    compile_catalog(self.catalog_path, self.wmi_path, tmp_dir)
+                    try:
+                        os.rename(tmp_dir, compiled)
+                    except OSError:
+                        # Another process compiled the same sources first
+                        shutil.rmtree(tmp_dir, ignore_errors=True)
+                    for name in os.listdir(self.index_dir):
+                        if name.startswith("catalog-") and name != os.path.basename(compiled) and ".tmp-" not in name:
+                            shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+                self._tables = {
+                    name[: -len(".npy")]: np.load(os.path.join(compiled, name), mmap_mode="r")
+                    for name in os.listdir(compiled)
+                }
+        return self._tables
+
+    def _name_range(self, name, prefix):
+        keys = self._load()[f"{name}_keys"]
+        prefix = fold(prefix)
+        lo = int(np.searchsorted(keys, prefix, "left"))
+        hi = int(np.searchsorted(keys, prefix + _PREFIX_END, "left"))
+        return lo, hi
+
+    def _name_id(self, name, value):
+        lo, hi = self._name_range(name, value)
+        if lo < hi and self._load()[f"{name}_keys"][lo] == fold(value):
+            return lo
+        return None
+
+    def label(self, name, name_id):
+        return str(self._load()[f"{name}_labels"][name_id])
+
+    # Rows matching the given make/model/year/engine, as a slice of the
+    # sorted table narrowed by binary search, then a mask for year/engine
+    def _rows(self, make=None, model=None, year=None, engine=None):
+        tables = self._load()
+        rows = slice(0, len(tables["rows_make"]))
+        if make:
+            make_id = self._name_id("make", make)
+            if make_id is None:
+                return np.zeros(0, dtype=np.int64)
+            if model:
+                model_id = self._name_id("model", model)
+                if model_id is None:
+                    return np.zeros(0, dtype=np.int64)
+                key = (make_id << 16) | model_id
+                column = tables["rows_make_model"]
+            else:
+                key, column = make_id, tables["rows_make"]
+            rows = slice(int(np.searchsorted(column, key, "left")), int(np.searchsorted(column, key, "right")))
+        selected = np.arange(rows.start, rows.stop)
+        if model and not make:
+            model_id = self._name_id("model", model)
+            if model_id is None:
+                return np.zeros(0, dtype=np.int64)
+            selected = selected[np.asarray(tables["rows_model"][rows]) == model_id]
+        if year:
+            selected = selected[np.asarray(tables["rows_year"][selected]) == int(year)]
+        if engine:
+            engine_id = self._name_id("engine", engine)
+            if engine_id is None:
+                return np.zeros(0, dtype=np.int64)
+            selected = selected[np.asarray(tables["rows_engine"][selected]) == engine_id]
+        return selected
+
+    # Values of one field starting with prefix, among vehicles matching the
+    # fields already chosen. Names sort alphabetically, years newest first.
+    def complete(self, field_name, prefix="", limit=20, **context):
+        if field_name not in FIELDS:
+            raise ValueError(f"unknown field {field_name!r}")
+        context = {name: value for name, value in context.items() if value and name != field_name}
+        tables = self._load()
+        if field_name == "year":
+            years = np.unique(tables["rows_year"][self._rows(**context)])[::-1]
+            prefix = str(prefix).strip()
+            return [int(year) for year in years if str(year).startswith(prefix)][:limit]
+        lo, hi = self._name_range(field_name, prefix)
+        if not context:
+            return [self.label(field_name, name_id) for name_id in range(lo, min(hi, lo + limit))]
+        name_ids = np.unique(tables[f"rows_{field_name}"][self._rows(**context)])
+        name_ids = name_ids[(name_ids >= lo) & (name_ids < hi)]
+        return [self.label(field_name, int(name_id)) for name_id in name_ids[:limit]]
+
+    # Every (make, model) pair in the catalog, in make then model order
+    def model_names(self):
+        pairs = np.unique(self._load()["rows_make_model"])
+        return [(self.label("make", int(pair >> 16)), self.label("model", int(pair & 0xFFFF))) for pair in pairs]
+
+    def vehicles(self, limit=50, **context):
+        tables = self._load()
+        return [
+            Vehicle(
+                self.label("make", int(tables["rows_make"][row])),
+                self.label("model", int(tables["rows_model"][row])),
+                int(tables["rows_year"][row]),
+                self.label("engine", int(tables["rows_engine"][row])),
+            )
+            for row in self._rows(**context)[:limit]
+        ]
+
+    # Decodes as much of a VIN as has been typed: the manufacturer from the
+    # first three characters (or every make whose WMI starts with a shorter
+    # prefix) and the model year from the tenth.
+    def decode_chassis(self, chassis, limit=50):
+        chassis = "".join(str(chassis).upper().split())
+        info = ChassisInfo(chassis=chassis)
+        invalid = sorted(set(chassis) - _VIN_CHARS)
+        if invalid:
+            info.error = f"invalid VIN character(s): {''.join(invalid)}"
+            return info
+        if len(chassis) > 17:
+            info.error = "a VIN has 17 characters"
+            return info
+        tables = self._load()
+        codes = tables["wmi_codes"]
+        wmi = chassis[:3]
+        lo = int(np.searchsorted(codes, wmi, "left"))
+        hi = int(np.searchsorted(codes, wmi + _PREFIX_END, "left"))
+        make_ids = sorted({int(make_id) for make_id in tables["wmi_makes"][lo:hi] if make_id >= 0})
+        info.wmi = wmi if len(chassis) >= 3 else ""
+        info.makes = [self.label("make", make_id) for make_id in make_ids]
+        if len(chassis) >= 10:
+            info.years = vin_years(chassis[9])[::-1]
+        for make in info.makes:
+            for year in info.years or [None]:
+                info.candidates.extend(self.vehicles(limit - len(info.candidates), make=make, year=year))
+        info.candidates = info.candidates[:limit]
+        return info
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m automotive_ai.vehicle_catalog", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    complete_parser = commands.add_parser("complete", help="autocomplete one field")
+    complete_parser.add_argument("field", choices=FIELDS)
+    complete_parser.add_argument("prefix", nargs="?", default="")
+    for name in FIELDS:
+        complete_parser.add_argument(f"--{name}")
+    chassis_parser = commands.add_parser("chassis", help="decode a full or partial VIN")
+    chassis_parser.add_argument("chassis")
+    args = parser.parse_args(argv)
+
+    catalog = VehicleCatalog()
+    start = time.perf_counter()
+    if args.command == "complete":
+        context = {name: getattr(args, name) for name in FIELDS}
+        for value in catalog.complete(args.field, args.prefix, **context):
+            print(value)
+    else:
+        info = catalog.decode_chassis(args.chassis)
+        if info.error:
+            parser.error(info.error)
+        print(f"WMI {info.wmi or '?'}: {', '.join(info.makes) or 'unknown'}; years {info.years or '?'}")
+        for vehicle in info.candidates:
+            print(vehicle.label())
+    print(f"{(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
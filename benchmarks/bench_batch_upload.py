@@ -0,0 +1,106 @@
+"""Batch photo inspection: time to first report, throughput and memory.
+
+Writes synthetic 12 MP label photos to disk and runs growing batches of
+them through a BatchService with different worker counts. Reports how
+soon the first report arrives, photos per second and the process's peak
+RSS after each batch. The photos are opened from disk, as the command
+line does, so peak RSS should follow the worker count and stay flat as
+the batch grows; in the app the uploader holds every photo already.
+
+Usage: python benchmarks/bench_batch_upload.py [--batches 10 40] [--workers 1 2 4]
+"""
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.batch_upload import BatchService  # noqa: E402
+
+
+def label_photo(path, width, height, skew, seed):
+    rng = np.random.default_rng(seed)
+    background = rng.normal(110, 14, (height, width)).clip(0, 255).astype(np.uint8)
+    photo = Image.fromarray(background).filter(ImageFilter.GaussianBlur(2)).convert("RGB")
+    label = Image.new("RGB", (width * 9 // 20, height // 3), (236, 236, 230))
+    draw = ImageDraw.Draw(label)
+    line_height = label.size[1] // 10
+    for line in range(9):
+        x = line_height
+        while x < label.size[0] - 2 * line_height:
+            glyph = int(rng.integers(line_height // 4, line_height // 2))
+            draw.rectangle((x, (line + 0.6) * line_height, x + glyph, (line + 1.3) * line_height), fill=(25, 25, 25))
+            x += glyph + int(rng.integers(line_height // 8, line_height // 2))
+    mask = Image.new("L", label.size, 255).rotate(skew, expand=True)
+    photo.paste(label.rotate(skew, Image.BILINEAR, expand=True), (width // 4, height // 3), mask)
+    exif = Image.Exif()
+    exif[0x010F], exif[0x0110] = "Bench", "Phone"
+    photo.save(path, "JPEG", quality=90, exif=exif)
+
+
+def peak_rss_mb():
+    # Kilobytes on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def run_batch(service, paths):
+    files = [open(path, "rb") for path in paths]
+    try:
+        start = time.perf_counter()
+        job = service.submit(files)
+        first = None
+        while not job.finished:
+            if first is None and job.done:
+                first = time.perf_counter() - start
+            time.sleep(0.001)
+        elapsed = time.perf_counter() - start
+        return first if first is not None else elapsed, elapsed, job
+    finally:
+        for file in files:
+            file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batches", type=int, nargs="+", default=[10, 40])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # A few distinct photos, copied to fill the largest batch. They are
+        # drawn in a child process, which keeps their memory out of the RSS
+        # reported here.
+        originals = [os.path.join(tmp_dir, f"original-{index}.jpg") for index in range(4)]
+        with ProcessPoolExecutor(1) as executor:
+            list(executor.map(label_photo, originals, [args.width] * 4, [args.height] * 4, [-9, -3, 4, 11], range(4)))
+        paths = []
+        for index in range(max(args.batches)):
+            path = os.path.join(tmp_dir, f"photo-{index:03d}.jpg")
+            shutil.copy(originals[index % len(originals)], path)
+            paths.append(path)
+        size_mb = sum(os.path.getsize(path) for path in paths) / 1e6
+        print(f"{len(paths)} photos of {args.width}x{args.height}, {size_mb:.0f} MB of JPEG, peak RSS {peak_rss_mb():.0f} MB")
+
+        for workers in args.workers:
+            service = BatchService(workers)
+            for batch in sorted(args.batches):
+                first, elapsed, job = run_batch(service, paths[:batch])
+                accepted = sum(1 for report in job.reports if report.accepted)
+                print(f"{workers} workers, {batch:3d} photos: first report {first * 1000:6.0f} ms,"
+                      f" all in {elapsed:5.2f} s ({batch / elapsed:5.1f} photos/s), {accepted} usable,"
+                      f" peak RSS {peak_rss_mb():.0f} MB")
+            service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""CAN log import throughput and downsampled plotting of long traces.
+
+Writes a candump log of OBD-II request/response traffic mixed with other
+bus frames, imports it in chunks and reports frames per second, MB/s and
+the process's peak RSS so far. It then streams a 10M-sample trace through
+a signal and times the overview and zoomed LTTB windows the panel draws.
+
+Usage: python benchmarks/bench_canlog.py [--frames 2000000] [--samples 10000000]
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.canlog import CANLOG_CHUNK_LINES, CANLOG_PLOT_POINTS, Signal, import_log  # noqa: E402
+
+
+def write_log(path, frames, rng):
+    with open(path, "w") as log_file:
+        for start in range(0, frames, 100000):
+            count = min(100000, frames - start)
+            times = 1700000000 + (start + np.arange(count)) * 0.001
+            rpm = (3200 + 2800 * np.sin(times / 7.0)).astype(int) * 4
+            other = rng.integers(0, 256, size=(count, 8))
+            lines = []
+            for index in range(count):
+                kind = (start + index) % 4
+                if kind == 0:
+                    lines.append(f"({times[index]:.6f}) can0 7DF#02010C0000000000\n")
+                elif kind == 1:
+                    lines.append(f"({times[index]:.6f}) can0 7E8#04410C{rpm[index]:04X}AAAAAA\n")
+                elif kind == 2:
+                    lines.append(f"({times[index]:.6f}) can0 7E8#03410D{index % 180:02X}AAAAAAAA\n")
+                else:
+                    lines.append(f"({times[index]:.6f}) can0 3C0#{bytes(other[index].tolist()).hex().upper()}\n")
+            log_file.write("".join(lines))
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:28s} p50 {statistics.median(ordered):7.3f} ms   p95 {p95:7.3f} ms   n {len(ordered)}")
+
+
+def peak_rss_mb():
+    # Kilobytes on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000000)
+    parser.add_argument("--samples", type=int, default=10000000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "capture.log")
+        write_log(path, args.frames, rng)
+        size = os.path.getsize(path) / 1e6
+        print(f"log written: {args.frames} frames, {size:.0f} MB, peak RSS {peak_rss_mb():.0f} MB")
+        start = time.perf_counter()
+        with open(path, "rb") as stream:
+            log = import_log(stream)
+        elapsed = time.perf_counter() - start
+        print(f"import: {log.frames / elapsed:9.0f} frames/s {size / elapsed:5.1f} MB/s,"
+              f" {', '.join(f'{key} {signal.count}' for key, signal in log.signals.items())}, peak RSS {peak_rss_mb():.0f} MB")
+        log.close()
+
+        signal = Signal("trace", {"en": "trace"}, "", tmp_dir, CANLOG_PLOT_POINTS)
+        start = time.perf_counter()
+        for offset in range(0, args.samples, CANLOG_CHUNK_LINES):
+            times = np.arange(offset, min(args.samples, offset + CANLOG_CHUNK_LINES)) * 0.001
+            signal.append(times, np.sin(times) + rng.normal(0, 0.1, len(times)))
+        signal.close()
+        elapsed = time.perf_counter() - start
+        print(f"{args.samples} samples appended with streaming overview in {elapsed:.2f} s, peak RSS {peak_rss_mb():.0f} MB")
+        duration = args.samples * 0.001
+        report("zoom window, 10% of trace", [
+            timed_ms(lambda: signal.window(offset, offset + duration / 10))
+            for offset in rng.uniform(0, duration * 0.9, 20)
+        ])
+        report("zoom window, full trace", [timed_ms(lambda: signal.window(0, duration)) for _ in range(3)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Guided diagnosis: transition latency and memory of concurrent sessions.
+
+Compiles the shipped trees, times next_node on random measurements and
+walks many sessions at once through random answers, reporting the memory
+they hold live and their serialised size.
+
+Usage: python benchmarks/bench_diagnosis.py [--sessions 10000] [--trees data/diagnosis_trees.json]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.diagnosis import DIAGNOSIS_TREES, MEASURE, RESULT, DiagnosisEngine  # noqa: E402
+
+
+def random_answer(engine, node_id, rng):
+    node = engine.node(node_id)
+    if engine.kind(node_id) == MEASURE:
+        low, high = node["expected"]
+        return rng.uniform(low - (high - low), high + (high - low))
+    return rng.randrange(len(node["options"]["en"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--trees", default=DIAGNOSIS_TREES)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    engine = DiagnosisEngine.from_file(args.trees)
+    print(f"compile: {(time.perf_counter() - start) * 1000:.2f} ms, {len(engine.trees)} trees, {len(engine.nodes)} nodes")
+
+    steps = [node_id for node_id in range(len(engine.nodes)) if engine.kind(node_id) != RESULT]
+    samples = [(node_id, random_answer(engine, node_id, rng)) for node_id in (rng.choice(steps) for _ in range(100000))]
+    start = time.perf_counter()
+    for node_id, value in samples:
+        engine.next_node(node_id, value)
+    print(f"next_node: {(time.perf_counter() - start) / len(samples) * 1e9:.0f} ns per call")
+
+    tracemalloc.start()
+    sessions = [engine.start(rng.randrange(len(engine.trees))) for _ in range(args.sessions)]
+    step_timings = []
+    for session in sessions:
+        while not engine.finished(session):
+            value = random_answer(engine, session.node, rng)
+            start = time.perf_counter()
+            engine.answer(session, value)
+            step_timings.append((time.perf_counter() - start) * 1e6)
+    live, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sizes = [len(session.to_bytes()) for session in sessions]
+    print(f"answer: p50 {statistics.median(step_timings):.2f} us over {len(step_timings)} steps")
+    print(f"{args.sessions} finished sessions: {live / 1024:.0f} KiB live ({live / args.sessions:.0f} B each), "
+          f"serialised mean {statistics.mean(sizes):.0f} B, max {max(sizes)} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Trouble-code dictionary lookups on a large synthetic dictionary.
+
+Writes generic codes plus manufacturer-specific meanings for several makes,
+compiles them once and times opening the compiled dictionary, single
+lookups and the dozen-code batches a scan tool dumps at once.
+
+Usage: python benchmarks/bench_dtc.py [--codes 40000] [--makes 20]
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.dtc import TEXT_FIELDS, DtcDictionary, code_text  # noqa: E402
+
+
+def write_dictionary(path, codes, makes, rng):
+    # Letter in the top bits, then 0000-3FFF
+    numbers = [(index >> 14) << 16 | (index & 0x3FFF) for index in rng.sample(range(4 << 14), codes)]
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(("code", "make") + TEXT_FIELDS)
+        for number in numbers:
+            # About one code in four also has a meaning for some make
+            for make in [""] + ([f"Make{rng.randrange(makes):02d}"] if rng.random() < 0.25 else []):
+                code = code_text(number)
+                writer.writerow([code, make, f"Falha {code}", f"Fault {code}", "Causa A|Causa B", "Cause A|Cause B"])
+    return [code_text(number) for number in numbers]
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:28s} p50 {statistics.median(ordered):7.3f} ms   p95 {p95:7.3f} ms   n {len(ordered)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--codes", type=int, default=40000)
+    parser.add_argument("--makes", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "dtc.csv")
+        codes = write_dictionary(source, args.codes, args.makes, rng)
+        index_dir = os.path.join(tmp_dir, "index")
+        dictionary = DtcDictionary(source, index_dir)
+        print(f"compile + first lookup: {timed_ms(lambda: dictionary.lookup(codes[0])):.1f} ms, {len(dictionary)} rows")
+        opens = []
+        for _ in range(20):
+            dictionary = DtcDictionary(source, index_dir)
+            opens.append(timed_ms(lambda: dictionary.lookup(codes[0])))
+        report("open compiled + lookup", opens)
+
+        makes = [None] + [f"Make{index:02d}" for index in range(args.makes)]
+        report("lookup one code", [timed_ms(lambda: dictionary.lookup(rng.choice(codes), rng.choice(makes)))
+                                   for _ in range(2000)])
+        # A scan-tool dump: mostly known codes, a couple the dictionary lacks
+        missing = sorted(set(code_text(index) for index in range(0x4000)) - set(codes))[:50]
+        batches = [rng.sample(codes, 10) + rng.sample(missing, 2) for _ in range(2000)]
+        report("lookup_many, 12 codes", [timed_ms(lambda: dictionary.lookup_many(batch, rng.choice(makes)))
+                                         for batch in batches])
+
+
+if __name__ == "__main__":
+    main()
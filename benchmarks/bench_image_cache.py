@@ -0,0 +1,70 @@
+"""Encode-once cost and per-rerun st.image cost for the cached mockups.
+
+Compares what st.image does on every rerun for each kind of input: the old
+live PIL images and file paths (both re-encoded, as JPEG with the default
+output_format) and the cached PNG bytes shown with output_format="PNG" (passed
+through). Runs Streamlit's image_to_url without a server.
+
+Usage: python benchmarks/bench_image_cache.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streamlit.elements.lib.image_utils import image_to_url  # noqa: E402
+from streamlit.elements.lib.layout_utils import LayoutConfig  # noqa: E402
+
+from automotive_ai.mockup_renderer import (  # noqa: E402
+    MOCKUP_HEIGHT,
+    MOCKUP_WIDTH,
+    get_mockup_specs_en,
+    render_mockup_spec,
+    render_mockups,
+)
+
+
+def per_rerun_ms(images, repeat, output_format="auto"):
+    layout = LayoutConfig(width="stretch")
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name, image in images.items():
+            image_to_url(image, layout, False, "RGB", output_format, name)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    specs = get_mockup_specs_en(MOCKUP_WIDTH, MOCKUP_HEIGHT)
+    pil_images = {name: render_mockup_spec(spec) for name, spec in specs.items()}
+
+    start = time.perf_counter()
+    png_bytes = render_mockups(specs, workers=1, optimize=True)
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {}
+        for name, png in png_bytes.items():
+            paths[name] = os.path.join(tmp_dir, f"{name}.png")
+            with open(paths[name], "wb") as png_file:
+                png_file.write(png)
+        path_ms = per_rerun_ms(paths, args.repeat)
+
+    pil_mb = sum(len(image.tobytes()) for image in pil_images.values()) / 1e6
+    png_kb = sum(len(png) for png in png_bytes.values()) / 1e3
+    print(f"{len(specs)} screens")
+    print(f"cache size      PIL RGB {pil_mb:6.1f} MB   PNG bytes {png_kb:7.1f} kB")
+    print(f"encode once     {encode_ms:8.1f} ms (render + optimized PNG)")
+    print(f"per rerun       PIL images {per_rerun_ms(pil_images, args.repeat):8.1f} ms")
+    print(f"per rerun       file paths {path_ms:8.1f} ms")
+    print(f"per rerun       PNG bytes  {per_rerun_ms(png_bytes, args.repeat, 'PNG'):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Ingestion throughput and memory on synthetic chat exports.
+
+Writes WhatsApp-style exports of growing size (reposted messages, edited
+forwards and unique reports mixed), ingests each into a scratch knowledge
+base and reports records per second, MB/s and the process's peak RSS so
+far. Peak RSS should level off instead of following the input size.
+
+Usage: python benchmarks/bench_ingestion.py [--sizes 5 20 80] [--workers 0]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.ingestion import Extractor, ingest  # noqa: E402
+
+MESSAGES = [
+    "Pessoal, {model} {year} não pega de manhã, bateria nova e relé de partida testado. Alguém já viu?",
+    "Troquei o sensor TPS do {model} e a marcha lenta continua oscilando, dá P0120 direto no scanner.",
+    "{model} com P0300 e P0171, achei entrada falsa de ar na mangueira do coletor, resolvido!",
+    "{model} {year} alternador carregando 15.2V, troquei o regulador de tensão e normalizou.",
+    "Alguém tem o esquema elétrico da ventoinha do {model} {year}? O relé esquenta muito.",
+    "Bom dia grupo",
+    "<Mídia oculta>",
+]
+MODELS = ["Gol", "Palio", "Onix", "Civic", "Corolla", "HB20", "Ka", "Sandero"]
+
+
+def write_export(path, megabytes, rng):
+    with open(path, "w", encoding="utf-8") as export_file:
+        index = 0
+        while export_file.tell() < megabytes * 1e6:
+            text = rng.choice(MESSAGES).format(model=rng.choice(MODELS), year=rng.randrange(2000, 2024))
+            if rng.random() < 0.5:
+                text += (f" Caso {index}: medi {rng.randrange(100)} ohms no chicote do bico injetor do cilindro"
+                         f" {rng.randrange(1, 5)}, {rng.choice(['troquei', 'limpei', 'reapertei'])} o conector"
+                         f" {rng.choice(['e resolveu', 'mas continua', 'e voltou a falhar'])} em {rng.randrange(1, 60)} minutos.")
+            export_file.write(f"{1 + index % 28:02d}/03/2024 {index % 24:02d}:{index % 60:02d} - Mecanico {rng.randrange(80)}: {text}\n")
+            index += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 20, 80], help="export sizes in MB")
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    extractor = Extractor.from_sources()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for megabytes in sorted(args.sizes):
+            export = os.path.join(tmp_dir, f"chat-{megabytes}.txt")
+            write_export(export, megabytes, rng)
+            start = time.perf_counter()
+            totals = ingest(
+                [export],
+                workers=args.workers,
+                checkpoint_path=os.path.join(tmp_dir, f"checkpoint-{megabytes}.json"),
+                contributions=os.path.join(tmp_dir, f"contributions-{megabytes}.jsonl"),
+                index_dir=os.path.join(tmp_dir, "index"),
+                build=False,
+                extractor=extractor,
+                log=lambda line: None,
+            )
+            elapsed = time.perf_counter() - start
+            # Kilobytes on Linux, bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+            print(
+                f"{megabytes:4d} MB: {totals['read'] / elapsed:8.0f} records/s {totals['bytes'] / 1e6 / elapsed:5.2f} MB/s,"
+                f" {totals['loaded']} loaded, {totals['duplicates']} near-duplicates, peak RSS {peak:.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Knowledge-base index at scale: build, open, query and contribution timings.
+
+Synthesises N entries by recombining the sentences of the seed source,
+builds an index in a temporary directory and times queries of one to four
+words, with and without facet filters, before and after a delta of
+contributed entries.
+
+Usage: python benchmarks/bench_knowledge_base.py [--entries 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.knowledge_base import (  # noqa: E402
+    KNOWLEDGE_BASE_SOURCE,
+    KnowledgeBase,
+    build_index,
+    file_sha256,
+    read_entries,
+)
+
+QUERIES = [
+    "relé de partida",
+    "motor de arranque não gira",
+    "luz de injeção acesa marcha lenta",
+    "compressor não liga",
+    "sensor",
+    "bateria descarregando",
+    "starter relay",
+    "rough idle check engine",
+    "P0120",
+    "ventoinha temperatura",
+]
+
+
+def synthetic_entries(seed_entries, count, rng):
+    pools = {name: [entry[name] for entry in seed_entries] for name in seed_entries[0]}
+    extra_vehicles = [f"{make} {model}" for make in ("Fiat", "VW", "Chevrolet", "Ford", "Renault", "Hyundai")
+                      for model in ("A", "B", "C", "D", "E", "F", "G", "H")]
+    entries = []
+    for _ in range(count):
+        entry = {name: rng.choice(values) for name, values in pools.items()}
+        entry["symptoms"] = " ".join(rng.sample(pools["symptoms"], 2))
+        entry["vehicle"] = rng.choice(extra_vehicles + pools["vehicle"])
+        entries.append(entry)
+    return entries
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:36s} p50 {statistics.median(ordered):7.2f} ms   p95 {p95:7.2f} ms   max {ordered[-1]:7.2f} ms")
+
+
+def run_queries(knowledge_base, queries, rng):
+    vehicles = knowledge_base.facet_values("vehicle")
+    report("search", [timed_ms(lambda: knowledge_base.search(rng.choice(QUERIES))) for _ in range(queries)])
+    report(
+        "search + vehicle facet",
+        [timed_ms(lambda: knowledge_base.search(rng.choice(QUERIES), vehicle=rng.choice(vehicles)))
+         for _ in range(queries)],
+    )
+    report(
+        "search + problem_type + vehicle",
+        [timed_ms(lambda: knowledge_base.search(rng.choice(QUERIES), problem_type="Elétricos",
+                                                vehicle=rng.choice(vehicles)))
+         for _ in range(queries)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--contributions", type=int, default=500, help="delta size for the second round")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    seed_entries = read_entries(KNOWLEDGE_BASE_SOURCE)
+    entries = synthetic_entries(seed_entries, args.entries, rng)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_dir = os.path.join(tmp_dir, "index")
+        contributions = os.path.join(tmp_dir, "contributions.jsonl")
+        build_ms = timed_ms(lambda: build_index(entries, index_dir, file_sha256(os.devnull)))
+        print(f"build {len(entries)} entries: {build_ms / 1000:.2f} s")
+        holder = []
+        open_ms = timed_ms(lambda: holder.append(KnowledgeBase.open(index_dir, os.devnull, contributions)))
+        print(f"open: {open_ms:.1f} ms")
+        knowledge_base = holder[0]
+        run_queries(knowledge_base, args.queries, rng)
+
+        added = synthetic_entries(seed_entries, args.contributions, rng)
+        report("add_entry", [timed_ms(lambda entry=entry: knowledge_base.add_entry(entry)) for entry in added])
+        print(f"with {args.contributions} contributions in the delta:")
+        run_queries(knowledge_base, args.queries, rng)
+        knowledge_base.close()
+
+
+if __name__ == "__main__":
+    main()
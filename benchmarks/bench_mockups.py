@@ -0,0 +1,155 @@
+"""Benchmark suite for the mockup rendering engine.
+
+Times create_mockup per element type at several element counts and canvas
+sizes, full renders of both screen sets, and get_image_base64. Results are
+written as JSON; --compare flags cases slower than a baseline file.
+
+Usage:
+    python benchmarks/bench_mockups.py --output bench.json
+    python benchmarks/bench_mockups.py --output new.json --compare bench.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import PIL  # noqa: E402
+
+from automotive_ai import mockup_renderer  # noqa: E402
+from automotive_ai.mockup_renderer import (  # noqa: E402
+    MOCKUP_HEIGHT,
+    MOCKUP_WIDTH,
+    create_all_mockups,
+    create_mockup,
+    get_image_base64,
+    get_mockup_specs,
+    get_mockup_specs_en,
+    render_mockup_spec,
+    render_mockups,
+)
+
+ELEMENT_COUNTS = [1, 10, 100]
+CANVAS_SIZES = [(670, 850), (1340, 1700), (2680, 3400)]
+
+
+def make_element(elem_type, x, y):
+    if elem_type == "text":
+        return {"type": "text", "position": (x, y), "content": "Tensão da bateria: 12.3V", "color": "#333333"}
+    if elem_type == "rectangle":
+        return {"type": "rectangle", "position": (x, y), "width": 200, "height": 80}
+    if elem_type == "button":
+        return {"type": "button", "position": (x, y), "width": 150, "text": "Próximo Passo"}
+    if elem_type == "input":
+        return {"type": "input", "position": (x, y), "width": 200, "placeholder": "Digite a tensão (V)"}
+    if elem_type == "image_placeholder":
+        return {"type": "image_placeholder", "position": (x, y), "width": 150, "height": 150}
+    if elem_type == "card":
+        return {"type": "card", "position": (x, y), "width": 300, "height": 100, "title": "Falha P0120",
+                "content": "Sensor de posição do acelerador\nFrequência: Alta"}
+    if elem_type == "menu":
+        return {"type": "menu", "position": (x, y), "width": 200, "items": ["Diagnóstico", "Esquemas", "Histórico"]}
+    raise ValueError(elem_type)
+
+
+ELEMENT_TYPES = ["text", "rectangle", "button", "input", "image_placeholder", "card", "menu"]
+
+
+def make_elements(elem_type, count, width, height):
+    rng = random.Random(count * 31 + width)
+    return [
+        make_element(elem_type, rng.randrange(0, max(1, width - 300)), rng.randrange(60, max(61, height - 150)))
+        for _ in range(count)
+    ]
+
+
+def measure(fn, repeat):
+    fn()  # warm-up: fonts, text metrics and base layers are cached per process
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings), "runs": repeat}
+
+
+def run_suite(repeat):
+    results = {}
+    for elem_type in ELEMENT_TYPES:
+        for width, height in CANVAS_SIZES:
+            for count in ELEMENT_COUNTS:
+                elements = make_elements(elem_type, count, width, height)
+                name = f"element/{elem_type}/n{count}/{width}x{height}"
+                results[name] = measure(lambda: create_mockup(width, height, "Benchmark", elements), repeat)
+                print(f"{name:48s} {results[name]['median_ms']:9.2f} ms", flush=True)
+
+    full_repeat = max(1, repeat // 5)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results["full/create_all_mockups"] = measure(
+            lambda: create_all_mockups(workers=1, out_dir=tmp_dir), full_repeat
+        )
+    specs_en = get_mockup_specs_en(MOCKUP_WIDTH, MOCKUP_HEIGHT)
+    results["full/create_all_mockups_en_images"] = measure(
+        lambda: render_mockups(specs_en, workers=1, optimize=True), full_repeat
+    )
+
+    screens = [render_mockup_spec(spec) for spec in get_mockup_specs(MOCKUP_WIDTH, MOCKUP_HEIGHT).values()]
+    results["encode/get_image_base64"] = measure(lambda: [get_image_base64(img) for img in screens], repeat)
+    for name in ("full/create_all_mockups", "full/create_all_mockups_en_images", "encode/get_image_base64"):
+        print(f"{name:48s} {results[name]['median_ms']:9.2f} ms", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current["median_ms"] / previous["median_ms"] if previous["median_ms"] else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append((name, previous["median_ms"], current["median_ms"], ratio))
+    for name, before, after, ratio in regressions:
+        print(f"REGRESSION {name}: {before:.2f} ms -> {after:.2f} ms ({(ratio - 1) * 100:+.0f}%)")
+    print(f"{len(regressions)} regression(s) beyond {threshold * 100:.0f}% across {len(results)} cases")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_mockups.json", help="where to write the JSON results")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "font_family": mockup_renderer.MOCKUP_FONT_FAMILY,
+            "repeat": args.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": run_suite(args.repeat),
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2, sort_keys=True)
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        if compare(report["results"], baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
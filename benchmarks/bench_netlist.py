@@ -0,0 +1,102 @@
+"""Netlist compile time and feed-path / shared-ground query latency.
+
+Generates a whole-vehicle netlist: fuse boxes fed from the battery, each
+fuse feeding a load directly or through a relay and a chain of
+connectors, some loads fed twice, and returns gathered by splices onto a
+handful of ground points. Compiles it and times the per-request queries
+the diagnosis screen makes.
+
+Usage: python benchmarks/bench_netlist.py [--loads 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.netlist import PATH_TYPES, Netlist  # noqa: E402
+
+
+def vehicle_netlist(loads, rng):
+    components = {"BAT": {"type": "battery", "pins": ["+", "-"], "name": {"en": "Battery"}}}
+    nets = [{"name": "31 battery", "pins": ["BAT.-"]}]
+    grounds = [f"G{index}" for index in range(max(2, loads // 150))]
+    splices = [f"S{index}" for index in range(max(4, loads // 20))]
+    for ground in grounds:
+        components[ground] = {"type": "ground", "pins": ["1"], "name": {"en": ground}}
+        nets[0]["pins"].append(f"{ground}.1")
+    for index, splice in enumerate(splices):
+        components[splice] = {"type": "splice", "pins": ["1"], "name": {"en": splice}}
+        nets.append({"name": f"31 {splice}", "pins": [f"{splice}.1", f"{grounds[index % len(grounds)]}.1"]})
+    boxes = max(1, loads // 60)
+    for box in range(boxes):
+        components[f"F{box}"] = {"type": "fuse", "pins": ["1", "2"], "name": {"en": f"Box feed {box}"}}
+        nets.append({"name": f"30 box {box}", "pins": ["BAT.+", f"F{box}.1"]})
+    box_nets = []
+    for box in range(boxes):
+        box_nets.append(len(nets))
+        nets.append({"name": f"30 bus {box}", "pins": [f"F{box}.2"]})
+    box_fuses = [[] for _ in range(boxes)]
+    for load in range(loads):
+        fuse, name = f"F{boxes + load}", f"L{load}"
+        components[fuse] = {"type": "fuse", "pins": ["1", "2"], "name": {"en": f"Fuse {load}"}}
+        components[name] = {"type": "load", "pins": ["1", "2"], "name": {"en": f"Load {load}"}}
+        box = rng.randrange(boxes)
+        nets[box_nets[box]]["pins"].append(f"{fuse}.1")
+        previous = f"{fuse}.2"
+        if rng.random() < 0.3:
+            relay = f"K{load}"
+            components[relay] = {"type": "relay", "pins": ["30", "87", "85", "86"], "name": {"en": f"Relay {load}"}}
+            nets.append({"name": f"{load} relay", "pins": [previous, f"{relay}.30"]})
+            previous = f"{relay}.87"
+        for hop in range(rng.randrange(3)):
+            connector = f"C{load}_{hop}"
+            components[connector] = {"type": "connector", "pins": ["1"], "name": {"en": connector}}
+            nets.append({"name": f"{load} hop {hop}", "pins": [previous, f"{connector}.1"]})
+            previous = f"{connector}.1"
+        feed = {"name": f"{load} feed", "pins": [previous, f"{name}.1"]}
+        if box_fuses[box] and rng.random() < 0.05:
+            # Second supply through another fuse of the same box: a loop on the power side
+            feed["pins"].append(f"{rng.choice(box_fuses[box])}.2")
+        box_fuses[box].append(fuse)
+        nets.append(feed)
+        nets.append({"name": f"{load} return", "pins": [f"{name}.2", f"{rng.choice(splices)}.1"]})
+    return {"id": "bench", "title": {"en": "bench"}, "components": components, "nets": nets}
+
+
+def timed_us(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1e6
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:28s} p50 {statistics.median(ordered):7.2f} µs   p95 {p95:7.2f} µs   n {len(ordered)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loads", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    source = vehicle_netlist(args.loads, rng)
+    start = time.perf_counter()
+    netlist = Netlist(source)
+    elapsed = time.perf_counter() - start
+    print(f"compile: {len(netlist.components)} components, {len(netlist.node_component)} nodes,"
+          f" {len(netlist.indices) // 2} edges in {elapsed * 1000:.0f} ms")
+    loads = [f"L{rng.randrange(args.loads)}" for _ in range(5000)]
+    report("feed_path", [timed_us(lambda: netlist.feed_path(load)) for load in loads])
+    report("feed_path, fuses/relays only", [timed_us(lambda: netlist.feed_path(load, PATH_TYPES)) for load in loads])
+    report("grounds", [timed_us(lambda: netlist.grounds(load)) for load in loads])
+    report("shared_ground", [timed_us(lambda: netlist.shared_ground(load)) for load in loads])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Serial vs process-pool timing for rendering every mockup screen.
+
+Usage: python benchmarks/bench_parallel_render.py [--workers 2 4 8] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.mockup_renderer import (  # noqa: E402
+    MOCKUP_HEIGHT,
+    MOCKUP_WIDTH,
+    get_mockup_specs,
+    get_mockup_specs_en,
+    render_mockups,
+)
+
+
+def all_specs():
+    specs = {}
+    for name, spec in get_mockup_specs(MOCKUP_WIDTH, MOCKUP_HEIGHT).items():
+        specs[f"pt/{name}"] = spec
+    for name, spec in get_mockup_specs_en(MOCKUP_WIDTH, MOCKUP_HEIGHT).items():
+        specs[f"en/{name}"] = spec
+    return specs
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    specs = all_specs()
+    serial = best_of(args.repeat, lambda: render_mockups(specs, workers=1))
+    print(f"{len(specs)} screens, best of {args.repeat} (cpu_count={os.cpu_count()})")
+    print(f"serial          {serial * 1000:8.1f} ms")
+    for workers in sorted(w for w in set(args.workers) if w > 1):
+        # Each run pays pool start-up, which is what a cold Streamlit process sees.
+        parallel = best_of(args.repeat, lambda: render_mockups(specs, workers=workers))
+        print(f"pool x{workers:<2}        {parallel * 1000:8.1f} ms  ({serial / parallel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
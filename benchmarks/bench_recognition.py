@@ -0,0 +1,164 @@
+"""Recognition throughput and latency, unbatched vs micro-batched.
+
+Simulates sessions as client threads, each sending one preprocessed
+tensor at a time and waiting for its answer. Unbatched, every client
+calls the backend itself with a batch of one; micro-batched, every client
+goes through one MicroBatcher and its requests share backend calls with
+the other clients'. Reports images per second, per-request latency and
+the mean batch size for each client count and max wait.
+
+The pipeline runs show what the app gets: sessions upload a synthetic
+label photo to an AnalysisService with ANALYSIS_WORKERS threads, which
+preprocess it and hand the tensor to the micro-batcher. Workers either
+wait for their recognition, or return its future and take the next
+upload, so batches can gather more photos than there are workers.
+
+Usage: python benchmarks/bench_recognition.py [--backend numpy] [--clients 1 4 16] [--waits 2 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from io import BytesIO
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.analysis import ANALYSIS_WORKERS, DONE, AnalysisService, analyze_upload  # noqa: E402
+from automotive_ai.recognition import MicroBatcher, load_backend  # noqa: E402
+
+
+def label_jpeg(width, height, seed):
+    rng = np.random.default_rng(seed)
+    background = rng.normal(110, 14, (height, width)).clip(0, 255).astype(np.uint8)
+    photo = Image.fromarray(background).filter(ImageFilter.GaussianBlur(2)).convert("RGB")
+    label = Image.new("RGB", (width * 9 // 20, height // 3), (236, 236, 230))
+    draw = ImageDraw.Draw(label)
+    line_height = label.size[1] // 10
+    for line in range(9):
+        x = line_height
+        while x < label.size[0] - 2 * line_height:
+            glyph = int(rng.integers(line_height // 4, line_height // 2))
+            draw.rectangle((x, (line + 0.6) * line_height, x + glyph, (line + 1.3) * line_height), fill=(25, 25, 25))
+            x += glyph + int(rng.integers(line_height // 8, line_height // 2))
+    photo.paste(label, (width // 4, height // 3))
+    buffer = BytesIO()
+    photo.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def run_clients(clients, requests, call, tensor):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        mine = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            call(tensor)
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+# Sessions as client threads, each uploading one photo at a time to the
+# analysis service and polling for its result
+def run_pipeline(clients, requests, service, analyze, photo):
+    latencies = []
+    batches = []
+    lock = threading.Lock()
+
+    def client():
+        mine, sizes = [], []
+        for _ in range(requests):
+            start = time.perf_counter()
+            job_id = service.submit(analyze, photo)
+            while not service.status(job_id).finished:
+                time.sleep(0.0005)
+            job = service.pop(job_id)
+            mine.append((time.perf_counter() - start) * 1000)
+            if job.status == DONE and "batch_size" in job.result:
+                sizes.append(job.result["batch_size"])
+        with lock:
+            latencies.extend(mine)
+            batches.extend(sizes)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - start), latencies, statistics.mean(batches) if batches else 0
+
+
+def waiting(analyze):
+    def run(data, recognizer):
+        result = analyze(data, recognizer)
+        return result.result() if isinstance(result, Future) else result
+
+    return run
+
+
+def report(name, throughput, latencies, mean_batch):
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:34s} {throughput:7.1f} img/s   p50 {statistics.median(ordered):7.2f} ms   p95 {p95:7.2f} ms"
+          f"   mean batch {mean_batch:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("numpy", "onnx"), default="numpy")
+    parser.add_argument("--model", help="ONNX model for the onnx backend")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--waits", type=float, nargs="+", default=[2, 10], help="max wait in ms")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=50, help="per client")
+    parser.add_argument("--pipeline-clients", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--workers", type=int, default=ANALYSIS_WORKERS, help="analysis worker threads")
+    parser.add_argument("--photo", type=int, nargs=2, default=[640, 480], metavar=("WIDTH", "HEIGHT"))
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    backend = load_backend(args.backend, args.model)
+    print(f"{backend.name} backend loaded and warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+    tensor = np.random.default_rng(0).standard_normal((1, backend.input_size, backend.input_size), dtype=np.float32)
+
+    for clients in args.clients:
+        throughput, latencies = run_clients(clients, args.requests, lambda item: backend.predict(item[None]), tensor)
+        report(f"{clients:2d} clients, unbatched", throughput, latencies, 1)
+        for wait in args.waits:
+            batcher = MicroBatcher(backend, max_batch=args.max_batch, max_wait_ms=wait)
+            throughput, latencies = run_clients(clients, args.requests, batcher.recognize, tensor)
+            batcher.close()
+            report(f"{clients:2d} clients, batched, wait {wait:g} ms", throughput, latencies, batcher.stats()["mean_batch"])
+
+    photo = label_jpeg(*args.photo, seed=0)
+    print(f"pipeline: {args.workers} analysis workers, {args.photo[0]}x{args.photo[1]} label photos, wait {max(args.waits):g} ms")
+    for clients in args.pipeline_clients:
+        for name, analyze in (("workers wait", waiting(analyze_upload)), ("handed off", analyze_upload)):
+            batcher = MicroBatcher(backend, max_batch=args.max_batch, max_wait_ms=max(args.waits))
+            service = AnalysisService(workers=args.workers, max_queue=clients)
+            throughput, latencies, mean_batch = run_pipeline(
+                clients, args.requests, service, lambda data: analyze(data, batcher), photo)
+            service.shutdown()
+            batcher.close()
+            report(f"{clients:2d} sessions, {name}", throughput, latencies, mean_batch)
+
+
+if __name__ == "__main__":
+    main()
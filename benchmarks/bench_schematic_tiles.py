@@ -0,0 +1,103 @@
+"""Schematic tile pyramid build, pan/zoom viewports and PDF export.
+
+Draws a large synthetic wiring diagram (a grid of wires, connectors and
+splices), builds its tile pyramid once and times viewports the viewer
+shows while panning at each zoom level, with a cold and a warm tile
+cache, then streams a PDF export and reports the process's peak RSS, and the
+build process's.
+
+Usage: python benchmarks/bench_schematic_tiles.py [--width 12000] [--height 8000]
+"""
+import argparse
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.schematic_tiles import TileCache, open_pyramid  # noqa: E402
+
+VIEWPORT = (960, 640)
+
+
+def draw_schematic(path, width, height, rng):
+    pixels = np.full((height, width), 255, dtype=np.uint8)
+    for y in range(40, height, 60):
+        pixels[y : y + 2, rng.integers(0, width // 2) : rng.integers(width // 2, width)] = 0
+    for x in range(40, width, 90):
+        pixels[rng.integers(0, height // 2) : rng.integers(height // 2, height), x : x + 2] = 0
+    for x, y in zip(rng.integers(0, width - 40, 4000), rng.integers(0, height - 30, 4000)):
+        pixels[y : y + 30, x : x + 40] = 96
+    Image.fromarray(pixels).save(path)
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:28s} p50 {statistics.median(ordered):7.3f} ms   p95 {p95:7.3f} ms   n {len(ordered)}")
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # Kilobytes on Linux, bytes on macOS
+    return resource.getrusage(who).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=12000)
+    parser.add_argument("--height", type=int, default=8000)
+    parser.add_argument("--pans", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "diagram.png")
+        draw_schematic(source, args.width, args.height, rng)
+        print(f"schematic: {args.width}x{args.height}, {os.path.getsize(source) / 1e6:.1f} MB PNG, peak RSS {peak_rss_mb():.0f} MB")
+        tile_dir = os.path.join(tmp_dir, "tiles")
+        start = time.perf_counter()
+        pyramid = open_pyramid(source, tile_dir, TileCache())
+        print(f"pyramid build: {time.perf_counter() - start:.2f} s, {pyramid.levels} levels, peak RSS {peak_rss_mb():.0f} MB"
+              f" (build process {peak_rss_mb(resource.RUSAGE_CHILDREN):.0f} MB)")
+        report("reopen built pyramid", [timed_ms(lambda: open_pyramid(source, tile_dir)) for _ in range(10)])
+
+        for level in range(min(pyramid.levels, 4)):
+            width, height = pyramid.sizes[level]
+            view_width, view_height = min(width, VIEWPORT[0]), min(height, VIEWPORT[1])
+            # A pan: small steps around a random point, like dragging a slider
+            x, y = rng.integers(0, width - view_width + 1), rng.integers(0, height - view_height + 1)
+            boxes = []
+            for _ in range(args.pans):
+                x = int(np.clip(x + rng.integers(-120, 121), 0, width - view_width))
+                y = int(np.clip(y + rng.integers(-80, 81), 0, height - view_height))
+                boxes.append((x, y))
+            pyramid.cache = TileCache()
+            cold = [timed_ms(lambda: pyramid.viewport(level, x, y, view_width, view_height)) for x, y in boxes]
+            warm = [timed_ms(lambda: pyramid.viewport(level, x, y, view_width, view_height)) for x, y in boxes]
+            report(f"level {level} pan, cold cache", cold)
+            report(f"level {level} pan, warm cache", warm)
+
+        pdf = os.path.join(tmp_dir, "diagram.pdf")
+        start = time.perf_counter()
+        with open(pdf, "wb") as pdf_file:
+            pyramid.write_pdf(pdf_file, 0)
+        elapsed = time.perf_counter() - start
+        pages = len(pyramid.pages(0))
+        print(f"PDF export, level 0: {pages} pages in {elapsed:.2f} s ({pages / elapsed:.1f} pages/s),"
+              f" {os.path.getsize(pdf) / 1e6:.1f} MB, peak RSS {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Diagnosis storage: batched vs per-write commits, and reads under load.
+
+Fills a fresh database with a workshop's worth of history (vehicles,
+diagnosis sessions and their steps) through the group-committing writer,
+then writes a smaller sample with one commit per write for comparison.
+Finally, client threads standing in for concurrent sessions read recent
+vehicles, a vehicle's history and a session's steps while another keeps
+recording new steps, and each query's latency is reported.
+
+Usage: python benchmarks/bench_storage.py [--vehicles 5000] [--sessions 100000] [--clients 8]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.storage import Storage  # noqa: E402
+from automotive_ai.vehicle_catalog import Vehicle  # noqa: E402
+
+SYMPTOMS = ["starting_failure", "no_charge", "cooling_fan"]
+NODES = ["battery_voltage", "load_test", "starter_voltage", "relay_click", "ground_drop", "alternator_output"]
+
+
+def write_sessions(storage, vehicles, sessions, rng, prefix):
+    writes = 0
+    for index in range(sessions):
+        session_id = f"{prefix}{index:08d}"
+        storage.start_session(session_id, rng.choice(SYMPTOMS), rng.choice(SYMPTOMS), rng.choice(vehicles))
+        steps = rng.randint(2, 6)
+        for step in range(steps):
+            result = "battery_low" if step == steps - 1 and rng.random() < 0.8 else None
+            storage.record_step(session_id, step, NODES[step], rng.uniform(0, 14), rng.random() < 0.7, result)
+        # start_session queues 2 writes, record_step 4
+        writes += 2 + 4 * steps
+    storage.flush()
+    return writes
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:22s} p50 {statistics.median(ordered):7.3f} ms   p95 {p95:7.3f} ms   n {len(ordered)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--unbatched-sessions", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vehicles = [Vehicle(f"Make {index % 40}", f"Model {index}", 2000 + index % 25, "1.0") for index in range(args.vehicles)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = Storage(os.path.join(tmp_dir, "batched.db"), pool_size=args.clients)
+        start = time.perf_counter()
+        writes = write_sessions(storage, vehicles, args.sessions, rng, "s")
+        elapsed = time.perf_counter() - start
+        print(f"batched: {writes} writes ({args.sessions} sessions) in {elapsed:.2f} s,"
+              f" {writes / elapsed:,.0f} writes/s in {storage.commits} commits")
+
+        single = Storage(os.path.join(tmp_dir, "unbatched.db"), batch=1, flush_ms=0)
+        start = time.perf_counter()
+        single_writes = write_sessions(single, vehicles, args.unbatched_sessions, rng, "u")
+        elapsed = time.perf_counter() - start
+        print(f"one commit per write: {single_writes} writes in {elapsed:.2f} s, {single_writes / elapsed:,.0f} writes/s")
+        single.close()
+
+        timings = {"recent_vehicles": [], "vehicle_history": [], "session_steps": []}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def client(seed):
+            client_rng = random.Random(seed)
+            mine = {name: [] for name in timings}
+            while not stop.is_set():
+                for name, query in (
+                    ("recent_vehicles", lambda: storage.recent_vehicles(10)),
+                    ("vehicle_history", lambda: storage.vehicle_history(client_rng.choice(vehicles), 10)),
+                    ("session_steps", lambda: storage.session_steps(f"s{client_rng.randrange(args.sessions):08d}")),
+                ):
+                    started = time.perf_counter()
+                    query()
+                    mine[name].append((time.perf_counter() - started) * 1000)
+            with lock:
+                for name, values in mine.items():
+                    timings[name].extend(values)
+
+        def recorder():
+            # A steady stream of answered steps from other sessions
+            index = 0
+            while not stop.is_set():
+                storage.start_session(f"w{index:08d}", SYMPTOMS[0], SYMPTOMS[0], rng.choice(vehicles))
+                storage.record_step(f"w{index:08d}", 0, NODES[0], 12.4, True)
+                index += 1
+                time.sleep(0.001)
+
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in range(args.clients)]
+        threads.append(threading.Thread(target=recorder))
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        storage.flush()
+        print(f"{args.clients} reading clients with a concurrent writer, {args.seconds:g} s:")
+        for name, values in timings.items():
+            report(name, values)
+        storage.close()
+        print(f"database: {os.path.getsize(os.path.join(tmp_dir, 'batched.db')) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Vehicle catalog lookups on a large synthetic catalog.
+
+Generates makes x models x engines over a span of years, compiles them
+and times the first (cold) lookup and warm autocomplete/chassis calls, as
+typed one character at a time.
+
+Usage: python benchmarks/bench_vehicle_catalog.py [--makes 60] [--models 150] [--engines 4]
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from automotive_ai.vehicle_catalog import VEHICLE_WMI_SOURCE, VehicleCatalog  # noqa: E402
+
+
+def write_catalog(path, makes, models, engines, rng):
+    with open(path, "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["make", "model", "engine", "year_from", "year_to"])
+        for make in range(makes):
+            for model in range(models):
+                for engine in range(engines):
+                    start = rng.randrange(1990, 2020)
+                    writer.writerow([f"Make{make:03d}", f"Model{make:03d}{model:03d}",
+                                     f"{1 + engine * 0.2:.1f} E{engine}", start, start + rng.randrange(2, 15)])
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def report(name, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    print(f"{name:28s} p50 {statistics.median(ordered):7.3f} ms   p95 {p95:7.3f} ms   n {len(ordered)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--makes", type=int, default=60)
+    parser.add_argument("--models", type=int, default=150)
+    parser.add_argument("--engines", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        catalog_path = os.path.join(tmp_dir, "catalog.csv")
+        write_catalog(catalog_path, args.makes, args.models, args.engines, rng)
+        catalog = VehicleCatalog(catalog_path, VEHICLE_WMI_SOURCE, os.path.join(tmp_dir, "index"))
+        print(f"compile + first lookup: {timed_ms(lambda: catalog.complete('make', 'm')):.1f} ms")
+        print(f"rows: {len(catalog._load()['rows_make'])}")
+        catalog = VehicleCatalog(catalog_path, VEHICLE_WMI_SOURCE, os.path.join(tmp_dir, "index"))
+        print(f"open compiled + first lookup: {timed_ms(lambda: catalog.complete('make', 'm')):.1f} ms")
+
+        makes = [f"Make{index:03d}" for index in range(args.makes)]
+        make_timings, model_timings, year_timings, engine_timings = [], [], [], []
+        for _ in range(200):
+            make = rng.choice(makes)
+            for length in range(1, len(make) + 1):
+                make_timings.append(timed_ms(lambda: catalog.complete("make", make[:length])))
+            model = catalog.complete("model", make=make, limit=1000)[rng.randrange(args.models)]
+            for length in range(1, len(model) + 1):
+                model_timings.append(timed_ms(lambda: catalog.complete("model", model[:length], make=make)))
+            year_timings.append(timed_ms(lambda: catalog.complete("year", make=make, model=model)))
+            year = catalog.complete("year", make=make, model=model)[0]
+            engine_timings.append(timed_ms(lambda: catalog.complete("engine", make=make, model=model, year=year)))
+        report("complete make (keystroke)", make_timings)
+        report("complete model | make", model_timings)
+        report("complete year | make+model", year_timings)
+        report("complete engine | m+m+year", engine_timings)
+        report("complete model, no context", [timed_ms(lambda: catalog.complete("model", "Model01")) for _ in range(200)])
+        vins = ["9", "9B", "9BW", "9BWAB45U0J", "9BWAB45U0JT004251"]
+        report("decode_chassis", [timed_ms(lambda: catalog.decode_chassis(rng.choice(vins))) for _ in range(200)])
+
+
+if __name__ == "__main__":
+    main()
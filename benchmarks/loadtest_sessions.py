@@ -0,0 +1,274 @@
+"""Load test: N concurrent workshop sessions driven through app.py in-process.
+
+Each simulated session runs on its own thread with Streamlit's AppTest: it
+opens the page, switches language, reruns the page (the server-side cost of
+a tab click), uploads a generated label photo of one of several sizes and
+presses analyze, polling until the result is shown. The samples pass the
+quality gate, so analyses run preprocessing and recognition; the run fails
+if most of them are rejected. Everything runs offline; the sample images
+are synthesised in memory. Sessions draw from a shared pool of images, so
+some analyses are answered by the result cache, as repeat photos of the
+same part would be.
+
+AppTest installs a process-global mock runtime for the length of each run,
+so script runs are serialised with a lock; the server's script threads
+share one GIL anyway. Latency is measured from the moment a session asks
+for a rerun, so it includes waiting behind other sessions; script time
+alone is reported separately. Background analyses run on the app's own
+worker pool, concurrently with the script runs.
+
+Reports rerun latency percentiles per action, reruns per second and the
+process RSS growth per live session.
+
+Usage:
+    python benchmarks/loadtest_sessions.py --sessions 8 --iterations 3
+    python benchmarks/loadtest_sessions.py --sessions 32 --output loadtest.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from PIL import Image, ImageDraw  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP_PATH = os.path.join(ROOT, "app.py")
+# Workshop photos: webcam, phone at reduced quality, full 12 MP phone shot
+IMAGE_SIZES = [(640, 480), (1920, 1080), (4000, 3000)]
+LANGUAGES = {"pt": "Portuguese", "en": "English"}
+ANALYSIS_TIMEOUT = 60.0
+POLL_INTERVAL = 0.1
+
+_RUN_LOCK = threading.Lock()
+
+
+def sample_jpeg(size, seed):
+    rng = np.random.default_rng(seed)
+    width, height = size
+    # A part label as the quality gate expects it: light, with rows of dark
+    # print, slightly rotated on a darker background. The background's coarse
+    # colour layout makes each sample hash differently and the sensor-like
+    # noise makes JPEG sizes resemble real photos.
+    layout = Image.fromarray(rng.integers(20, 120, (6, 8, 3), dtype=np.uint8), "RGB").resize(size, Image.BILINEAR)
+    label = Image.new("RGB", (width * 9 // 20, height // 3), (236, 236, 230))
+    draw = ImageDraw.Draw(label)
+    line_height = label.size[1] // 10
+    for line in range(9):
+        x = line_height
+        while x < label.size[0] - 2 * line_height:
+            glyph = int(rng.integers(line_height // 4, line_height // 2 + 1))
+            draw.rectangle((x, (line + 0.6) * line_height, x + glyph, (line + 1.3) * line_height), fill=(25, 25, 25))
+            x += glyph + int(rng.integers(line_height // 8, line_height // 2 + 1))
+    skew = float(rng.uniform(-10, 10))
+    mask = Image.new("L", label.size, 255).rotate(skew, expand=True)
+    layout.paste(label.rotate(skew, Image.BILINEAR, expand=True), (width // 4, height // 3), mask)
+    pixels = np.asarray(layout, dtype=np.int16) + rng.integers(-12, 13, (height, width, 3), dtype=np.int16)
+    buffer = BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB").save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pick(0.50) * 1000,
+        "p90_ms": pick(0.90) * 1000,
+        "p99_ms": pick(0.99) * 1000,
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": statistics.mean(ordered) * 1000,
+    }
+
+
+class Session:
+    def __init__(self, index, iterations, images):
+        self.index = index
+        self.iterations = iterations
+        self.images = images
+        self.rng = random.Random(index)
+        self.timings = []
+        self.script_times = []
+        self.errors = []
+        self.busy = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.app = None
+
+    def timed_run(self, action, element=None):
+        start = time.perf_counter()
+        with _RUN_LOCK:
+            script_start = time.perf_counter()
+            if element is None:
+                self.app.run()
+            else:
+                element.run()
+            end = time.perf_counter()
+        self.timings.append((action, end - start))
+        self.script_times.append(end - script_start)
+        if self.app.exception:
+            self.errors.append(f"{action}: {self.app.exception[0].value}")
+
+    def analyze(self, lang):
+        self.timed_run("analyze", self.app.button(key=f"analyze_{lang}").click())
+        deadline = time.monotonic() + ANALYSIS_TIMEOUT
+        while not (self.app.success or self.app.error):
+            if any(
+                warning.value.startswith(("The analysis queue", "A fila de analise"))
+                for warning in self.app.warning
+            ):
+                self.busy += 1
+                return
+            # The quality gate's verdict is a finished analysis too
+            if any(
+                warning.value.startswith(("Retake the photo", "Tire a foto novamente"))
+                for warning in self.app.warning
+            ):
+                self.rejected += 1
+                return
+            if time.monotonic() > deadline:
+                self.errors.append("analysis timed out")
+                return
+            time.sleep(POLL_INTERVAL)
+            self.timed_run("poll")
+        if self.app.success:
+            self.accepted += 1
+
+    def run(self):
+        self.app = AppTest.from_file(APP_PATH, default_timeout=ANALYSIS_TIMEOUT)
+        self.timed_run("first_load")
+        # Even sessions start in Portuguese, odd ones in English
+        langs = ["pt", "en"] if self.index % 2 == 0 else ["en", "pt"]
+        for iteration in range(self.iterations):
+            lang = langs[iteration % 2]
+            self.timed_run("switch_language", self.app.selectbox[0].set_value(LANGUAGES[lang]))
+            self.timed_run("tab_rerun")
+            data, size = self.images[self.rng.randrange(len(self.images))]
+            uploader = self.app.file_uploader(key=f"upload_{lang}")
+            self.timed_run("upload", uploader.upload(f"sample_{size[0]}x{size[1]}.jpg", data, "image/jpeg"))
+            self.analyze(lang)
+
+
+def run_load(sessions, iterations, images):
+    workers = [Session(index, iterations, images) for index in range(sessions)]
+    threads = [threading.Thread(target=worker.run, name=f"session-{worker.index}") for worker in workers]
+    gc.collect()
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    # Every AppTest is still referenced, so their session state is still alive
+    gc.collect()
+    rss_after = rss_bytes()
+
+    by_action = {}
+    for worker in workers:
+        for action, seconds in worker.timings:
+            by_action.setdefault(action, []).append(seconds)
+    all_timings = [seconds for values in by_action.values() for seconds in values]
+    return {
+        "sessions": sessions,
+        "iterations": iterations,
+        "elapsed_s": elapsed,
+        "reruns": len(all_timings),
+        "reruns_per_s": len(all_timings) / elapsed,
+        "sessions_per_min": sessions / elapsed * 60,
+        "rss_growth_mb": (rss_after - rss_before) / 2 ** 20,
+        "rss_per_session_mb": (rss_after - rss_before) / 2 ** 20 / sessions,
+        "queue_full": sum(worker.busy for worker in workers),
+        "accepted": sum(worker.accepted for worker in workers),
+        "rejected": sum(worker.rejected for worker in workers),
+        "errors": [f"session {worker.index}: {error}" for worker in workers for error in worker.errors],
+        "latency": {"all": percentiles(all_timings)},
+        "script_time": percentiles([seconds for worker in workers for seconds in worker.script_times]),
+        "latency_by_action": {action: percentiles(values) for action, values in sorted(by_action.items())},
+    }
+
+
+def print_report(report):
+    print(
+        f"{report['sessions']} sessions x {report['iterations']} iterations: "
+        f"{report['reruns']} reruns in {report['elapsed_s']:.1f} s "
+        f"({report['reruns_per_s']:.1f} reruns/s, {report['sessions_per_min']:.1f} sessions/min)"
+    )
+    print(f"RSS growth {report['rss_growth_mb']:.1f} MB ({report['rss_per_session_mb']:.2f} MB per session)")
+    print(f"{'action':16s} {'n':>5s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'max':>9s}")
+    rows = dict(report["latency_by_action"], all=report["latency"]["all"])
+    for action, stats in rows.items():
+        print(
+            f"{action:16s} {stats['count']:5d} {stats['p50_ms']:8.1f}ms {stats['p90_ms']:8.1f}ms "
+            f"{stats['p99_ms']:8.1f}ms {stats['max_ms']:8.1f}ms"
+        )
+    script = report["script_time"]
+    print(f"{'script only':16s} {script['count']:5d} {script['p50_ms']:8.1f}ms {script['p90_ms']:8.1f}ms "
+          f"{script['p99_ms']:8.1f}ms {script['max_ms']:8.1f}ms")
+    if report["queue_full"]:
+        print(f"{report['queue_full']} analyze request(s) refused with a full queue")
+    print(f"{report['accepted']} analyses accepted")
+    if report["rejected"]:
+        print(f"{report['rejected']} photo(s) rejected by the quality gate")
+    for error in report["errors"]:
+        print(f"ERROR {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent simulated sessions")
+    parser.add_argument("--iterations", type=int, default=3, help="language switch/upload/analyze rounds per session")
+    parser.add_argument("--images", type=int, default=12, help="distinct sample images shared by all sessions")
+    parser.add_argument("--output", help="also write the report as JSON here")
+    args = parser.parse_args()
+
+    sizes = [IMAGE_SIZES[seed % len(IMAGE_SIZES)] for seed in range(args.images)]
+    images = [(sample_jpeg(size, seed), size) for seed, size in enumerate(sizes)]
+    # Warm-up outside the measurement: bakes missing mockups and fills the
+    # process-wide caches, like a server that has already served one page.
+    AppTest.from_file(APP_PATH, default_timeout=ANALYSIS_TIMEOUT).run()
+
+    report = run_load(args.sessions, args.iterations, images)
+    # The samples are drawn to pass the quality gate; if most are rejected,
+    # the figures no longer measure preprocessing and recognition
+    analysed = report["accepted"] + report["rejected"]
+    if report["accepted"] * 2 <= analysed:
+        report["errors"].append(f"only {report['accepted']} of {analysed} samples passed the quality gate")
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"wrote {args.output}")
+    if report["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()